@@ -232,12 +232,14 @@ export async function POST(request: NextRequest) {
           const pythonResponse = await proxyToPythonService(sanitizedMessages, sessionId);
           
           // Forward the SSE stream from Python service
+          const serverTiming = pythonResponse.headers.get('Server-Timing');
           return new Response(pythonResponse.body, {
             headers: {
               'Content-Type': 'text/event-stream',
               'Cache-Control': 'no-cache, no-transform',
               'Connection': 'keep-alive',
               'X-Accel-Buffering': 'no',
+              ...(serverTiming ? { 'Server-Timing': serverTiming } : {}),
             },
           });
         } catch (error) {
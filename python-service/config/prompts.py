@@ -21,17 +21,46 @@ ERROR_MESSAGES = {
 }
 
 
+# =============================================================================
+# Response Rules (A/B Response Style)
+# =============================================================================
+
+RESPONSE_RULES_MARKER = "RESPONSE RULES:"
+
+
+def format_response_rules(response_style: str = "") -> str:
+    """
+    Format an A/B response style as the prompt's response-rules section.
+    
+    The section sits in the static head of both system prompts, so each
+    style gets its own byte-stable prefix.
+    
+    Args:
+        response_style: A/B response style text ("" for none)
+    
+    Returns:
+        The section text, or an empty string without a style.
+    """
+    rules = response_style.strip()
+    if not rules:
+        return ""
+    if not rules.startswith(RESPONSE_RULES_MARKER):
+        rules = f"{RESPONSE_RULES_MARKER}\n{rules}"
+    return f"## Response Style\n{rules}\n\n"
+
+
 # =============================================================================
 # System Prompt Template
 # =============================================================================
 
-def build_system_prompt(context: PortfolioContext) -> str:
+def build_system_prompt(context: PortfolioContext, response_style: str = "") -> str:
     """
     Build the system prompt with portfolio context.
     
     Args:
         context: Portfolio context with owner, projects, skills, etc.
-        
+        response_style: A/B response style text ("" for none)
+    
     Returns:
         Formatted system prompt string.
     """
@@ -50,7 +79,7 @@ def build_system_prompt(context: PortfolioContext) -> str:
 
     # Format quick facts
     quick_facts_text = "\n".join(f"- {fact}" for fact in context.quickFacts)
-
+    
     return f"""You are NEXI, the AI assistant for {context.owner.name}'s portfolio website.
 
 ## Your Identity
@@ -59,7 +88,7 @@ def build_system_prompt(context: PortfolioContext) -> str:
 - You speak as if {context.owner.name} is speaking through you
 - Never overclaim or fabricate information
 
-## Your Knowledge Base
+{format_response_rules(response_style)}## Your Knowledge Base
 You have accurate information about:
 
 ### About {context.owner.name}
@@ -117,38 +146,28 @@ NEXI: "I'm here specifically to help you learn about {context.owner.name}'s work
 # Semantic Search Enhanced Prompt
 # =============================================================================
 
-def build_semantic_prompt(
-    context: PortfolioContext,
-    retrieved_docs: Optional[List[Dict[str, Any]]] = None,
-    query: Optional[str] = None,
-) -> str:
+def format_retrieved_context(retrieved_docs: Optional[List[Dict[str, Any]]]) -> str:
     """
-    Build system prompt with semantic search results.
-    
-    When semantic search is available, this includes the most relevant
-    context based on the user's query, making responses more accurate.
+    Format semantic search results as the prompt's retrieved-context section.
     
     Args:
-        context: Portfolio context with owner, projects, skills, etc.
         retrieved_docs: List of relevant documents from semantic search.
-        query: The user's query (for context).
-        
+            Docs with a similarity `score` are labelled with it.
+    
     Returns:
-        Formatted system prompt string.
+        The section text, or an empty string if nothing was retrieved.
     """
-    owner = context.owner
+    if not retrieved_docs:
+        return ""
+    
+    docs_text = []
+    for doc in retrieved_docs:
+        content = doc.get("content", "")
+        score = doc.get("score")
+        # Lexical-only results have no similarity score to show
+        docs_text.append(f"[Relevance: {score:.0%}] {content}" if score is not None else content)
     
-    # Format retrieved context if available
-    retrieved_context = ""
-    if retrieved_docs:
-        docs_text = []
-        for i, doc in enumerate(retrieved_docs, 1):
-            source = doc.get("source", "portfolio")
-            content = doc.get("content", "")
-            score = doc.get("score", 0)
-            docs_text.append(f"[Relevance: {score:.0%}] {content}")
-        
-        retrieved_context = f"""
+    return f"""
 ## Retrieved Context (Most Relevant to Query)
 The following information was retrieved as most relevant to the user's question:
 
@@ -156,13 +175,30 @@ The following information was retrieved as most relevant to the user's question:
 
 ---
 """
+
+
+def semantic_prompt_parts(context: PortfolioContext, response_style: str = "") -> tuple[str, str]:
+    """
+    Build the static text around the retrieved-context section.
+    
+    Everything except the retrieved documents depends only on the
+    portfolio and the response style, so it can be rendered once and reused.
+    
+    Args:
+        context: Portfolio context with owner, projects, skills, etc.
+        response_style: A/B response style text ("" for none)
+    
+    Returns:
+        (head, tail): the prompt is head + retrieved context + tail.
+    """
+    owner = context.owner
     
     # Quick overview of skills for reference
     skills_summary = f"""Frontend: {', '.join(context.skills.frontend[:5])}
 Backend: {', '.join(context.skills.backend[:5])}
 Cloud: {', '.join(context.skills.cloud[:3])}"""
 
-    return f"""You are NEXI, the AI assistant for {owner.name}'s portfolio website.
+    head = f"""You are NEXI, the AI assistant for {owner.name}'s portfolio website.
 
 ## Your Identity
 - You are friendly, confident, and professional
@@ -170,7 +206,7 @@ Cloud: {', '.join(context.skills.cloud[:3])}"""
 - You speak as if {owner.name} is speaking through you
 - Never overclaim or fabricate information
 
-## About {owner.name}
+{format_response_rules(response_style)}## About {owner.name}
 - Title: {owner.title}
 - Location: {owner.location}
 - Bio: {owner.bio}
@@ -182,7 +218,9 @@ Cloud: {', '.join(context.skills.cloud[:3])}"""
 - Email: {context.contact.email}
 - GitHub: {context.contact.github}
 - LinkedIn: {context.contact.linkedin}
-{retrieved_context}
+"""
+
+    tail = f"""
 ## Response Guidelines
 1. **Prioritize the Retrieved Context** - If relevant context was retrieved, use it to answer accurately
 2. Answer ONLY based on the information provided in this prompt
@@ -198,6 +236,33 @@ Cloud: {', '.join(context.skills.cloud[:3])}"""
 - Never discuss pricing, availability, or specific timelines
 - Never pretend to have information you don't have"""
 
+    return head, tail
+
+
+def build_semantic_prompt(
+    context: PortfolioContext,
+    retrieved_docs: Optional[List[Dict[str, Any]]] = None,
+    query: Optional[str] = None,
+    response_style: str = "",
+) -> str:
+    """
+    Build system prompt with semantic search results.
+    
+    When semantic search is available, this includes the most relevant
+    context based on the user's query, making responses more accurate.
+    
+    Args:
+        context: Portfolio context with owner, projects, skills, etc.
+        retrieved_docs: List of relevant documents from semantic search.
+        query: The user's query (for context).
+        response_style: A/B response style text ("" for none)
+    
+    Returns:
+        Formatted system prompt string.
+    """
+    head, tail = semantic_prompt_parts(context, response_style)
+    return head + format_retrieved_context(retrieved_docs) + tail
+
 
 # =============================================================================
 # Welcome Message
@@ -209,7 +274,7 @@ def get_welcome_message(context: PortfolioContext) -> str:
     
     Args:
         context: Portfolio context with owner info.
-        
+    
     Returns:
         Welcome message string.
     """
@@ -24,22 +24,87 @@ class Settings(BaseSettings):
     ai_model: Optional[str] = None
     ai_max_tokens: int = 500
     ai_temperature: float = 0.7
+    prompt_layout: Literal["prefix_cache", "inline"] = "prefix_cache"  # Retrieved docs after the history (cacheable prefix) or inside the system prompt
+    context_token_budget: int = 2000  # Max tokens per request for retrieved docs and history (on top of the system prompt)
+    context_dedupe_threshold: float = 0.8  # Drop a retrieved chunk when this share of its terms is in another one
+    
+    # LLM HTTP Client Pool
+    llm_http2: bool = True
+    llm_max_connections: int = 20
+    llm_max_keepalive_connections: int = 10
+    llm_keepalive_expiry: float = 30.0  # Seconds an idle connection stays pooled
+    llm_connect_timeout: float = 5.0
+    llm_read_timeout: float = 60.0  # Max gap between streamed chunks
+    llm_write_timeout: float = 10.0
+    llm_pool_timeout: float = 5.0  # Wait for a free pooled connection
+    llm_first_byte_timeout: float = 20.0  # Wait for the provider to start responding
+    
+    # LLM Provider Routing
+    llm_providers: str = ""  # Failover order, e.g. "groq,openai" (default: ai_provider, then other configured)
+    llm_routing_strategy: Literal["health", "cheapest"] = "health"  # Preferred healthy provider, or cheapest within the SLO
+    llm_slo_ttft_ms: float = 3000.0  # Rolling p90 time-to-first-token a healthy provider must stay under
+    llm_max_error_rate: float = 0.25  # Rolling error rate above which a provider counts as degraded
+    llm_breaker_failures: int = 3  # Consecutive failures that open a provider's circuit
+    llm_breaker_cooldown: float = 30.0  # Seconds before an open circuit lets a trial request through
+    llm_hedging_enabled: bool = False  # Race a second request when the first token is slow
+    llm_hedge_budget: float = 0.05  # Max share of extra (hedge) requests over a 5 minute window
+    llm_hedge_delay_ms: float = 1500.0  # Hedge threshold until there are enough TTFT samples for a p90
+    
+    # Vector Store Backend ("pinecone" or in-process "local" NumPy index)
+    vector_store: Literal["pinecone", "local"] = "pinecone"
+    local_index_path: str = "data/vector_index"  # Relative to the service root
+    local_index_dtype: Literal["float32", "float16"] = "float32"
+    index_pointer_refresh: float = 10.0  # Seconds between re-reads of the served namespace pointer
     
     # Pinecone Configuration (Phase 2: Semantic Search)
     pinecone_api_key: Optional[str] = None
     pinecone_index_name: str = "nexi-portfolio"
     pinecone_cloud: str = "aws"
     pinecone_region: str = "us-east-1"
+    pinecone_max_concurrency: int = 4  # Worker threads for blocking Pinecone calls
     
     # Embedding Configuration
     embedding_model: str = "text-embedding-3-small"
     embedding_dimensions: int = 1536
     semantic_search_top_k: int = 3
     semantic_search_threshold: float = 0.7
+    embedding_timeout: float = 10.0
+    embedding_batch_enabled: bool = True  # Micro-batch concurrent query embeddings into one API call
+    embedding_batch_window_ms: float = 5.0  # How long the first request waits for company
+    embedding_batch_max_size: int = 64  # Send the batch early once it holds this many texts
+    embedding_cache_enabled: bool = True  # Reuse embeddings of repeated query texts
+    embedding_cache_size: int = 2048  # Vectors kept (LRU); 2048 x 1536 float32 = 12 MB
+    embedding_cache_persist: bool = False  # Memory-map the cache to disk so it survives restarts
+    embedding_cache_path: str = "data/embedding_cache"  # Relative to the service root (.f32 + .keys + .json, locked to one process)
     
     # Feature flags
     use_semantic_search: bool = True
     
+    # Lexical (BM25) Search - works without any API keys
+    hybrid_search_enabled: bool = True  # BM25 alongside vector search (fused with RRF), or alone
+    bm25_k1: float = 1.2  # Term frequency saturation
+    bm25_b: float = 0.75  # Document length normalization
+    rrf_k: int = 60  # Reciprocal rank fusion damping constant
+    
+    # Local Intent Router - answers simple factual questions without the LLM
+    intent_router_enabled: bool = True
+    intent_router_threshold: float = 0.9  # Min share of the question's content words the matched intent must explain
+    
+    # Response Cache
+    semantic_cache_enabled: bool = True
+    semantic_cache_threshold: float = 0.9  # Min cosine similarity to reuse a cached answer
+    singleflight_enabled: bool = True  # Coalesce identical concurrent queries onto one LLM stream
+    cache_persist_enabled: bool = False  # SQLite-backed tier that survives restarts
+    cache_persist_path: str = "data/response_cache.sqlite3"  # Relative to the service root
+    cache_persist_max_entries: int = 5000
+    cache_preload_size: int = 200  # Hottest entries loaded into memory at startup
+    cache_replay_mode: Literal["instant", "chunked", "paced"] = "chunked"  # How cache hits are streamed
+    cache_replay_chunk_chars: int = 48  # Cached frames hold ~N chars (0 = original tokens)
+    cache_replay_delay: float = 0.02  # Seconds between frames in paced mode
+    stream_coalesce_chars: int = 64  # Flush an outgoing SSE frame at N chars (0 = one frame per token)
+    stream_coalesce_window: float = 0.025  # ...or after this many seconds, whichever comes first
+    sse_header_wait: float = 0.1  # Max seconds headers wait for the first event (its timings go in Server-Timing)
+    
     # Error Tracking (Phase 4)
     sentry_dsn: Optional[str] = None
     environment: str = "development"
@@ -55,33 +120,59 @@ class Settings(BaseSettings):
     groq_cost_per_1k_tokens: float = 0.0  # Groq is free tier
     
     # Provider-specific defaults
-    @property
-    def model(self) -> str:
-        """Get the model to use, with provider-specific defaults."""
-        if self.ai_model:
+    def model_for(self, provider: str) -> str:
+        """Get the model for a provider (ai_model only applies to ai_provider)."""
+        if self.ai_model and provider == self.ai_provider:
             return self.ai_model
         
         defaults = {
             "openai": "gpt-4o-mini",
             "groq": "llama-3.1-8b-instant",
         }
-        return defaults.get(self.ai_provider, "gpt-4o-mini")
+        return defaults.get(provider, "gpt-4o-mini")
     
-    @property
-    def api_key(self) -> Optional[str]:
-        """Get the API key for the active provider."""
-        if self.ai_provider == "openai":
+    def api_key_for(self, provider: str) -> Optional[str]:
+        """Get the API key for a provider."""
+        if provider == "openai":
             return self.openai_api_key
         return self.groq_api_key
     
-    @property
-    def base_url(self) -> str:
-        """Get the base URL for the active provider."""
+    def base_url_for(self, provider: str) -> str:
+        """Get the base URL for a provider."""
         urls = {
             "openai": "https://api.openai.com/v1",
             "groq": "https://api.groq.com/openai/v1",
         }
-        return urls.get(self.ai_provider, urls["openai"])
+        return urls.get(provider, urls["openai"])
+    
+    @property
+    def model(self) -> str:
+        """Get the model to use, with provider-specific defaults."""
+        return self.model_for(self.ai_provider)
+    
+    @property
+    def api_key(self) -> Optional[str]:
+        """Get the API key for the active provider."""
+        return self.api_key_for(self.ai_provider)
+    
+    @property
+    def base_url(self) -> str:
+        """Get the base URL for the active provider."""
+        return self.base_url_for(self.ai_provider)
+    
+    @property
+    def provider_order(self) -> list[str]:
+        """Configured providers in failover order."""
+        if self.llm_providers:
+            names = [name.strip() for name in self.llm_providers.split(",") if name.strip()]
+        else:
+            names = [self.ai_provider] + [p for p in ("groq", "openai") if p != self.ai_provider]
+        
+        order = []
+        for name in names:
+            if name in ("openai", "groq") and name not in order and self.api_key_for(name):
+                order.append(name)
+        return order
     
     @property
     def cors_origins_list(self) -> list[str]:
@@ -89,13 +180,19 @@ class Settings(BaseSettings):
         return [origin.strip() for origin in self.cors_origins.split(",") if origin.strip()]
     
     def is_configured(self) -> bool:
-        """Check if the AI provider is properly configured."""
-        return bool(self.api_key)
+        """Check if at least one AI provider is properly configured."""
+        return bool(self.provider_order)
     
     def is_pinecone_configured(self) -> bool:
         """Check if Pinecone is properly configured."""
         return bool(self.pinecone_api_key)
     
+    def is_vector_store_configured(self) -> bool:
+        """Check if the selected vector store backend can be used."""
+        if self.vector_store == "local":
+            return True
+        return self.is_pinecone_configured()
+    
     def is_embedding_configured(self) -> bool:
         """Check if embedding generation is configured (requires OpenAI key)."""
         return bool(self.openai_api_key)
@@ -104,7 +201,7 @@ class Settings(BaseSettings):
         """Check if semantic search can be used."""
         return (
             self.use_semantic_search 
-            and self.is_pinecone_configured() 
+            and self.is_vector_store_configured() 
             and self.is_embedding_configured()
         )
     
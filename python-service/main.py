@@ -5,28 +5,34 @@ SSE streaming endpoint for chat completions with semantic search.
 Phase 4: Includes caching, metrics, and admin endpoints.
 """
 
+import asyncio
 import json
 import logging
 import time
-from contextlib import asynccontextmanager
-from typing import AsyncGenerator, List, Dict, Any
+from contextlib import asynccontextmanager, aclosing
+from typing import AsyncGenerator, AsyncIterator, List, Dict, Any, Optional, Union
 from datetime import datetime
 
 from fastapi import FastAPI, HTTPException, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from sse_starlette.sse import EventSourceResponse
 from pydantic import BaseModel
 
-from config import settings, build_system_prompt, ERROR_MESSAGES
-from config.prompts import build_semantic_prompt
+from config import settings, ERROR_MESSAGES
 from models import ChatRequest, HealthResponse, ErrorResponse
 from services import (
     stream_chat_completion,
     is_provider_configured,
+    init_http_client,
+    close_http_client,
+    get_router,
+    get_hedging,
+    StreamInfo,
     get_portfolio_context,
     get_response_cache,
     get_fallback_response,
+    get_single_flight,
     # Phase 4: Error tracking
     init_sentry,
     capture_exception,
@@ -40,7 +46,26 @@ from services import (
     get_cost_monitor,
     record_token_usage,
 )
-from services.embeddings import search_similar, get_index_stats
+from services.embedding_cache import get_embedding_cache, get_embedding_cache_stats
+from services.intent_router import get_intent_router
+from services.lexical import get_lexical_index, hybrid_results
+from services.prompt_renderer import get_prompt_renderer
+from services.token_budget import count_tokens, get_token_budget_stats, load_encoding
+from services.metrics import LatencyRecorder, RequestTimer, StageMetrics
+from services.sse_frames import (
+    DONE_FRAME,
+    StreamStats,
+    coalesce_tokens,
+    content_frame,
+    replay_frames,
+)
+from services.embeddings import (
+    generate_embedding,
+    get_embedding_batcher,
+    search_by_embedding,
+    get_index_stats,
+    close_clients as close_embedding_clients,
+)
 
 # =============================================================================
 # Logging Configuration
@@ -64,11 +89,27 @@ class MetricsTracker:
         self.request_count = 0
         self.error_count = 0
         self.total_response_time_ms = 0
-        self.response_times: List[float] = []  # Last 100 response times
+        # Bounded latency histograms (lifetime + rolling 1m/5m/1h windows)
+        self.latency: Dict[str, LatencyRecorder] = {
+            "all": LatencyRecorder(),
+            "cached": LatencyRecorder(),
+            "routed": LatencyRecorder(),  # Answered by the intent router
+            "uncached": LatencyRecorder(),
+        }
+        # Per-stage pipeline timings, TTFT and tokens/sec
+        self.stages = StageMetrics()
+        # Outgoing SSE frames (after token coalescing)
+        self.stream_totals = {"responses": 0, "frames": 0, "bytes": 0, "tokens": 0}
+        # Client disconnects mid-stream
+        self.cancellations = {"streams": 0, "upstream_cancelled": 0, "tokens_received": 0, "tokens_saved": 0}
+        self._completed_llm_streams = 0
+        self._completed_llm_tokens = 0
         self.chat_logs: List[Dict[str, Any]] = []  # Last 500 chat logs
         self.hourly_requests: Dict[int, int] = {}  # Requests per hour
     
-    def record_request(self, response_time_ms: float, success: bool = True):
+    def record_request(
+        self, response_time_ms: float, success: bool = True, cached: bool = False, routed: bool = False
+    ):
         """Record a request with its response time."""
         self.request_count += 1
         self.total_response_time_ms += response_time_ms
@@ -76,16 +117,62 @@ class MetricsTracker:
         if not success:
             self.error_count += 1
         
-        # Track response times (keep last 100)
-        self.response_times.append(response_time_ms)
-        if len(self.response_times) > 100:
-            self.response_times.pop(0)
+        # Track response times (O(1), bounded memory)
+        now = time.time()
+        self.latency["all"].record(response_time_ms, now)
+        series = "routed" if routed else "cached" if cached else "uncached"
+        self.latency[series].record(response_time_ms, now)
         
         # Track hourly distribution
         hour = datetime.now().hour
         self.hourly_requests[hour] = self.hourly_requests.get(hour, 0) + 1
     
-    def log_chat(self, query: str, response_preview: str, response_time_ms: float, cached: bool = False):
+    def record_stages(self, timer: RequestTimer):
+        """Record the per-stage timings of a finished request."""
+        self.stages.record(timer)
+    
+    def record_llm_output(self, output_tokens: int):
+        """Record the length of a fully streamed LLM answer (for savings estimates)."""
+        self._completed_llm_streams += 1
+        self._completed_llm_tokens += output_tokens
+    
+    def record_cancellation(self, tokens_received: int, upstream_cancelled: bool) -> int:
+        """
+        Record a stream abandoned by the client.
+        
+        Args:
+            tokens_received: Tokens already pulled from the provider
+            upstream_cancelled: Whether the provider stream was stopped
+        
+        Returns:
+            Estimated tokens saved (average completed answer length minus
+            what was already received, capped at ai_max_tokens)
+        """
+        saved = 0
+        if upstream_cancelled:
+            expected = (
+                self._completed_llm_tokens / self._completed_llm_streams
+                if self._completed_llm_streams else settings.ai_max_tokens
+            )
+            saved = max(0, int(min(expected, settings.ai_max_tokens)) - tokens_received)
+        
+        self.cancellations["streams"] += 1
+        self.cancellations["upstream_cancelled"] += int(upstream_cancelled)
+        self.cancellations["tokens_received"] += tokens_received
+        self.cancellations["tokens_saved"] += saved
+        
+        return saved
+    
+    def record_stream(self, stats: StreamStats):
+        """Record the frames and bytes sent for a finished response."""
+        self.stream_totals["responses"] += 1
+        self.stream_totals["frames"] += stats.frames
+        self.stream_totals["bytes"] += stats.bytes
+        self.stream_totals["tokens"] += stats.tokens
+    
+    def log_chat(
+        self, query: str, response_preview: str, response_time_ms: float, cached: bool = False, routed: bool = False
+    ):
         """Log a chat interaction for admin review."""
         log_entry = {
             "id": f"log_{int(time.time())}_{len(self.chat_logs)}",
@@ -94,6 +181,7 @@ class MetricsTracker:
             "response_preview": response_preview[:200],
             "response_time_ms": round(response_time_ms, 2),
             "cached": cached,
+            "routed": routed,
         }
         
         self.chat_logs.append(log_entry)
@@ -104,11 +192,13 @@ class MetricsTracker:
     
     def get_metrics(self) -> Dict[str, Any]:
         """Get current metrics."""
-        uptime_seconds = time.time() - self.start_time
+        now = time.time()
+        uptime_seconds = now - self.start_time
         avg_response_time = (
-            sum(self.response_times) / len(self.response_times)
-            if self.response_times else 0
+            self.total_response_time_ms / self.request_count
+            if self.request_count else 0
         )
+        recent = self.latency["all"].windows["1h"].snapshot(now)
         
         return {
             "uptime_seconds": round(uptime_seconds, 2),
@@ -117,9 +207,36 @@ class MetricsTracker:
             "error_count": self.error_count,
             "error_rate": f"{(self.error_count / self.request_count * 100):.1f}%" if self.request_count > 0 else "0%",
             "avg_response_time_ms": round(avg_response_time, 2),
-            "p95_response_time_ms": round(self._percentile(self.response_times, 95), 2) if self.response_times else 0,
+            "p95_response_time_ms": round(recent.percentiles((95,))[95], 2),
             "requests_per_minute": round(self.request_count / (uptime_seconds / 60), 2) if uptime_seconds > 0 else 0,
             "hourly_distribution": self.hourly_requests,
+            "latency": {
+                series: recorder.summary(now)
+                for series, recorder in self.latency.items()
+            },
+            "pipeline": self.stages.summary(),
+            "streaming": self._stream_summary(),
+            "cancellations": {
+                "cancelled_streams": self.cancellations["streams"],
+                "upstream_cancelled": self.cancellations["upstream_cancelled"],
+                "tokens_received_before_cancel": self.cancellations["tokens_received"],
+                "tokens_saved_estimate": self.cancellations["tokens_saved"],
+            },
+        }
+    
+    def _stream_summary(self) -> Dict[str, Any]:
+        """Summarize outgoing SSE frame counts and sizes."""
+        totals = self.stream_totals
+        frames = totals["frames"]
+        
+        return {
+            "responses": totals["responses"],
+            "frames_sent": frames,
+            "bytes_sent": totals["bytes"],
+            "tokens_sent": totals["tokens"],
+            "avg_frames_per_response": round(frames / totals["responses"], 2) if totals["responses"] else 0,
+            "avg_tokens_per_frame": round(totals["tokens"] / frames, 2) if frames else 0,
+            "avg_frame_bytes": round(totals["bytes"] / frames, 1) if frames else 0,
         }
     
     def get_logs(self, limit: int = 50) -> List[Dict[str, Any]]:
@@ -137,15 +254,6 @@ class MetricsTracker:
             return f"{minutes}m {secs}s"
         else:
             return f"{secs}s"
-    
-    def _percentile(self, data: List[float], percentile: int) -> float:
-        """Calculate percentile of a list."""
-        if not data:
-            return 0
-        
-        sorted_data = sorted(data)
-        index = int(len(sorted_data) * percentile / 100)
-        return sorted_data[min(index, len(sorted_data) - 1)]
 
 
 # Global metrics instance
@@ -174,19 +282,38 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to load portfolio: {e}")
     
+    # Load the tokenizer off the event loop (tiktoken may download its BPE file)
+    encoding = await asyncio.to_thread(load_encoding)
+    logger.info(f"Token counting: {f'tiktoken ({encoding.name})' if encoding is not None else 'approximate'}")
+    
+    # Initialize pooled LLM HTTP client
+    logger.info("-" * 50)
+    logger.info("LLM HTTP Client Status:")
+    await init_http_client()
+    logger.info(f"  HTTP/2: {settings.llm_http2}")
+    logger.info(f"  Max connections: {settings.llm_max_connections} (keep-alive: {settings.llm_max_keepalive_connections})")
+    logger.info(f"  Timeouts: connect={settings.llm_connect_timeout}s, first_byte={settings.llm_first_byte_timeout}s, read={settings.llm_read_timeout}s")
+    
     # Check semantic search status
     logger.info("-" * 50)
     logger.info("Semantic Search Status:")
+    logger.info(f"  Vector store: {settings.vector_store}")
     logger.info(f"  Pinecone configured: {settings.is_pinecone_configured()}")
     logger.info(f"  Embeddings configured: {settings.is_embedding_configured()}")
     logger.info(f"  Semantic search enabled: {settings.use_semantic_search}")
     logger.info(f"  Ready: {settings.is_semantic_search_ready()}")
+    if settings.hybrid_search_enabled:
+        try:
+            logger.info(f"  BM25 index: {len(get_lexical_index())} chunks (hybrid retrieval)")
+        except Exception as e:
+            logger.warning(f"  Could not build BM25 index: {e}")
     
     if settings.is_semantic_search_ready():
         try:
             stats = await get_index_stats()
-            vector_count = stats.get("total_vector_count", 0)
-            logger.info(f"  Index vectors: {vector_count}")
+            namespace = stats.get("active_namespace")
+            vector_count = stats.get("namespaces", {}).get(namespace, {}).get("vector_count", 0)
+            logger.info(f"  Index vectors: {vector_count} (namespace '{namespace}')")
             if vector_count == 0:
                 logger.warning("  WARNING: Index is empty! Run 'python scripts/index_portfolio.py'")
         except Exception as e:
@@ -196,9 +323,18 @@ async def lifespan(app: FastAPI):
     logger.info("-" * 50)
     logger.info("Response Cache Status:")
     cache = get_response_cache()
+    try:
+        await asyncio.to_thread(cache.warm_from_store, settings.cache_preload_size)
+    except Exception as e:
+        logger.warning(f"  Could not warm cache from persistent store: {e}")
     cache_stats = cache.get_stats()
     logger.info(f"  Cache initialized: max_size={cache_stats['max_size']}")
+    logger.info(f"  Persistent tier: {cache_stats['persistent']['enabled']} (preloaded {cache_stats['persistent']['preloaded']} entries)")
     logger.info(f"  Caching enabled: True")
+    logger.info(f"  Semantic cache: {settings.semantic_cache_enabled and settings.is_embedding_configured()} (threshold={settings.semantic_cache_threshold})")
+    if settings.embedding_cache_enabled:
+        embedding_cache_stats = get_embedding_cache().get_stats()
+        logger.info(f"  Embedding cache: max_size={embedding_cache_stats['max_size']}, persistent={embedding_cache_stats['persistent']} (loaded {embedding_cache_stats['loaded']})")
     
     # Initialize Sentry (Phase 4)
     logger.info("-" * 50)
@@ -231,6 +367,11 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("NEXI AI Service Shutting Down...")
+    await close_http_client()
+    await close_embedding_clients()
+    get_response_cache().close()
+    if settings.embedding_cache_enabled:
+        get_embedding_cache().close()
 
 # =============================================================================
 # FastAPI Application
@@ -319,6 +460,7 @@ async def health_check():
         "semantic_search": {
             "enabled": settings.use_semantic_search,
             "ready": semantic_ready,
+            "vector_store": settings.vector_store,
             "pinecone_configured": settings.is_pinecone_configured(),
             "embedding_configured": settings.is_embedding_configured(),
             "index_name": settings.pinecone_index_name if settings.is_pinecone_configured() else None,
@@ -349,13 +491,112 @@ async def health_check():
 # Chat Endpoint (SSE Streaming)
 # =============================================================================
 
-async def generate_sse_stream(request: ChatRequest) -> AsyncGenerator[dict, None]:
-    """Generate SSE stream from LLM response with semantic search, caching, and A/B testing."""
+# Events are dicts for sse-starlette to encode, or pre-encoded frame bytes
+SSEEvent = Union[dict, bytes]
+
+class ClientDisconnected(Exception):
+    """The SSE client went away mid-stream."""
+
+
+async def timed_stream(tokens: AsyncIterator[str], timer: RequestTimer) -> AsyncIterator[str]:
+    """Pass tokens through, timing the wait for the first one and the rest."""
+    started = timer.now()
+    first_at = None
+    
+    # Closing this stream closes the upstream one right away (not at GC)
+    async with aclosing(tokens):
+        async for token in tokens:
+            if first_at is None:
+                first_at = timer.now()
+                timer.add("llm_first_token", started, first_at)
+            timer.mark_token()
+            yield token
+    
+    if first_at is not None:
+        timer.add("llm_stream", first_at)
+
+
+async def stream_frames(
+    tokens: AsyncIterator[str],
+    timer: RequestTimer,
+    stats: StreamStats,
+    collected: List[str],
+    client: Optional[Request] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Turn upstream tokens into outgoing content frames.
+    
+    Tokens are timed, collected (for caching and logs) and coalesced into
+    frames by size or time window; the first token is never held back.
+    
+    Raises:
+        ClientDisconnected: If the client has gone away. The upstream
+            stream is closed before this propagates.
+    """
+    batches = coalesce_tokens(
+        timed_stream(tokens, timer),
+        max_chars=settings.stream_coalesce_chars,
+        window=settings.stream_coalesce_window,
+    )
+    
+    async with aclosing(batches):
+        async for batch in batches:
+            collected.extend(batch)
+            if client is not None and await client.is_disconnected():
+                raise ClientDisconnected()
+            yield stats.add(content_frame("".join(batch)), tokens=len(batch))
+
+
+async def _prepend(
+    first: "asyncio.Future[SSEEvent]",
+    rest: AsyncGenerator[SSEEvent, None],
+) -> AsyncGenerator[SSEEvent, None]:
+    """
+    Re-attach the prefetched first event (awaited if still pending) to the
+    rest of the stream.
+    
+    Closing this stream (client disconnect, cancellation) closes the inner
+    one, so the pipeline's cleanup and upstream cancellation run right away.
+    """
+    try:
+        yield await first
+        async for event in rest:
+            yield event
+    finally:
+        await rest.aclose()
+
+
+async def _wait_disconnected(request: Request, interval: float = 0.05):
+    """Return once the client has disconnected."""
+    while not await request.is_disconnected():
+        await asyncio.sleep(interval)
+
+
+async def generate_sse_stream(
+    request: ChatRequest,
+    timer: Optional[RequestTimer] = None,
+    client: Optional[Request] = None,
+) -> AsyncGenerator[SSEEvent, None]:
+    """
+    Generate SSE stream from LLM response with semantic search, caching, and A/B testing.
+    
+    If the client disconnects (detected by EventSourceResponse, or by
+    polling `client.is_disconnected()` between frames) the upstream LLM
+    stream is cancelled, partial usage is recorded and nothing is cached.
+    """
     start_time = time.time()
+    timer = timer or RequestTimer()
     response_content = ""
+    stream_stats = StreamStats()
     cached = False
+    coalesced = False
+    routed = None  # Templated answer from the intent router (no LLM call)
+    flight = None
+    subscriber = object()  # This request's subscription handle on a shared flight
+    stream_info = StreamInfo()  # Provider/model that actually served the answer
     input_tokens = 0
     output_tokens = 0
+    cached_input_tokens = 0  # Prompt tokens the provider served from its prefix cache
     session_id = request.session_id or "anonymous"
     
     try:
@@ -376,112 +617,262 @@ async def generate_sse_stream(request: ChatRequest) -> AsyncGenerator[dict, None
                 user_query = msg.content
                 break
         
-        # Estimate input tokens (rough approximation)
-        input_tokens = len(user_query.split()) * 2
+        # Input tokens of the question alone, until the full prompt is built
+        input_tokens = count_tokens(user_query)
+        
+        # Simple factual questions are answered from the portfolio directly
+        if settings.intent_router_enabled and user_query:
+            # Earlier questions may give a follow-up its topic ("which tech stack?")
+            follow_up = sum(1 for msg in request.messages if msg.role == "user") > 1
+            with timer.span("intent"):
+                routed = get_intent_router().route(user_query, context, follow_up=follow_up)
         
         # Check cache first (Phase 4)
         cache = get_response_cache()
-        cached_response = cache.get(user_query)
+        single_flight = get_single_flight()
+        with timer.span("cache"):
+            cached_entry = await cache.get_entry(user_query) if routed is None else None
+            
+            # Join an identical query that is already streaming instead of
+            # starting a second upstream LLM stream
+            flight_key = cache.make_key(user_query)
+            flight = None
+            if not cached_entry and routed is None and user_query and settings.singleflight_enabled:
+                flight = single_flight.get(flight_key)
         
-        if cached_response:
-            # Return cached response (stream it token by token for consistent UX)
+        # Semantic cache tier: reuse the answer of a paraphrased earlier query.
+        # The embedding is kept for the vector search and the cache write below.
+        query_embedding = None
+        if (
+            not cached_entry
+            and routed is None
+            and flight is None
+            and user_query
+            and settings.semantic_cache_enabled
+            and settings.is_embedding_configured()
+        ):
+            try:
+                with timer.span("embedding"):
+                    query_embedding = await generate_embedding(user_query)
+                with timer.span("semantic_cache"):
+                    cached_entry = cache.get_similar_entry(query_embedding)
+                if cached_entry:
+                    add_breadcrumb("Semantic cache hit", "cache", query=user_query[:50])
+            except Exception as e:
+                logger.warning(f"Semantic cache lookup failed: {e}")
+        
+        if routed:
+            # Templated answer, no LLM call (accounted as routed, not as a cache hit)
+            logger.info(f"Intent '{routed.intent}' answered locally: {user_query[:50]}...")
+            add_breadcrumb("Intent routed", "intent", intent=routed.intent, confidence=routed.confidence)
+            
+            replay_started = timer.now()
+            async for frame in replay_frames(
+                routed.frames,
+                mode=settings.cache_replay_mode,
+                delay=settings.cache_replay_delay,
+            ):
+                timer.mark_token()
+                yield stream_stats.add(frame)
+            timer.add("replay", replay_started)
+            
+            response_content = routed.text
+            output_tokens = count_tokens(response_content)
+        elif cached_entry:
+            # Return cached response (replay its pre-encoded SSE frames)
             cached = True
             logger.info(f"Cache hit for query: {user_query[:50]}...")
             add_breadcrumb("Cache hit", "cache", query=user_query[:50])
             
-            # Stream cached response word by word for natural feel
-            words = cached_response.split()
-            for i, word in enumerate(words):
-                token = word + (" " if i < len(words) - 1 else "")
-                response_content += token
-                yield {
-                    "event": "message",
-                    "data": json.dumps({"type": "content", "content": token}),
-                }
+            replay_started = timer.now()
+            async for frame in replay_frames(
+                cached_entry.frames,
+                mode=settings.cache_replay_mode,
+                delay=settings.cache_replay_delay,
+            ):
+                timer.mark_token()
+                yield stream_stats.add(frame)
+            timer.add("replay", replay_started)
             
-            output_tokens = len(words) * 2  # Rough estimate
-        else:
+            response_content = cached_entry.response
+            output_tokens = count_tokens(response_content)
+        elif flight is None:
             # Perform semantic search if configured
-            retrieved_docs = []
+            dense_docs = []
             if settings.is_semantic_search_ready() and user_query:
                 try:
-                    retrieved_docs = await search_similar(
-                        query=user_query,
-                        top_k=settings.semantic_search_top_k,
-                        threshold=settings.semantic_search_threshold,
-                    )
-                    if retrieved_docs:
-                        logger.info(f"Semantic search: {len(retrieved_docs)} docs retrieved for '{user_query[:50]}...'")
-                        add_breadcrumb("Semantic search", "search", docs_found=len(retrieved_docs))
+                    # Embed here when the semantic cache didn't already
+                    if query_embedding is None:
+                        with timer.span("embedding"):
+                            query_embedding = await generate_embedding(user_query)
+                    with timer.span("vector_search"):
+                        dense_docs = await search_by_embedding(
+                            embedding=query_embedding,
+                            top_k=settings.semantic_search_top_k,
+                            threshold=settings.semantic_search_threshold,
+                        )
                 except Exception as e:
                     logger.warning(f"Semantic search failed, using fallback: {e}")
-                    retrieved_docs = []
+                    dense_docs = []
             
-            # Build system prompt (with or without semantic context)
-            # Apply A/B testing variations if enabled
+            # Lexical (BM25) search runs in-process, so it works offline too
+            lexical_docs = []
+            if settings.hybrid_search_enabled and user_query:
+                try:
+                    with timer.span("lexical_search"):
+                        lexical_docs = get_lexical_index().search(user_query, settings.semantic_search_top_k)
+                except Exception as e:
+                    logger.warning(f"Lexical search failed: {e}")
+            
+            retrieved_docs = hybrid_results(dense_docs, lexical_docs, settings.semantic_search_top_k)
             if retrieved_docs:
-                system_prompt = build_semantic_prompt(
-                    context=context,
-                    retrieved_docs=retrieved_docs,
-                    query=user_query,
+                logger.info(
+                    f"Retrieval: {len(retrieved_docs)} docs (vector {len(dense_docs)}, "
+                    f"bm25 {len(lexical_docs)}) for '{user_query[:50]}...'"
                 )
-            else:
-                # Fallback to full context prompt
-                system_prompt = build_system_prompt(context)
+                add_breadcrumb("Semantic search", "search", docs_found=len(retrieved_docs))
             
-            # Apply A/B test prompt variations (Phase 4)
+            # Build system prompt (with or without semantic context)
+            # from templates pre-rendered per portfolio version and A/B style
+            prompt_started = timer.now()
+            response_style = ""
             if settings.ab_testing_enabled:
                 response_style = get_prompt_for_session(session_id, "response_style")
                 if response_style:
-                    # Inject A/B test variation into system prompt
-                    system_prompt = system_prompt.replace(
-                        "RESPONSE RULES:",
-                        response_style.strip() if "RESPONSE RULES:" in response_style else f"RESPONSE RULES:\n{response_style}"
-                    )
                     add_breadcrumb("A/B test applied", "ab_test", test="response_style")
             
+            # Retrieved docs and history are fitted into the input token budget;
+            # without retrieved docs this is the full context prompt
+            rendered = get_prompt_renderer().render_request(context, retrieved_docs, messages, response_style)
+            system_prompt, llm_messages = rendered.system_prompt, rendered.messages
+            input_tokens = rendered.input_tokens
+            timer.add("prompt", prompt_started)
+            
             # Stream tokens from LLM
-            token_count = 0
-            async for token in stream_chat_completion(
-                messages=messages,
-                system_prompt=system_prompt,
-                max_tokens=settings.ai_max_tokens,
-            ):
-                response_content += token
-                token_count += 1
-                yield {
-                    "event": "message",
-                    "data": json.dumps({"type": "content", "content": token}),
-                }
+            def upstream():
+                return stream_chat_completion(
+                    messages=llm_messages,
+                    system_prompt=system_prompt,
+                    max_tokens=settings.ai_max_tokens,
+                    info=stream_info,
+                )
+            
+            def cache_response(tokens: List[str]):
+                # Cache the response for future use (if response is valid)
+                text = "".join(tokens)
+                if text and len(text) > 20:
+                    cache.set(user_query, text, embedding=query_embedding, tokens=tokens)
             
-            output_tokens = token_count
+            use_flight = settings.singleflight_enabled and bool(user_query)
+            if use_flight:
+                # The flight caches the response once, whoever is still listening
+                flight, is_leader = single_flight.start(flight_key, upstream, on_complete=cache_response)
+                coalesced = not is_leader
+                token_stream = flight.subscribe(subscriber)
+            else:
+                token_stream = upstream()
+            
+            response_tokens: List[str] = []
+            frames = stream_frames(token_stream, timer, stream_stats, response_tokens, client)
+            async with aclosing(frames):
+                async for frame in frames:
+                    yield frame
+            
+            response_content = "".join(response_tokens)
+            output_tokens = len(response_tokens)
+            if not coalesced:
+                metrics.record_llm_output(output_tokens)
+            
+            # Prefer the provider's own token counts when it reported them
+            if stream_info.usage:
+                input_tokens = stream_info.usage.get("prompt_tokens", input_tokens)
+                output_tokens = stream_info.usage.get("completion_tokens", output_tokens)
+                cached_input_tokens = (stream_info.usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+            
+            # Only complete answers are cached (a disconnect raises before this)
+            if not use_flight:
+                cache_response(response_tokens)
+        else:
+            # Tail the in-flight stream (replays tokens already produced)
+            coalesced = True
             
-            # Cache the response for future use (if response is valid)
-            if response_content and len(response_content) > 20:
-                cache.set(user_query, response_content)
+            response_tokens = []
+            frames = stream_frames(flight.subscribe(subscriber), timer, stream_stats, response_tokens, client)
+            async with aclosing(frames):
+                async for frame in frames:
+                    yield frame
+            
+            response_content = "".join(response_tokens)
+            output_tokens = len(response_tokens)
+        
+        if coalesced:
+            logger.info(f"Coalesced with in-flight stream for query: {user_query[:50]}...")
+            add_breadcrumb("Single-flight join", "cache", query=user_query[:50])
         
         # Signal completion
-        yield {
-            "event": "message",
-            "data": json.dumps({"type": "done"}),
-        }
+        yield stream_stats.add(DONE_FRAME)
         
         # Record metrics (Phase 4)
         response_time_ms = (time.time() - start_time) * 1000
-        metrics.record_request(response_time_ms, success=True)
-        metrics.log_chat(user_query, response_content, response_time_ms, cached=cached)
+        metrics.record_request(response_time_ms, success=True, cached=cached or coalesced, routed=routed is not None)
+        metrics.record_stages(timer)
+        metrics.record_stream(stream_stats)
+        metrics.log_chat(
+            user_query, response_content, response_time_ms, cached=cached or coalesced, routed=routed is not None
+        )
         
         # Record token usage for cost monitoring (Phase 4)
         if settings.track_token_costs:
             record_token_usage(
                 input_tokens=input_tokens,
                 output_tokens=output_tokens,
-                model=settings.model,
-                provider=settings.ai_provider,
+                model=stream_info.model or settings.model,
+                provider=stream_info.provider or settings.ai_provider,
+                session_id=session_id,
+                cached=cached or coalesced,  # Followers cost nothing upstream
+                routed=routed is not None,
+                cached_input_tokens=cached_input_tokens,
+            )
+    
+    except (ClientDisconnected, asyncio.CancelledError, GeneratorExit) as e:
+        # Client went away: the upstream stream has been (or is being) closed.
+        # A shared flight keeps running while other subscribers remain; our
+        # subscription may still be unwinding, so let the flight discount it.
+        local = cached or routed is not None  # Replayed answer, no upstream stream
+        upstream_cancelled = not local and (flight is None or flight.abandon(subscriber))
+        received = 0 if local else timer.tokens
+        saved = metrics.record_cancellation(received, upstream_cancelled)
+        logger.info(f"Client disconnected after {received} tokens (~{saved} tokens saved)")
+        
+        orphaned = flight is not None and not coalesced and not cached and not flight.done and not upstream_cancelled
+        if settings.track_token_costs and orphaned:
+            # Followers keep our upstream stream running: bill all of it once it ends
+            def record_flight_usage(broadcast):
+                usage = stream_info.usage or {}
+                record_token_usage(
+                    input_tokens=usage.get("prompt_tokens", input_tokens),
+                    output_tokens=usage.get("completion_tokens", len(broadcast.tokens)),
+                    model=stream_info.model or settings.model,
+                    provider=stream_info.provider or settings.ai_provider,
+                    session_id=session_id,
+                    cached_input_tokens=(usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0,
+                )
+            
+            flight.on_finish = record_flight_usage
+        elif settings.track_token_costs and not local:
+            # Input tokens and everything already generated are still billed
+            record_token_usage(
+                input_tokens=input_tokens,
+                output_tokens=received,
+                model=stream_info.model or settings.model,
+                provider=stream_info.provider or settings.ai_provider,
                 session_id=session_id,
-                cached=cached,
+                cached=coalesced,
             )
         
+        if not isinstance(e, ClientDisconnected):
+            raise
+    
     except Exception as e:
         logger.error(f"Stream error: {e}", exc_info=True)
         
@@ -517,7 +908,7 @@ async def generate_sse_stream(request: ChatRequest) -> AsyncGenerator[dict, None
     summary="Chat Completion (Streaming)",
     description="Send a message and receive streaming SSE response",
 )
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     """Handle chat completion with SSE streaming."""
     
     # Check if provider is configured
@@ -537,10 +928,36 @@ async def chat(request: ChatRequest):
     # Log request (without full content for privacy)
     logger.info(f"Chat request: {len(request.messages)} messages, session={request.session_id}")
     
+    # Give the pipeline a moment to produce its first event, so the stage
+    # timings of fast answers (cache, intent) fit in the headers; slower
+    # ones get the stages completed by then. A client that leaves while
+    # we wait cancels the pipeline.
+    timer = RequestTimer()
+    stream = generate_sse_stream(request, timer, client=http_request)
+    first_event = asyncio.ensure_future(anext(stream))
+    disconnected = asyncio.ensure_future(_wait_disconnected(http_request))
+    try:
+        await asyncio.wait(
+            {first_event, disconnected},
+            timeout=settings.sse_header_wait,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+    finally:
+        client_gone = disconnected.done() and not disconnected.cancelled()
+        disconnected.cancel()
+    
+    if client_gone and not first_event.done():
+        first_event.cancel()
+        await asyncio.gather(first_event, return_exceptions=True)
+        await stream.aclose()
+        return Response(status_code=499)
+    
     # Return SSE stream
+    server_timing = timer.server_timing()
     return EventSourceResponse(
-        generate_sse_stream(request),
+        _prepend(first_event, stream),
         media_type="text/event-stream",
+        headers={"Server-Timing": server_timing} if server_timing else None,
     )
 
 # =============================================================================
@@ -559,6 +976,13 @@ async def get_metrics():
     return {
         "service": metrics.get_metrics(),
         "cache": cache.get_stats(),
+        "singleflight": get_single_flight().get_stats(),
+        "hedging": get_hedging().get_stats(),
+        "embedding_batcher": get_embedding_batcher().get_stats(),
+        "embedding_cache": get_embedding_cache_stats(),
+        "prompt_renderer": get_prompt_renderer().get_stats(),
+        "token_budget": get_token_budget_stats().get_stats(),
+        "intent_router": get_intent_router().get_stats(),
         "recent_cache_entries": cache.get_entries(limit=5),
     }
 
@@ -692,6 +1116,10 @@ async def get_cost_summary(
         "avg_cost_per_request": f"${summary.avg_cost_per_request:.6f}",
         "cached_requests": summary.cached_requests,
         "cache_savings": f"${summary.savings_from_cache:.4f}",
+        "routed_requests": summary.routed_requests,
+        "routing_savings": f"${summary.savings_from_routing:.4f}",
+        "cached_input_tokens": summary.cached_input_tokens,
+        "prompt_cache_savings": f"${summary.savings_from_prompt_cache:.4f}",
     }
 
 
@@ -715,6 +1143,20 @@ async def get_error_tracking_status():
     }
 
 
+# =============================================================================
+# Admin Endpoint - Provider Routing
+# =============================================================================
+
+@app.get(
+    "/admin/providers",
+    summary="LLM Provider Routing",
+    description="Get provider routing order, health statistics and circuit breaker state",
+)
+async def get_provider_status():
+    """Get LLM provider router state."""
+    return get_router().get_state()
+
+
 # =============================================================================
 # Root Endpoint
 # =============================================================================
@@ -734,6 +1176,7 @@ async def root():
             "ab_tests": "/admin/ab-tests",
             "costs": "/admin/costs",
             "errors": "/admin/errors",
+            "providers": "/admin/providers",
         },
     }
 
@@ -0,0 +1,134 @@
+"""
+NEXI AI Chatbot - A/B Assignment Benchmark
+
+Assigns variants to many unique sessions and shows that the A/B manager's
+memory stays flat (no per-session state) while assignment stays fast.
+Also checks that the observed split matches the configured weights, that
+the unique-session estimate is close to the true count, and that
+feedback is attributed to the recomputed variant.
+
+Usage:
+    python scripts/benchmark_ab_testing.py
+    python scripts/benchmark_ab_testing.py --sessions 5000000
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.ab_testing import ABTestManager
+
+TEST_NAME = "response_style"
+CHECKPOINTS = 5
+
+
+# =============================================================================
+# Benchmark
+# =============================================================================
+
+def run_benchmark(sessions: int) -> bool:
+    """Assign `sessions` unique sessions and report time and memory."""
+    manager = ABTestManager(seed="benchmark")
+    step = max(1, sessions // CHECKPOINTS)
+    
+    print("=" * 60)
+    print("NEXI A/B Assignment Benchmark")
+    print("=" * 60)
+    print(f"Unique sessions: {sessions:,}")
+    print()
+    
+    # Speed (untraced - tracemalloc slows every allocation down)
+    timing_manager = ABTestManager(seed="benchmark")
+    start = time.perf_counter()
+    for i in range(sessions):
+        timing_manager.get_variant(f"session-{i}", TEST_NAME)
+    elapsed = time.perf_counter() - start
+    print(f"Assignment time: {elapsed / sessions * 1e9:.0f} ns/session ({elapsed:.2f}s total)")
+    print()
+    
+    # Memory (traced)
+    print(f"{'sessions':>12} {'traced KB':>12}")
+    
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    memory_samples = []
+    
+    done = 0
+    while done < sessions:
+        batch = min(step, sessions - done)
+        for i in range(done, done + batch):
+            manager.get_variant(f"session-{i}", TEST_NAME)
+        done += batch
+        
+        current, _ = tracemalloc.get_traced_memory()
+        memory_samples.append(current - baseline)
+        print(f"{done:>12,} {(current - baseline) / 1024:>12.1f}")
+    
+    tracemalloc.stop()
+    
+    # Observed split vs configured weights
+    stats = manager.get_test_stats(TEST_NAME)["variants"]
+    weights = manager._tests[TEST_NAME].variants
+    print()
+    print(f"{'variant':>12} {'weight':>8} {'observed':>10} {'sessions est.':>14}")
+    max_skew = 0.0
+    for variant, weight in weights.items():
+        observed = stats[variant]["exposures"] / sessions  # One call per session
+        max_skew = max(max_skew, abs(observed - weight))
+        print(f"{variant:>12} {weight:>8.2f} {observed:>10.4f} {stats[variant]['assignments']:>14,}")
+    
+    # Repeat calls are exposures, not new sessions
+    for i in range(min(sessions, 1000)):
+        manager.get_variant(f"session-{i}", TEST_NAME)
+    estimated = sum(data["assignments"] for data in manager.get_test_stats(TEST_NAME)["variants"].values())
+    estimate_error = abs(estimated - sessions) / sessions
+    
+    # Feedback is attributed by recomputing the hash
+    variant = manager.get_variant("session-0", TEST_NAME)
+    before = manager.get_test_stats(TEST_NAME)["variants"][variant]["positive_feedback"]
+    manager.record_feedback("session-0", TEST_NAME, positive=True)
+    after = manager.get_test_stats(TEST_NAME)["variants"][variant]["positive_feedback"]
+    feedback_ok = after == before + 1
+    
+    growth = memory_samples[-1] - memory_samples[0]
+    memory_ok = growth < 64 * 1024
+    split_ok = sessions < 10_000 or max_skew < 0.01
+    estimate_ok = estimate_error < 0.05
+    
+    print()
+    print(f"Memory growth after first checkpoint: {growth / 1024:.1f} KB")
+    print(f"Unique sessions estimated: {estimated:,} ({estimate_error * 100:.1f}% error)")
+    print(f"Feedback attribution: {'ok' if feedback_ok else 'FAILED'}")
+    
+    passed = memory_ok and split_ok and estimate_ok and feedback_ok
+    print()
+    print("PASS: memory stays flat" if passed else "FAIL: see above")
+    print("=" * 60)
+    
+    return passed
+
+
+# =============================================================================
+# CLI Entry Point
+# =============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark stateless A/B variant assignment"
+    )
+    parser.add_argument(
+        "--sessions",
+        type=int,
+        default=1_000_000,
+        help="Number of unique sessions to assign"
+    )
+    
+    args = parser.parse_args()
+    
+    ok = run_benchmark(sessions=args.sessions)
+    sys.exit(0 if ok else 1)
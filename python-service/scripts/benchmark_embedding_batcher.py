@@ -0,0 +1,156 @@
+"""
+NEXI AI Chatbot - Embedding Micro-Batcher Benchmark
+
+Fires bursts of concurrent query embeddings at a fake OpenAI client with
+a fixed per-call latency, once with micro-batching and once without.
+Reports API calls, batch sizes, wall time and the wait each request
+spends in the batching window, and checks that every caller got its own
+vector back (the fake returns `data` shuffled, so results must be
+matched by index).
+
+Usage:
+    python scripts/benchmark_embedding_batcher.py
+    python scripts/benchmark_embedding_batcher.py --burst 200 --latency 0.08
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import settings
+from services import embeddings
+
+
+# =============================================================================
+# Fake Client
+# =============================================================================
+
+class SlowEmbeddings:
+    """OpenAI embeddings stand-in: fixed latency, one vector per input, shuffled."""
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+    
+    async def create(self, model: str, input):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        
+        inputs = input if isinstance(input, list) else [input]
+        data = [
+            SimpleNamespace(index=i, embedding=[float(hash(text) % 1000)])
+            for i, text in enumerate(inputs)
+        ]
+        random.shuffle(data)
+        return SimpleNamespace(data=data)
+
+
+class FakeOpenAI:
+    """AsyncOpenAI stand-in exposing only what the embeddings service uses."""
+    
+    def __init__(self, latency: float):
+        self.embeddings = SlowEmbeddings(latency)
+    
+    async def close(self):
+        pass
+
+
+# =============================================================================
+# Benchmark
+# =============================================================================
+
+async def run_burst(batched: bool, burst: int, rounds: int, latency: float) -> dict:
+    """Run `rounds` bursts of `burst` concurrent embeddings."""
+    settings.embedding_batch_enabled = batched
+    client = FakeOpenAI(latency)
+    embeddings._openai_client = client
+    embeddings._embedding_batcher = None
+    
+    correct = 0
+    start = time.perf_counter()
+    for r in range(rounds):
+        texts = [f"question {r}-{i % (burst // 2 or 1)}" for i in range(burst)]  # Some repeats
+        results = await asyncio.gather(*[embeddings.generate_embedding(t) for t in texts])
+        correct += sum(result == [float(hash(t) % 1000)] for t, result in zip(texts, results))
+    elapsed = time.perf_counter() - start
+    
+    return {
+        "calls": client.embeddings.calls,
+        "elapsed": elapsed,
+        "correct": correct,
+        "stats": embeddings.get_embedding_batcher().get_stats() if batched else None,
+    }
+
+
+async def run_benchmark(burst: int, rounds: int, latency: float) -> bool:
+    """Compare batched and unbatched embedding under bursts."""
+    settings.openai_api_key = settings.openai_api_key or "sk-benchmark"
+    total = burst * rounds
+    
+    plain = await run_burst(False, burst, rounds, latency)
+    batched = await run_burst(True, burst, rounds, latency)
+    stats = batched["stats"]
+    
+    print("=" * 60)
+    print("NEXI Embedding Micro-Batcher Benchmark")
+    print("=" * 60)
+    print(f"Requests: {rounds} bursts x {burst} (fake API latency {latency * 1000:.0f}ms)")
+    print(f"Window: {settings.embedding_batch_window_ms}ms, max batch: {settings.embedding_batch_max_size}")
+    print()
+    print(f"{'':>12} {'API calls':>10} {'wall s':>8} {'correct':>9}")
+    print(f"{'unbatched':>12} {plain['calls']:>10} {plain['elapsed']:>8.2f} {plain['correct']:>9}")
+    print(f"{'batched':>12} {batched['calls']:>10} {batched['elapsed']:>8.2f} {batched['correct']:>9}")
+    print()
+    print(f"Avg batch size: {stats['avg_batch_size']} (max {stats['max_batch_size']}, duplicates shared)")
+    print(f"Batching wait per request: avg {stats['wait']['avg_ms']}ms, p99 {stats['wait']['p99_ms']}ms")
+    
+    passed = (
+        plain["correct"] == total
+        and batched["correct"] == total
+        and batched["calls"] < plain["calls"]
+    )
+    print()
+    print("PASS: fewer API calls, every caller got its vector" if passed else "FAIL: see above")
+    print("=" * 60)
+    
+    return passed
+
+
+# =============================================================================
+# CLI Entry Point
+# =============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark micro-batched query embeddings"
+    )
+    parser.add_argument(
+        "--burst",
+        type=int,
+        default=50,
+        help="Concurrent embeddings per burst"
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=10,
+        help="Number of bursts"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.05,
+        help="Seconds each fake API call takes"
+    )
+    
+    args = parser.parse_args()
+    
+    ok = asyncio.run(run_benchmark(burst=args.burst, rounds=args.rounds, latency=args.latency))
+    sys.exit(0 if ok else 1)
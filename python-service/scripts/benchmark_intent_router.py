@@ -0,0 +1,168 @@
+"""
+NEXI AI Chatbot - Intent Router Benchmark
+
+Runs a labelled set of visitor questions through the IntentRouter:
+questions that should be answered locally (with the expected intent and
+project) and questions that must fall through to the LLM pipeline, both
+as the first question and as follow-ups later in a conversation.
+Reports routing rate, misroutes and time per question.
+
+A misroute (a question answered with the wrong template, or answered
+locally when it needed the LLM) fails the benchmark.
+
+Usage:
+    python scripts/benchmark_intent_router.py
+    python scripts/benchmark_intent_router.py --iterations 50000 --threshold 0.8
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.context import get_portfolio_context
+from services.intent_router import IntentRouter
+
+# (question, expected intent or None to fall through, expected project slug)
+LABELLED_QUERIES: List[Tuple[str, Optional[str], Optional[str]]] = [
+    ("hello", "greeting", None),
+    ("Hi!", "greeting", None),
+    ("Good morning NEXI", "greeting", None),
+    ("What's your email?", "email", None),
+    ("Hey, what's your e-mail address?", "email", None),
+    ("GitHub link", "github", None),
+    ("Can I see your repos?", "github", None),
+    ("linkedin?", "linkedin", None),
+    ("What is Huzaifa's LinkedIn profile?", "linkedin", None),
+    ("How can I contact you?", "contact", None),
+    ("I'd like to get in touch", "contact", None),
+    ("Where are you based?", "location", None),
+    ("Tell me about yourself", "about_owner", None),
+    ("What are your skills?", "skills", None),
+    ("What's your tech stack?", "skills", None),
+    ("What projects have you worked on?", "projects_list", None),
+    ("What tech did you use for Clothie?", "project_tech", "naba-hussam"),
+    ("Tech stack for the WhatsApp Funnel", "project_tech", "whatsapp-funnel-lead-management-system"),
+    ("What is EMS built with?", "project_tech", "employee-management-system"),
+    ("Tell me about Clothie", "project_overview", "naba-hussam"),
+    ("What is Sharaf ul Quran?", "project_overview", "sharaf-ul-quran"),
+    ("Where can I see Naba Hussam live?", "project_link", "naba-hussam"),
+    # Need the LLM
+    ("Why did you choose MongoDB for Clothie?", None, None),
+    ("What tech did you use for Clothie and why?", None, None),
+    ("Compare Clothie and EMS", None, None),
+    ("Email and GitHub please", None, None),
+    ("How did you design the caching layer in EMS?", None, None),
+    ("Hi, I'm a recruiter looking for a React developer with Redis experience", None, None),
+    ("Do you have WhatsApp API experience?", None, None),
+    ("What was the hardest bug you fixed?", None, None),
+    ("Can you explain how the round-robin assignment works?", None, None),
+    ("thanks", None, None),
+    ("What is the GitHub link for it?", None, None),
+    ("Is it live?", None, None),
+]
+
+# Asked after earlier questions: routed only when they don't depend on them
+FOLLOW_UP_QUERIES: List[Tuple[str, Optional[str], Optional[str]]] = [
+    ("What's your email?", "email", None),
+    ("How can I contact you?", "contact", None),
+    ("What tech did you use for Clothie?", "project_tech", "naba-hussam"),
+    ("Where can I see Naba Hussam live?", "project_link", "naba-hussam"),
+    # Need the conversation
+    ("What is the GitHub link for it?", None, None),
+    ("What skills did that need?", None, None),
+    ("which tech stack?", None, None),
+    ("Tech stack?", None, None),
+    ("GitHub link", None, None),
+    ("What technologies did they use?", None, None),
+    ("Where can I see this live?", None, None),
+]
+
+
+# =============================================================================
+# Benchmark
+# =============================================================================
+
+def run_benchmark(iterations: int, threshold: float) -> bool:
+    """Check routing decisions and time the router."""
+    context = get_portfolio_context()
+    router = IntentRouter(threshold=threshold)
+    
+    print("=" * 60)
+    print("NEXI Intent Router Benchmark")
+    print("=" * 60)
+    print(f"Questions: {len(LABELLED_QUERIES) + len(FOLLOW_UP_QUERIES)}, threshold: {threshold}, iterations: {iterations:,}")
+    print()
+    
+    misroutes = 0
+    missed = 0
+    for follow_up, queries in ((False, LABELLED_QUERIES), (True, FOLLOW_UP_QUERIES)):
+        print("Follow-up questions:" if follow_up else "First questions:")
+        for query, expected, project in queries:
+            routed = router.route(query, context, follow_up=follow_up)
+            got = (routed.intent, routed.project) if routed else (None, None)
+            
+            if got == (expected, project):
+                status = "ok"
+            elif routed is None:
+                status = "missed"  # Still correct, just slower (the LLM answers)
+                missed += 1
+            else:
+                status = "MISROUTE"
+                misroutes += 1
+            
+            label = f"{got[0]}" + (f" [{got[1]}]" if got[1] else "") if routed else "-> LLM"
+            print(f"  {status:>8}  {query[:44]:<44} {label}")
+    
+    should_route = sum(1 for _, expected, _ in LABELLED_QUERIES + FOLLOW_UP_QUERIES if expected)
+    
+    # Time routed and fall-through questions alike
+    queries = [query for query, _, _ in LABELLED_QUERIES]
+    start = time.perf_counter()
+    for i in range(iterations):
+        router.route(queries[i % len(queries)], context)
+    route_us = (time.perf_counter() - start) / iterations * 1e6
+    
+    print()
+    print(f"Routed locally: {should_route - missed}/{should_route} answerable questions")
+    print(f"Misroutes:      {misroutes}")
+    print(f"Time per query: {route_us:.2f} us")
+    print(f"Router: {router.get_stats()}")
+    
+    passed = misroutes == 0
+    print()
+    print("PASS: no misroutes" if passed else "FAIL: questions answered with the wrong template")
+    print("=" * 60)
+    
+    return passed
+
+
+# =============================================================================
+# CLI Entry Point
+# =============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the local intent router"
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=20000,
+        help="Questions routed for the timing"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.9,
+        help="Min share of content words the intent must explain"
+    )
+    
+    args = parser.parse_args()
+    
+    ok = run_benchmark(iterations=args.iterations, threshold=args.threshold)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,160 @@
+"""
+NEXI AI Chatbot - Prompt Rendering Benchmark
+
+Builds system prompts the previous way (full f-string render on every
+request) and through the memoized PromptRenderer, for both the semantic
+(retrieved docs) and full-context prompts and every A/B response style.
+Checks that both produce the same prompt, that each response style gets
+its own static prefix, that reloading the portfolio invalidates the
+templates, and reports time and allocated bytes per request.
+
+Usage:
+    python scripts/benchmark_prompt_rendering.py
+    python scripts/benchmark_prompt_rendering.py --requests 50000 --docs 5
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.prompts import build_semantic_prompt, build_system_prompt
+from services.ab_testing import PROMPT_VARIATIONS
+from services.context import create_chunks, get_portfolio_context, load_portfolio_data, reload_portfolio_context
+from services.prompt_renderer import PromptRenderer
+
+STYLES = ["", *PROMPT_VARIATIONS["response_style"].values()]
+MEMORY_SAMPLES = 200  # Traced renders per measurement (tracemalloc is slow)
+
+
+# =============================================================================
+# Renderers
+# =============================================================================
+
+def legacy_render(context, retrieved_docs: Optional[List[Dict[str, Any]]], response_style: str) -> str:
+    """The previous per-request build: render the whole prompt every time."""
+    if retrieved_docs:
+        return build_semantic_prompt(context=context, retrieved_docs=retrieved_docs, response_style=response_style)
+    return build_system_prompt(context, response_style)
+
+
+def time_render(render: Callable, context, docs, requests: int) -> float:
+    """Average microseconds per request, cycling through the styles."""
+    start = time.perf_counter()
+    for i in range(requests):
+        render(context, docs, STYLES[i % len(STYLES)])
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def bytes_per_render(render: Callable, context, docs) -> float:
+    """Average peak bytes allocated while building one prompt."""
+    total = 0
+    tracemalloc.start()
+    for i in range(MEMORY_SAMPLES):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        prompt = render(context, docs, STYLES[i % len(STYLES)])
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - before
+        del prompt
+    tracemalloc.stop()
+    return total / MEMORY_SAMPLES
+
+
+# =============================================================================
+# Benchmark
+# =============================================================================
+
+def run_benchmark(requests: int, docs: int) -> bool:
+    """Compare legacy and memoized prompt building."""
+    context = get_portfolio_context()
+    chunks = create_chunks(load_portfolio_data())
+    retrieved = [
+        {"id": chunk["id"], "content": chunk["content"], "source": chunk["metadata"]["source"], "score": 0.9 - i * 0.05}
+        for i, chunk in enumerate(chunks[:docs])
+    ]
+    renderer = PromptRenderer()
+    
+    print("=" * 60)
+    print("NEXI Prompt Rendering Benchmark")
+    print("=" * 60)
+    print(f"Requests: {requests:,}, retrieved docs: {len(retrieved)}, styles: {len(STYLES)}")
+    print()
+    
+    all_match = True
+    print(f"{'prompt':>10} {'legacy us':>10} {'memo us':>9} {'speedup':>8} {'legacy B':>9} {'memo B':>8}")
+    
+    for name, prompt_docs in (("semantic", retrieved), ("full", None)):
+        for style in STYLES:
+            if legacy_render(context, prompt_docs, style) != renderer.render(context, prompt_docs, style):
+                all_match = False
+                print(f"{name:>10} MISMATCH (style {style.strip()[:30]!r})")
+        
+        legacy_us = time_render(legacy_render, context, prompt_docs, requests)
+        memo_us = time_render(renderer.render, context, prompt_docs, requests)
+        legacy_bytes = bytes_per_render(legacy_render, context, prompt_docs)
+        memo_bytes = bytes_per_render(renderer.render, context, prompt_docs)
+        print(
+            f"{name:>10} {legacy_us:>10.2f} {memo_us:>9.2f} {legacy_us / memo_us:>7.1f}x "
+            f"{legacy_bytes:>9,.0f} {memo_bytes:>8,.0f}"
+        )
+    
+    # Every A/B response style must change the static prefix (and show up in it)
+    templates = [renderer.template(context, style) for style in STYLES]
+    distinct = all(
+        len({getattr(template, part) for template in templates}) == len(STYLES)
+        for part in ("head", "full")
+    )
+    styled = all(
+        style.strip().splitlines()[-1] in template.head and style.strip().splitlines()[-1] in template.full
+        for style, template in zip(STYLES[1:], templates[1:])
+    )
+    
+    # Reloading the portfolio must drop the pre-rendered templates
+    reloaded = reload_portfolio_context()
+    fresh = renderer.render(reloaded, retrieved, STYLES[1])
+    invalidated = renderer.invalidations == 1 and fresh == legacy_render(reloaded, retrieved, STYLES[1])
+    
+    print()
+    print(f"Renderer: {renderer.get_stats()}")
+    print(f"Distinct prefix per style: {'ok' if distinct and styled else 'FAILED'}")
+    print(f"Invalidation on reload: {'ok' if invalidated else 'FAILED'}")
+    
+    passed = all_match and distinct and styled and invalidated
+    print()
+    print("PASS: identical prompts" if passed else "FAIL: see above")
+    print("=" * 60)
+    
+    return passed
+
+
+# =============================================================================
+# CLI Entry Point
+# =============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark memoized system prompt rendering"
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=20000,
+        help="Prompts built per measurement"
+    )
+    parser.add_argument(
+        "--docs",
+        type=int,
+        default=3,
+        help="Retrieved documents spliced into the semantic prompt"
+    )
+    
+    args = parser.parse_args()
+    
+    ok = run_benchmark(requests=args.requests, docs=args.docs)
+    sys.exit(0 if ok else 1)
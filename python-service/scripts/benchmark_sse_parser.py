@@ -0,0 +1,181 @@
+"""
+NEXI AI Chatbot - Provider Stream Parser Benchmark
+
+Replays recorded OpenAI and Groq chat completion streams (scripts/fixtures)
+through the previous text-buffer parser and the byte-level SSEDecoder,
+split into network chunks of several sizes. Checks that both produce the
+same text and reports the time per stream.
+
+Usage:
+    python scripts/benchmark_sse_parser.py
+    python scripts/benchmark_sse_parser.py --repeat 500 --scale 10
+"""
+
+import argparse
+import codecs
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.sse_parser import SSEDecoder, orjson
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+FIXTURES = {
+    "openai": "openai_stream.txt",
+    "groq": "groq_stream.txt",
+}
+CHUNK_SIZES = [64, 512, 4096, 0]  # 0 = whole stream in one chunk
+
+
+# =============================================================================
+# Parsers
+# =============================================================================
+
+def legacy_parse(chunks: List[bytes]) -> List[str]:
+    """The previous parser: text buffer, split per line, json.loads per chunk."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    contents = []
+    buffer = ""
+    
+    for raw in chunks:
+        buffer += decoder.decode(raw)
+        
+        while "\n" in buffer:
+            line, buffer = buffer.split("\n", 1)
+            line = line.strip()
+            
+            if not line:
+                continue
+            
+            if line == "data: [DONE]":
+                return contents
+            
+            if line.startswith("data: "):
+                try:
+                    data = json.loads(line[6:])
+                    content = data.get("choices", [{}])[0].get("delta", {}).get("content")
+                    if content:
+                        contents.append(content)
+                except (json.JSONDecodeError, IndexError):
+                    continue
+    
+    return contents
+
+
+def decoder_parse(chunks: List[bytes]) -> List[str]:
+    """The byte-level incremental decoder."""
+    decoder = SSEDecoder()
+    contents = []
+    
+    for raw in chunks:
+        contents.extend(decoder.feed(raw))
+        if decoder.done:
+            return contents
+    
+    contents.extend(decoder.flush())
+    return contents
+
+
+# =============================================================================
+# Benchmark
+# =============================================================================
+
+def load_fixture(name: str, scale: int) -> bytes:
+    """Load a fixture, repeating its content events to simulate longer answers."""
+    data = (FIXTURES_DIR / FIXTURES[name]).read_bytes()
+    if scale <= 1:
+        return data
+    
+    events = data.split(b"\n\n")
+    content = [e for e in events if b'"delta":{"content"' in e]
+    head = events[:events.index(content[0])]
+    tail = events[events.index(content[-1]) + 1:]
+    
+    return b"\n\n".join(head + content * scale + tail)
+
+
+def split_chunks(data: bytes, size: int) -> List[bytes]:
+    """Split a stream into network-sized chunks."""
+    if size <= 0:
+        return [data]
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def time_parser(parser: Callable[[List[bytes]], List[str]], chunks: List[bytes], repeat: int) -> float:
+    """Average microseconds per full stream."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parser(chunks)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def run_benchmark(repeat: int, scale: int) -> bool:
+    """Compare both parsers on every fixture and chunk size."""
+    print("=" * 60)
+    print("NEXI Provider Stream Parser Benchmark")
+    print("=" * 60)
+    print(f"JSON backend: {'orjson' if orjson else 'json'}")
+    print(f"Repeat: {repeat}, answer scale: x{scale}")
+    
+    all_match = True
+    
+    for name in FIXTURES:
+        data = load_fixture(name, scale)
+        
+        stats = SSEDecoder()
+        stats.feed(data)
+        print()
+        print(f"{name}: {len(data):,} bytes, fast path {stats.fast_path_hits} / full parse {stats.full_parses}")
+        print(f"{'chunk':>8} {'legacy us':>12} {'decoder us':>12} {'speedup':>9}")
+        
+        for size in CHUNK_SIZES:
+            chunks = split_chunks(data, size)
+            
+            expected = "".join(legacy_parse(chunks))
+            actual = "".join(decoder_parse(chunks))
+            if expected != actual:
+                all_match = False
+                print(f"{size or 'whole':>8} MISMATCH")
+                continue
+            
+            legacy_us = time_parser(legacy_parse, chunks, repeat)
+            decoder_us = time_parser(decoder_parse, chunks, repeat)
+            print(f"{size or 'whole':>8} {legacy_us:>12.1f} {decoder_us:>12.1f} {legacy_us / decoder_us:>8.1f}x")
+    
+    print()
+    print("PASS: identical output" if all_match else "FAIL: parsers disagree")
+    print("=" * 60)
+    
+    return all_match
+
+
+# =============================================================================
+# CLI Entry Point
+# =============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the provider SSE stream parser"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=200,
+        help="Parses per measurement"
+    )
+    parser.add_argument(
+        "--scale",
+        type=int,
+        default=1,
+        help="Repeat the answer N times to simulate long responses"
+    )
+    
+    args = parser.parse_args()
+    
+    ok = run_benchmark(repeat=args.repeat, scale=args.scale)
+    sys.exit(0 if ok else 1)
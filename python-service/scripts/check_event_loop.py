@@ -0,0 +1,158 @@
+"""
+NEXI AI Chatbot - Event Loop Responsiveness Check
+
+Verifies that a slow semantic search does not stall other SSE streams.
+A fake Pinecone index blocks for --delay seconds per query (like the real,
+synchronous SDK on a slow network) while a simulated stream emits a token
+every 10ms. The check fails if the stream stops making progress.
+
+Usage:
+    python scripts/check_event_loop.py
+    python scripts/check_event_loop.py --delay 1.0 --searches 8
+"""
+
+import asyncio
+import argparse
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import settings
+from services import embeddings
+
+TICK_INTERVAL = 0.01
+
+
+# =============================================================================
+# Fake Clients
+# =============================================================================
+
+class SlowIndex:
+    """Pinecone index stand-in whose query blocks the calling thread."""
+    
+    def __init__(self, delay: float):
+        self.delay = delay
+    
+    def query(self, **kwargs):
+        time.sleep(self.delay)
+        return SimpleNamespace(matches=[
+            SimpleNamespace(id="owner-bio", score=0.9, metadata={"content": "bio", "source": "owner", "type": "bio"}),
+        ])
+    
+    def fetch(self, ids, namespace: str = ""):
+        # No namespace pointer stored: queries use the configured namespace
+        return SimpleNamespace(vectors={})
+
+
+class FastEmbeddings:
+    """OpenAI embeddings stand-in that returns immediately."""
+    
+    async def create(self, model: str, input):
+        inputs = input if isinstance(input, list) else [input]
+        return SimpleNamespace(data=[
+            SimpleNamespace(index=i, embedding=[0.0] * settings.embedding_dimensions)
+            for i in range(len(inputs))
+        ])
+
+
+class FakeOpenAI:
+    """AsyncOpenAI stand-in exposing only what the embeddings service uses."""
+    
+    def __init__(self):
+        self.embeddings = FastEmbeddings()
+    
+    async def close(self):
+        pass
+
+
+# =============================================================================
+# Check
+# =============================================================================
+
+async def simulated_stream(stop: asyncio.Event) -> dict:
+    """Emit a token every TICK_INTERVAL and record the largest gap."""
+    ticks = 0
+    max_gap = 0.0
+    last = time.perf_counter()
+    
+    while not stop.is_set():
+        await asyncio.sleep(TICK_INTERVAL)
+        now = time.perf_counter()
+        max_gap = max(max_gap, now - last)
+        last = now
+        ticks += 1
+    
+    return {"ticks": ticks, "max_gap": max_gap}
+
+
+async def run_check(delay: float, searches: int) -> bool:
+    """Run concurrent slow searches alongside a simulated stream."""
+    settings.openai_api_key = settings.openai_api_key or "sk-check"
+    settings.pinecone_api_key = settings.pinecone_api_key or "pc-check"
+    settings.use_semantic_search = True
+    
+    embeddings._openai_client = FakeOpenAI()
+    embeddings._pinecone_index = SlowIndex(delay)
+    
+    stop = asyncio.Event()
+    stream_task = asyncio.create_task(simulated_stream(stop))
+    
+    start = time.perf_counter()
+    results = await asyncio.gather(*[
+        embeddings.search_similar(f"query {i}", top_k=3, threshold=0.5)
+        for i in range(searches)
+    ])
+    elapsed = time.perf_counter() - start
+    
+    stop.set()
+    stream = await stream_task
+    await embeddings.close_clients()
+    
+    expected_ticks = elapsed / TICK_INTERVAL
+    
+    print("=" * 60)
+    print("NEXI Event Loop Responsiveness Check")
+    print("=" * 60)
+    print(f"Searches: {searches} x {delay:.2f}s (concurrency limit: {settings.pinecone_max_concurrency})")
+    print(f"Search wall time: {elapsed:.2f}s")
+    print(f"Results returned: {sum(len(r) for r in results)}")
+    print(f"Stream ticks: {stream['ticks']} (ideal ~{expected_ticks:.0f})")
+    print(f"Largest stream gap: {stream['max_gap'] * 1000:.1f}ms")
+    
+    passed = stream["max_gap"] < max(delay / 2, TICK_INTERVAL * 10)
+    print()
+    print("PASS: streams kept making progress" if passed else "FAIL: event loop was blocked")
+    print("=" * 60)
+    
+    return passed
+
+
+# =============================================================================
+# CLI Entry Point
+# =============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check that slow vector searches don't block the event loop"
+    )
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=0.5,
+        help="Seconds each fake Pinecone query blocks for"
+    )
+    parser.add_argument(
+        "--searches",
+        type=int,
+        default=4,
+        help="Number of concurrent searches"
+    )
+    
+    args = parser.parse_args()
+    
+    ok = asyncio.run(run_check(delay=args.delay, searches=args.searches))
+    sys.exit(0 if ok else 1)
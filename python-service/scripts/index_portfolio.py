@@ -1,31 +1,64 @@
 """
 NEXI AI Chatbot - Portfolio Indexer
 
-Script to generate embeddings for portfolio content and upload to Pinecone.
-Run this once to set up the semantic search index.
+Script to generate embeddings for portfolio content and upload them to the
+configured vector store (Pinecone, or the local NumPy index file).
+
+Indexing is incremental: a manifest records each chunk's content hash and
+the embedding model, so only new or changed chunks are re-embedded and
+chunks that disappeared are deleted. Embedding and upsert batches run
+concurrently, with retries.
+
+A full rebuild (--reset) is blue/green: the new generation is written to
+its own namespace (portfolio-v{n}) while the service keeps serving the
+current one, smoke-tested, and then made live by flipping the index
+pointer. Older generations are deleted afterwards.
 
 Usage:
     python scripts/index_portfolio.py
-    python scripts/index_portfolio.py --reset  # Clear and rebuild index
+    python scripts/index_portfolio.py --dry-run  # Show the diff and estimated cost
+    python scripts/index_portfolio.py --reset  # Rebuild into a new generation and swap
 """
 
 import asyncio
 import argparse
+import hashlib
 import json
+import os
+import re
 import sys
+import time
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config.settings import settings
+from services.context import create_chunks
 from services.embeddings import (
+    INDEX_ALIAS,
     generate_embeddings_batch,
     upsert_vectors,
+    delete_vectors,
     delete_namespace,
     get_index_stats,
+    get_active_namespace,
+    set_active_namespace,
+    search_by_embedding,
 )
 
+GENERATION_PATTERN = re.compile(rf"^{INDEX_ALIAS}-v(\d+)$")
+MANIFEST_PATH = Path(__file__).parent.parent / "data" / "index_manifest.json"
+
+# Embedding prices per 1K tokens (for --dry-run estimates)
+EMBEDDING_COSTS = {
+    "text-embedding-3-small": 0.00002,
+    "text-embedding-3-large": 0.00013,
+    "text-embedding-ada-002": 0.0001,
+}
+CHARS_PER_TOKEN = 4  # Rough English average
+
 # =============================================================================
 # Portfolio Chunking
 # =============================================================================
@@ -38,207 +71,262 @@ def load_portfolio() -> dict:
         return json.load(f)
 
 
-def create_chunks(portfolio: dict) -> list[dict]:
+# =============================================================================
+# Manifest
+# =============================================================================
+
+def manifest_target(namespace: str) -> str:
+    """Identify the index namespace a manifest section belongs to."""
+    if settings.vector_store == "local":
+        return f"local:{settings.local_index_path}:{namespace}"
+    return f"pinecone:{settings.pinecone_index_name}:{namespace}"
+
+
+def read_manifest_file() -> Dict[str, Any]:
+    """Load every manifest section (empty if there is no manifest yet)."""
+    if not MANIFEST_PATH.exists():
+        return {}
+    
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_manifest(namespace: str) -> Dict[str, Any]:
+    """Load the manifest section for a namespace of the configured index (empty if none)."""
+    return read_manifest_file().get(manifest_target(namespace), {})
+
+
+def save_manifest(namespace: str, section: Optional[Dict[str, Any]]):
+    """Write (or with None, remove) the manifest section for a namespace (atomic)."""
+    data = read_manifest_file()
+    if section is None:
+        data.pop(manifest_target(namespace), None)
+    else:
+        data[manifest_target(namespace)] = section
+    
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = MANIFEST_PATH.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def chunk_hash(chunk: dict) -> str:
+    """Hash of everything that ends up in the vector store for a chunk."""
+    payload = json.dumps({"content": chunk["content"], "metadata": chunk["metadata"]}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def diff_chunks(chunks: List[dict], manifest: Dict[str, Any]) -> Dict[str, List[str]]:
     """
-    Create searchable chunks from portfolio data.
+    Compare chunks with the manifest.
     
-    Each chunk has:
-    - id: Unique identifier
-    - content: Text content for embedding
-    - metadata: Additional info for filtering/display
+    Everything counts as new when the manifest was written for another
+    embedding model or dimension.
     """
-    chunks = []
-    
-    # 1. Owner bio chunk
-    owner = portfolio["owner"]
-    chunks.append({
-        "id": "owner-bio",
-        "content": f"""About {owner['name']}: {owner['bio']}
-Title: {owner['title']}
-Location: {owner['location']}""",
-        "metadata": {
-            "type": "bio",
-            "source": "owner",
-            "name": owner["name"],
-        }
-    })
-    
-    # 2. Project chunks (one per project with full details)
-    for project in portfolio["projects"]:
-        # Main project chunk
-        highlights = "\n".join(f"- {h}" for h in project["highlights"])
-        features = "\n".join(f"- {f}" for f in project["features"])
-        tech_stack = ", ".join(project["techStack"])
-        
-        content = f"""Project: {project['name']}
-Type: {project['type']}
-Year: {project['year']}
-Role: {project['role']}
+    known = manifest.get("chunks", {})
+    if (
+        manifest.get("embedding_model") != settings.embedding_model
+        or manifest.get("dimensions") != settings.embedding_dimensions
+    ):
+        known = {}
+    
+    current = {chunk["id"]: chunk_hash(chunk) for chunk in chunks}
+    
+    return {
+        "added": [i for i in current if i not in known],
+        "changed": [i for i in current if i in known and known[i] != current[i]],
+        "unchanged": [i for i in current if known.get(i) == current[i]],
+        "removed": [i for i in known if i not in current],
+    }
 
-Description: {project['description']}
 
-Tech Stack: {tech_stack}
+def estimate_cost(chunks: List[dict]) -> tuple[int, float]:
+    """Estimated embedding tokens and dollars for a set of chunks."""
+    tokens = sum(len(chunk["content"]) // CHARS_PER_TOKEN + 1 for chunk in chunks)
+    price = EMBEDDING_COSTS.get(settings.embedding_model, EMBEDDING_COSTS["text-embedding-3-small"])
+    return tokens, tokens / 1000 * price
 
-Key Highlights:
-{highlights}
 
-Features:
-{features}"""
-        
-        chunks.append({
-            "id": f"project-{project['slug']}",
-            "content": content,
-            "metadata": {
-                "type": "project",
-                "source": f"project:{project['slug']}",
-                "name": project["name"],
-                "slug": project["slug"],
-                "year": project["year"],
-                "tech_stack": tech_stack,
-            }
-        })
-        
-        # Tech stack specific chunk (for "what technologies" questions)
-        chunks.append({
-            "id": f"project-tech-{project['slug']}",
-            "content": f"""Technologies used in {project['name']}:
-{tech_stack}
+# =============================================================================
+# Batched Indexing
+# =============================================================================
+
+async def with_retries(label: str, func, retries: int):
+    """Await func(), retrying with exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            return await func()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = 2 ** attempt
+            print(f"  {label} failed ({e}), retrying in {delay}s...")
+            await asyncio.sleep(delay)
+
 
-This {project['type']} project was built using these technologies for {project['description'][:200]}""",
+async def index_batch(batch: List[dict], number: int, namespace: str, retries: int) -> List[dict]:
+    """Embed and upsert one batch. Returns the upserted vectors."""
+    texts = [chunk["content"] for chunk in batch]
+    embeddings = await with_retries(f"Embedding batch {number}", lambda: generate_embeddings_batch(texts), retries)
+    
+    # Prepare vectors for the vector store
+    vectors = []
+    for chunk, embedding in zip(batch, embeddings):
+        vectors.append({
+            "id": chunk["id"],
+            "values": embedding,
             "metadata": {
-                "type": "tech_stack",
-                "source": f"project:{project['slug']}",
-                "name": project["name"],
-                "slug": project["slug"],
+                **chunk["metadata"],
+                "content": chunk["content"][:1000],  # Store truncated content in metadata
             }
         })
     
-    # 3. Skills chunks (by category)
-    skills = portfolio["skills"]
-    
-    # Combined skills overview
-    all_skills = []
-    for category, skill_list in skills.items():
-        all_skills.extend(skill_list)
-    
-    chunks.append({
-        "id": "skills-overview",
-        "content": f"""Technical Skills Overview:
-
-Frontend: {', '.join(skills['frontend'])}
-Backend: {', '.join(skills['backend'])}
-Cloud & DevOps: {', '.join(skills['cloud'])}
-Integrations: {', '.join(skills['integrations'])}
-Best Practices: {', '.join(skills['practices'])}
-
-Total skills: {len(all_skills)} technologies and practices.""",
-        "metadata": {
-            "type": "skills",
-            "source": "skills:overview",
-            "categories": list(skills.keys()),
-        }
-    })
-    
-    # Individual category chunks
-    skill_descriptions = {
-        "frontend": "Frontend development technologies including frameworks, libraries, and styling tools",
-        "backend": "Backend development technologies including servers, databases, and real-time systems",
-        "cloud": "Cloud platforms, deployment tools, and DevOps infrastructure",
-        "integrations": "Third-party API integrations and external service connections",
-        "practices": "Development practices, methodologies, and architectural approaches",
-    }
+    await with_retries(f"Upsert batch {number}", lambda: upsert_vectors(vectors, namespace=namespace), retries)
+    print(f"  Batch {number}: {len(batch)} chunks indexed")
+    return vectors
+
+
+# =============================================================================
+# Generations
+# =============================================================================
+
+def generation_of(namespace: str) -> Optional[int]:
+    """Generation number of a portfolio namespace (0 for the unversioned one)."""
+    if namespace == INDEX_ALIAS:
+        return 0
+    match = GENERATION_PATTERN.match(namespace)
+    return int(match.group(1)) if match else None
+
+
+def list_generations(stats: Dict[str, Any]) -> Dict[str, int]:
+    """Portfolio namespaces present in the index, with their generation numbers."""
+    generations = {}
+    for namespace in stats.get("namespaces", {}):
+        generation = generation_of(namespace)
+        if generation is not None:
+            generations[namespace] = generation
+    return generations
+
+
+async def smoke_test(namespace: str, vectors: List[dict], expected: int):
+    """
+    Check that a freshly built namespace is complete and answers queries.
     
-    for category, skill_list in skills.items():
-        chunks.append({
-            "id": f"skills-{category}",
-            "content": f"""{category.title()} Skills:
-{', '.join(skill_list)}
+    Raises:
+        Exception: If the vector count is off or a stored chunk does not
+            come back as its own best match.
+    """
+    stats = await get_index_stats()
+    stored = stats.get("namespaces", {}).get(namespace, {}).get("vector_count", 0)
+    if stored != expected:
+        raise Exception(f"namespace '{namespace}' holds {stored} vectors, expected {expected}")
+    
+    probe = vectors[0]
+    results = await search_by_embedding(probe["values"], top_k=1, threshold=0.5, namespace=namespace)
+    if not results or results[0]["id"] != probe["id"]:
+        found = results[0]["id"] if results else "nothing"
+        raise Exception(f"smoke query for '{probe['id']}' returned {found}")
 
-{skill_descriptions.get(category, '')}""",
-            "metadata": {
-                "type": "skills",
-                "source": f"skills:{category}",
-                "category": category,
-            }
-        })
+
+async def collect_garbage(generations: Dict[str, int], live: str, previous: Optional[str], keep: int) -> List[str]:
+    """
+    Delete old generations, keeping the newest `keep` besides the live one.
+    
+    A running service may search the previous generation until it next
+    re-reads the pointer, so deleting that one waits out the refresh
+    interval first.
     
-    # 4. Quick facts chunk
-    quick_facts = portfolio["quickFacts"]
-    facts_text = "\n".join(f"- {fact}" for fact in quick_facts)
-    
-    chunks.append({
-        "id": "quick-facts",
-        "content": f"""Quick Facts about {owner['name']}:
-{facts_text}""",
-        "metadata": {
-            "type": "facts",
-            "source": "quick_facts",
-        }
-    })
-    
-    # 5. Contact information chunk
-    contact = portfolio["contact"]
-    chunks.append({
-        "id": "contact-info",
-        "content": f"""Contact Information:
-Email: {contact['email']}
-GitHub: {contact['github']}
-LinkedIn: {contact['linkedin']}
-
-{contact['cta']}
-
-For hiring inquiries, collaboration opportunities, or project discussions, 
-please reach out via email or connect on LinkedIn.""",
-        "metadata": {
-            "type": "contact",
-            "source": "contact",
-            "email": contact["email"],
-            "github": contact["github"],
-            "linkedin": contact["linkedin"],
-        }
-    })
-    
-    return chunks
+    Returns:
+        The deleted namespaces.
+    """
+    old = sorted((ns for ns in generations if ns != live), key=generations.get, reverse=True)
+    doomed = old[keep:]
+    
+    if previous in doomed and settings.index_pointer_refresh > 0:
+        print(f"  Waiting {settings.index_pointer_refresh:.0f}s for services to pick up the new pointer...")
+        await asyncio.sleep(settings.index_pointer_refresh)
+    
+    deleted = []
+    for namespace in doomed:
+        try:
+            await delete_namespace(namespace)
+            save_manifest(namespace, None)
+            deleted.append(namespace)
+            print(f"  Deleted old generation '{namespace}'")
+        except Exception as e:
+            print(f"  Warning: Could not delete '{namespace}': {e}")
+    
+    for namespace in old[:keep]:
+        print(f"  Kept '{namespace}' for rollback")
+    
+    return deleted
 
 
 # =============================================================================
 # Main Indexing Function
 # =============================================================================
 
-async def index_portfolio(reset: bool = False):
+async def index_portfolio(
+    reset: bool = False,
+    dry_run: bool = False,
+    batch_size: int = 32,
+    concurrency: int = 4,
+    retries: int = 3,
+    keep: int = 1,
+):
     """
-    Index portfolio content into Pinecone.
+    Index portfolio content into the configured vector store.
     
     Args:
-        reset: If True, delete existing index before rebuilding.
+        reset: If True, rebuild everything into a new generation and swap to it.
+        dry_run: Only print what would change and the estimated cost.
+        batch_size: Chunks per embedding/upsert batch.
+        concurrency: Batches processed at the same time.
+        retries: Retries per failed embedding or upsert call.
+        keep: Old generations kept for rollback after a swap.
     """
     print("=" * 60)
     print("NEXI Portfolio Indexer")
     print("=" * 60)
     
     # Check configuration
-    if not settings.is_embedding_configured():
+    if not dry_run and not settings.is_embedding_configured():
         print("ERROR: OpenAI API key not configured")
         print("Please set OPENAI_API_KEY in .env file")
         return False
     
-    if not settings.is_pinecone_configured():
+    if not dry_run and not settings.is_vector_store_configured():
         print("ERROR: Pinecone API key not configured")
         print("Please set PINECONE_API_KEY in .env file")
         return False
     
     print(f"Embedding model: {settings.embedding_model}")
-    print(f"Pinecone index: {settings.pinecone_index_name}")
-    print()
+    print(f"Vector store: {settings.vector_store}")
+    if settings.vector_store == "local":
+        print(f"Local index: {settings.local_index_path} ({settings.local_index_dtype})")
+    else:
+        print(f"Pinecone index: {settings.pinecone_index_name}")
     
-    # Reset if requested
-    if reset:
-        print("Resetting index (deleting existing vectors)...")
+    # Pick the namespace to write: the served one, or a new generation
+    served = INDEX_ALIAS
+    generations: Dict[str, int] = {}
+    if settings.is_vector_store_configured():
         try:
-            await delete_namespace("portfolio")
-            print("Index cleared.")
+            served = await get_active_namespace()
+            generations = list_generations(await get_index_stats())
         except Exception as e:
-            print(f"Warning: Could not clear index: {e}")
+            if not dry_run:
+                print(f"ERROR: Could not read the index: {e}")
+                return False
+            print(f"Warning: Could not read the index: {e}")
+    
+    generation = max([*generations.values(), generation_of(served) or 0]) + 1
+    namespace = f"{INDEX_ALIAS}-v{generation}" if reset else served
+    print(f"Serving namespace: {served}")
+    if reset:
+        print(f"Building namespace: {namespace}")
+    print()
     
     # Load portfolio
     print("Loading portfolio data...")
@@ -264,32 +352,121 @@ async def index_portfolio(reset: bool = False):
         print(f"  - {chunk_type}: {count}")
     print()
     
-    # Generate embeddings
-    print("Generating embeddings...")
-    texts = [chunk["content"] for chunk in chunks]
-    embeddings = await generate_embeddings_batch(texts)
-    print(f"  Generated {len(embeddings)} embeddings")
-    print(f"  Embedding dimension: {len(embeddings[0])}")
-    print()
+    # Compare with the manifest
+    manifest = {} if reset else load_manifest(namespace)
     
-    # Prepare vectors for Pinecone
-    vectors = []
-    for chunk, embedding in zip(chunks, embeddings):
-        vectors.append({
-            "id": chunk["id"],
-            "values": embedding,
-            "metadata": {
-                **chunk["metadata"],
-                "content": chunk["content"][:1000],  # Store truncated content in metadata
-            }
-        })
+    if manifest and not dry_run:
+        # The manifest is only trusted if the index still holds what it lists
+        try:
+            stats = await get_index_stats()
+            stored = stats.get("namespaces", {}).get(namespace, {}).get("vector_count", 0)
+            if stored != len(manifest.get("chunks", {})):
+                print(f"Index holds {stored} vectors but the manifest lists {len(manifest.get('chunks', {}))}; re-indexing everything")
+                manifest = {}
+        except Exception as e:
+            print(f"Warning: Could not verify index against manifest: {e}")
+    
+    diff = diff_chunks(chunks, manifest)
+    by_id = {chunk["id"]: chunk for chunk in chunks}
+    pending = [by_id[i] for i in diff["added"] + diff["changed"]]
+    tokens, cost = estimate_cost(pending)
     
-    # Upsert to Pinecone
-    print("Uploading to Pinecone...")
-    count = await upsert_vectors(vectors, namespace="portfolio")
-    print(f"  Uploaded {count} vectors")
+    print("Changes:")
+    markers = {"added": "+", "changed": "~", "removed": "-"}
+    for kind in ("added", "changed", "removed", "unchanged"):
+        print(f"  {kind}: {len(diff[kind])}")
+        for chunk_id in diff[kind] if kind in markers else []:
+            print(f"    {markers[kind]} {chunk_id}")
+    print(f"  Estimated embedding cost: ~{tokens:,} tokens (${cost:.6f})")
     print()
     
+    if dry_run:
+        print("=" * 60)
+        print(f"Dry run: nothing was changed{f' (would build and swap to {namespace})' if reset else ''}.")
+        print("=" * 60)
+        return True
+    
+    started = time.perf_counter()
+    indexed = {
+        chunk_id: known
+        for chunk_id, known in manifest.get("chunks", {}).items()
+        if chunk_id in diff["unchanged"]
+    }
+    built: List[dict] = []
+    failed = 0
+    
+    # Embed and upload changed chunks
+    if pending:
+        print(f"Embedding and uploading {len(pending)} chunks to {settings.vector_store}...")
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def run(batch: List[dict], number: int) -> List[dict]:
+            async with semaphore:
+                return await index_batch(batch, number, namespace, retries)
+        
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        results = await asyncio.gather(
+            *[run(batch, n) for n, batch in enumerate(batches, 1)],
+            return_exceptions=True,
+        )
+        
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                failed += len(batch)
+                print(f"  ERROR: batch failed after {retries} retries: {result}")
+                continue
+            for vector in result:
+                indexed[vector["id"]] = chunk_hash(by_id[vector["id"]])
+            built.extend(result)
+        print()
+    
+    # Delete chunks that no longer exist
+    if diff["removed"]:
+        print(f"Deleting {len(diff['removed'])} removed chunks...")
+        try:
+            await with_retries("Delete", lambda: delete_vectors(diff["removed"], namespace=namespace), retries)
+        except Exception as e:
+            print(f"  ERROR: could not delete removed chunks: {e}")
+            # Keep them in the manifest so the next run retries
+            for chunk_id in diff["removed"]:
+                indexed[chunk_id] = manifest["chunks"][chunk_id]
+        print()
+    
+    section = {
+        "embedding_model": settings.embedding_model,
+        "dimensions": settings.embedding_dimensions,
+        "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "chunks": indexed,
+    }
+    
+    if reset:
+        # Only a complete, queryable generation goes live
+        try:
+            if failed:
+                raise Exception(f"{failed} chunks failed to index")
+            print(f"Smoke testing '{namespace}'...")
+            await with_retries("Smoke test", lambda: smoke_test(namespace, built, len(chunks)), retries)
+        except Exception as e:
+            print(f"  ERROR: {e}")
+            print(f"  Still serving '{served}'; removing the incomplete '{namespace}'")
+            try:
+                await delete_namespace(namespace)
+            except Exception as cleanup_error:
+                print(f"  Warning: Could not delete '{namespace}': {cleanup_error}")
+            return False
+        
+        save_manifest(namespace, section)
+        await set_active_namespace(namespace, generation)
+        print(f"  Passed. Now serving '{namespace}' (was '{served}')")
+        print()
+        
+        print("Collecting old generations...")
+        generations = list_generations(await get_index_stats())
+        await collect_garbage(generations, namespace, served, keep)
+        print()
+    else:
+        save_manifest(namespace, section)
+    
     # Get final stats
     print("Index statistics:")
     stats = await get_index_stats()
@@ -297,13 +474,14 @@ async def index_portfolio(reset: bool = False):
     if "namespaces" in stats:
         for ns, ns_stats in stats["namespaces"].items():
             print(f"  Namespace '{ns}': {ns_stats.get('vector_count', 'N/A')} vectors")
+    print(f"  Indexed {len(pending) - failed} chunks in {time.perf_counter() - started:.2f}s")
     
     print()
     print("=" * 60)
-    print("Portfolio indexing complete!")
+    print("Portfolio indexing complete!" if not failed else f"Portfolio indexing finished with {failed} failed chunks")
     print("=" * 60)
     
-    return True
+    return not failed
 
 
 # =============================================================================
@@ -317,9 +495,46 @@ if __name__ == "__main__":
     parser.add_argument(
         "--reset",
         action="store_true",
-        help="Clear existing index before rebuilding"
+        help="Rebuild into a new namespace generation, then swap to it"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the changes and estimated cost without indexing"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=32,
+        help="Chunks per embedding/upsert batch"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Batches processed concurrently"
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=3,
+        help="Retries per failed embedding or upsert call"
+    )
+    parser.add_argument(
+        "--keep",
+        type=int,
+        default=1,
+        help="Old generations kept for rollback after --reset"
     )
     
     args = parser.parse_args()
     
-    asyncio.run(index_portfolio(reset=args.reset))
+    ok = asyncio.run(index_portfolio(
+        reset=args.reset,
+        dry_run=args.dry_run,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        retries=args.retries,
+        keep=args.keep,
+    ))
+    sys.exit(0 if ok else 1)
@@ -9,9 +9,19 @@ This module contains the core services for the AI chatbot:
 - error_tracking: Sentry integration (Phase 4)
 - ab_testing: A/B testing for prompts (Phase 4)
 - cost_monitor: Token cost tracking (Phase 4)
+- singleflight: Coalescing of identical concurrent chat queries
 """
 
-from .llm import stream_chat_completion, get_provider_config, is_provider_configured
+from .llm import (
+    stream_chat_completion,
+    get_provider_config,
+    is_provider_configured,
+    init_http_client,
+    close_http_client,
+    get_router,
+    get_hedging,
+    StreamInfo,
+)
 from .context import get_portfolio_context, load_portfolio_data
 from .embeddings import (
     generate_embedding,
@@ -19,12 +29,17 @@ from .embeddings import (
     search_similar,
     upsert_vectors,
     get_index_stats,
+    get_active_namespace,
 )
 from .cache import (
     get_response_cache,
     get_fallback_response,
     ResponseCache,
 )
+from .singleflight import (
+    get_single_flight,
+    SingleFlight,
+)
 from .error_tracking import (
     init_sentry,
     capture_exception,
@@ -52,6 +67,11 @@ __all__ = [
     "stream_chat_completion",
     "get_provider_config",
     "is_provider_configured",
+    "init_http_client",
+    "close_http_client",
+    "get_router",
+    "get_hedging",
+    "StreamInfo",
     # Context
     "get_portfolio_context",
     "load_portfolio_data",
@@ -61,10 +81,13 @@ __all__ = [
     "search_similar",
     "upsert_vectors",
     "get_index_stats",
+    "get_active_namespace",
     # Caching (Phase 4)
     "get_response_cache",
     "get_fallback_response",
     "ResponseCache",
+    "get_single_flight",
+    "SingleFlight",
     # Error Tracking (Phase 4)
     "init_sentry",
     "capture_exception",
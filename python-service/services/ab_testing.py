@@ -3,14 +3,19 @@ NEXI AI Chatbot - A/B Testing Service
 
 Implements A/B testing for prompts and responses.
 Allows testing different prompt variations to optimize chat quality.
+
+Assignment is stateless: the variant is recomputed from a hash of the
+session id, so memory does not grow with the number of sessions. Unique
+sessions per variant are estimated with a fixed-size HyperLogLog sketch.
 """
 
 import hashlib
 import logging
-import random
+import math
 import time
+from bisect import bisect_right
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Tuple
 from enum import Enum
 
 logger = logging.getLogger("nexi.ab_testing")
@@ -43,15 +48,57 @@ class ABTestConfig:
         total = sum(self.variants.values())
         if abs(total - 1.0) > 0.001:
             raise ValueError(f"Variant weights must sum to 1.0, got {total}")
+    
+    def cumulative_weights(self) -> Tuple[List[float], List[str]]:
+        """Build the (cumulative weight, variant) table used for assignment."""
+        bounds: List[float] = []
+        names: List[str] = []
+        cumulative = 0.0
+        
+        for variant, weight in self.variants.items():
+            cumulative += weight
+            bounds.append(cumulative)
+            names.append(variant)
+        
+        return bounds, names
 
 
-@dataclass
-class ABTestResult:
-    """Result of variant assignment."""
-    test_name: str
-    variant: str
-    session_id: str
-    assigned_at: float = field(default_factory=time.time)
+# =============================================================================
+# Unique Session Estimate
+# =============================================================================
+
+class SessionCounter:
+    """
+    HyperLogLog estimate of distinct sessions in fixed memory.
+    
+    2^precision one-byte registers; the standard error is about
+    1.04 / sqrt(2^precision) (~1.6% at the default 4 KB).
+    """
+    
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self._registers = bytearray(1 << precision)
+    
+    def add(self, hash_value: int):
+        """Count a session by a uniform 64-bit hash of its id."""
+        index = hash_value >> (64 - self.precision)
+        rest_bits = 64 - self.precision
+        rank = rest_bits - (hash_value & ((1 << rest_bits) - 1)).bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+    
+    def count(self) -> int:
+        """Estimated number of distinct sessions added."""
+        m = len(self._registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self._registers)
+        
+        # Small-range correction (linear counting) while registers are still empty
+        zeros = self._registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        
+        return round(estimate)
 
 
 # =============================================================================
@@ -121,16 +168,18 @@ class ABTestManager:
     Manages A/B tests for the chatbot.
     
     Features:
-    - Consistent assignment per session
-    - Weighted random assignment
-    - Metrics tracking
+    - Consistent assignment per session (recomputed, never stored)
+    - Weighted assignment via cumulative-weight table + binary search
+    - Metrics tracking with per-variant counters and fixed-size
+      unique-session sketches only
     """
     
     def __init__(self, seed: Optional[str] = None):
         self.seed = seed
         self._tests: Dict[str, ABTestConfig] = {}
-        self._assignments: Dict[str, Dict[str, ABTestResult]] = {}  # session_id -> {test_name -> result}
+        self._tables: Dict[str, Tuple[List[float], List[str]]] = {}  # test_name -> (bounds, variants)
         self._metrics: Dict[str, Dict[str, Dict[str, Any]]] = {}  # test_name -> variant -> metrics
+        self._sessions: Dict[str, Dict[str, SessionCounter]] = {}  # test_name -> variant -> unique sessions
         
         # Register default tests
         self._register_default_tests()
@@ -163,64 +212,51 @@ class ABTestManager:
     def register_test(self, config: ABTestConfig):
         """Register a new A/B test."""
         self._tests[config.name] = config
+        self._tables[config.name] = config.cumulative_weights()
         self._metrics[config.name] = {
-            variant: {"assignments": 0, "positive_feedback": 0, "negative_feedback": 0}
+            variant: {"exposures": 0, "positive_feedback": 0, "negative_feedback": 0}
             for variant in config.variants
         }
+        self._sessions[config.name] = {variant: SessionCounter() for variant in config.variants}
         logger.info(f"Registered A/B test: {config.name} with {len(config.variants)} variants")
     
-    def _hash_assignment(self, session_id: str, test_name: str) -> float:
+    def _session_hash(self, session_id: str, test_name: str) -> bytes:
         """Generate a deterministic hash for consistent assignment."""
         seed_str = self.seed or ""
         key = f"{seed_str}:{session_id}:{test_name}"
-        hash_bytes = hashlib.sha256(key.encode()).digest()
-        # Convert first 8 bytes to a float between 0 and 1
-        hash_int = int.from_bytes(hash_bytes[:8], byteorder="big")
-        return hash_int / (2**64 - 1)
+        return hashlib.sha256(key.encode()).digest()
+    
+    def _select_variant(self, test_name: str, hash_bytes: bytes) -> Optional[str]:
+        """Recompute a session's variant, or None if the test isn't running."""
+        test = self._tests.get(test_name)
+        if not test or not test.enabled:
+            return None
+        
+        # First 8 bytes as a float between 0 and 1
+        position = int.from_bytes(hash_bytes[:8], byteorder="big") / (2**64 - 1)
+        bounds, names = self._tables[test_name]
+        index = bisect_right(bounds, position)
+        
+        # Weights may sum to just below 1.0: the remainder goes to the last variant
+        return names[index] if index < len(names) else names[-1]
     
     def get_variant(self, session_id: str, test_name: str) -> str:
         """
         Get the variant for a session.
         
         Uses consistent hashing to ensure the same session always gets
-        the same variant, even across restarts.
+        the same variant, even across restarts. Nothing is stored per
+        session: each call counts as one exposure, and the session is
+        added to the variant's unique-session sketch.
         """
-        # Check if already assigned
-        if session_id in self._assignments:
-            if test_name in self._assignments[session_id]:
-                return self._assignments[session_id][test_name].variant
-        
-        # Get test config
-        test = self._tests.get(test_name)
-        if not test or not test.enabled:
+        hash_bytes = self._session_hash(session_id, test_name)
+        selected = self._select_variant(test_name, hash_bytes)
+        if selected is None:
             return PromptVariant.CONTROL.value
         
-        # Deterministic assignment based on session hash
-        hash_value = self._hash_assignment(session_id, test_name)
-        
-        # Select variant based on weights
-        cumulative = 0.0
-        selected = PromptVariant.CONTROL.value
-        
-        for variant, weight in test.variants.items():
-            cumulative += weight
-            if hash_value < cumulative:
-                selected = variant
-                break
-        
-        # Store assignment
-        if session_id not in self._assignments:
-            self._assignments[session_id] = {}
-        
-        result = ABTestResult(
-            test_name=test_name,
-            variant=selected,
-            session_id=session_id,
-        )
-        self._assignments[session_id][test_name] = result
-        
-        # Update metrics
-        self._metrics[test_name][selected]["assignments"] += 1
+        # Update metrics (the sketch uses hash bits independent of the variant's)
+        self._metrics[test_name][selected]["exposures"] += 1
+        self._sessions[test_name][selected].add(int.from_bytes(hash_bytes[8:16], byteorder="big"))
         
         logger.debug(f"A/B assigned: session={session_id[:8]}... test={test_name} variant={selected}")
         return selected
@@ -232,7 +268,7 @@ class ABTestManager:
         Args:
             session_id: The session identifier
             variation_type: Type of variation (e.g., "response_style", "personality")
-            
+        
         Returns:
             The prompt text for the assigned variant
         """
@@ -241,15 +277,11 @@ class ABTestManager:
         return variations.get(variant, variations.get(PromptVariant.CONTROL.value, ""))
     
     def record_feedback(self, session_id: str, test_name: str, positive: bool):
-        """Record feedback for a variant."""
-        if session_id not in self._assignments:
-            return
-        
-        if test_name not in self._assignments[session_id]:
+        """Record feedback for a variant (attributed by recomputing the hash)."""
+        variant = self._select_variant(test_name, self._session_hash(session_id, test_name))
+        if variant is None:
             return
         
-        variant = self._assignments[session_id][test_name].variant
-        
         if positive:
             self._metrics[test_name][variant]["positive_feedback"] += 1
         else:
@@ -266,6 +298,7 @@ class ABTestManager:
                 "test_name": test_name,
                 "variants": {
                     variant: {
+                        "assignments": self._sessions[test_name][variant].count(),  # Unique sessions (estimate)
                         **data,
                         "positive_rate": (
                             data["positive_feedback"] / (data["positive_feedback"] + data["negative_feedback"])
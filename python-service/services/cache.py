@@ -4,17 +4,30 @@ NEXI AI Chatbot - Response Caching Service
 Implements caching for LLM responses to:
 - Reduce API costs
 - Improve response time for frequent questions
+- Answer paraphrased questions from semantically similar cached queries
+- Survive restarts through an optional SQLite-backed persistent tier
+- Replay hits as pre-encoded SSE frames (no per-hit serialization)
 - Provide fallback responses when API is unavailable
 """
 
+import asyncio
 import hashlib
 import json
 import logging
+import sqlite3
+import threading
 import time
-from typing import Optional, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass, field
 from collections import OrderedDict
 
+import numpy as np
+
+from config.settings import settings
+from services.sse_frames import build_frames, split_frames, split_words
+
 logger = logging.getLogger("nexi.cache")
 
 # =============================================================================
@@ -23,7 +36,9 @@ logger = logging.getLogger("nexi.cache")
 
 DEFAULT_TTL = 3600  # 1 hour
 MAX_CACHE_SIZE = 500  # Maximum number of cached responses
-SIMILARITY_THRESHOLD = 0.9  # For fuzzy matching (future enhancement)
+SIMILARITY_THRESHOLD = 0.9  # Min cosine similarity for a semantic cache hit
+FRAME_CHARS = 48  # Approximate characters per pre-encoded replay frame
+NEAR_MISS_MARGIN = 0.05  # Neighbours this close below the threshold count as near misses
 
 
 @dataclass
@@ -36,6 +51,285 @@ class CacheEntry:
     hit_count: int = 0
     last_accessed: float = field(default_factory=time.time)
     metadata: Dict[str, Any] = field(default_factory=dict)
+    embedding: Optional[np.ndarray] = None  # Normalized query embedding (semantic tier)
+    context_hash: Optional[str] = None
+    frames: Optional[List[bytes]] = None  # Pre-encoded SSE content frames for replay
+
+
+# =============================================================================
+# Semantic Index
+# =============================================================================
+
+class SemanticIndex:
+    """
+    Fixed-capacity matrix of normalized query embeddings.
+    
+    Rows are recycled through a free list, so adding and evicting are O(1)
+    and a nearest-neighbour lookup is a single matmul over the matrix.
+    """
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._matrix: Optional[np.ndarray] = None  # Allocated on first add (dimension unknown until then)
+        self._active = np.zeros(capacity, dtype=bool)
+        self._keys: List[Optional[str]] = [None] * capacity
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+    
+    def __len__(self) -> int:
+        return len(self._slots)
+    
+    @staticmethod
+    def normalize(embedding: Any) -> Optional[np.ndarray]:
+        """Convert an embedding to a unit-length float32 vector (None if zero)."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        return vector / norm
+    
+    def add(self, key: str, vector: np.ndarray) -> bool:
+        """Store a normalized vector under a key. Returns False if it can't be stored."""
+        if self._matrix is None:
+            self._matrix = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+        
+        if vector.shape[0] != self._matrix.shape[1]:
+            logger.warning(f"Semantic cache dimension mismatch: {vector.shape[0]} != {self._matrix.shape[1]}")
+            return False
+        
+        slot = self._slots.get(key)
+        if slot is None:
+            if not self._free:
+                return False
+            slot = self._free.pop()
+        
+        self._matrix[slot] = vector
+        self._active[slot] = True
+        self._keys[slot] = key
+        self._slots[key] = slot
+        return True
+    
+    def remove(self, key: str):
+        """Remove a key, returning its row to the free list."""
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return
+        
+        self._active[slot] = False
+        self._keys[slot] = None
+        self._free.append(slot)
+    
+    def nearest(self, vector: np.ndarray) -> Optional[Tuple[str, float]]:
+        """Find the most similar stored key and its cosine similarity."""
+        if self._matrix is None or not self._slots or vector.shape[0] != self._matrix.shape[1]:
+            return None
+        
+        scores = np.where(self._active, self._matrix @ vector, -np.inf)
+        best = int(np.argmax(scores))
+        
+        return self._keys[best], float(scores[best])
+    
+    def clear(self):
+        """Remove all keys (keeps the allocated matrix)."""
+        self._active[:] = False
+        self._keys = [None] * self.capacity
+        self._slots.clear()
+        self._free = list(range(self.capacity - 1, -1, -1))
+
+
+# =============================================================================
+# Persistent Store (L2)
+# =============================================================================
+
+class PersistentCacheStore:
+    """
+    SQLite (WAL mode) store behind the in-memory cache.
+    
+    Writes run on one background thread, so they are ordered and never
+    block the event loop. Reads are awaited on a second thread with its own
+    connection (WAL readers don't wait for the writer), so a lookup never
+    queues behind pending writes; entries whose write is still queued are
+    served from memory. Reads are only issued for keys known to be present
+    (see ResponseCache._l2_keys).
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-l2")
+        self._read_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-l2-read")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._read_conn: Optional[sqlite3.Connection] = None
+        self._pending: Dict[str, CacheEntry] = {}  # Written entries not yet committed
+        self._pending_lock = threading.Lock()  # Shared by the event loop and the writer thread
+        self._executor.submit(self._open).result()
+        self._read_executor.submit(self._open_reader).result()
+    
+    def _open(self):
+        """Open the database and create the schema (runs on the worker thread)."""
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0,
+                last_accessed REAL NOT NULL,
+                metadata TEXT,
+                embedding BLOB,
+                context_hash TEXT,
+                frames BLOB
+            )
+        """)
+        
+        # Databases created before frames were cached
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(cache_entries)")}
+        if "frames" not in columns:
+            self._conn.execute("ALTER TABLE cache_entries ADD COLUMN frames BLOB")
+        
+        self._conn.commit()
+    
+    def _open_reader(self):
+        """Open the read connection (runs on the read thread, after the schema exists)."""
+        self._read_conn = sqlite3.connect(self.path, check_same_thread=False)
+    
+    @staticmethod
+    def _to_row(entry: CacheEntry) -> tuple:
+        return (
+            entry.key,
+            entry.response,
+            entry.created_at,
+            entry.expires_at,
+            entry.hit_count,
+            entry.last_accessed,
+            json.dumps(entry.metadata),
+            entry.embedding.astype(np.float32).tobytes() if entry.embedding is not None else None,
+            entry.context_hash,
+            b"".join(entry.frames) if entry.frames else None,
+        )
+    
+    @staticmethod
+    def _from_row(row: tuple) -> CacheEntry:
+        return CacheEntry(
+            key=row[0],
+            response=row[1],
+            created_at=row[2],
+            expires_at=row[3],
+            hit_count=row[4],
+            last_accessed=row[5],
+            metadata=json.loads(row[6]) if row[6] else {},
+            embedding=np.frombuffer(row[7], dtype=np.float32).copy() if row[7] else None,
+            context_hash=row[8],
+            frames=split_frames(row[9]) if row[9] else None,
+        )
+    
+    def _execute(self, sql: str, params: tuple = ()):
+        self._conn.execute(sql, params)
+        self._conn.commit()
+    
+    def _write(self, entry: CacheEntry, row: tuple):
+        self._execute("INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+        # Compare-and-delete: a newer entry for the key stays pending until its own commit
+        with self._pending_lock:
+            if self._pending.get(entry.key) is entry:
+                del self._pending[entry.key]
+    
+    def write(self, entry: CacheEntry):
+        """Insert or replace an entry (asynchronous)."""
+        with self._pending_lock:
+            self._pending[entry.key] = entry
+        self._executor.submit(self._write, entry, self._to_row(entry))
+    
+    def touch(self, key: str, hit_count: int, last_accessed: float):
+        """Update access statistics for an entry (asynchronous)."""
+        self._executor.submit(
+            self._execute,
+            "UPDATE cache_entries SET hit_count = ?, last_accessed = ? WHERE key = ?",
+            (hit_count, last_accessed, key),
+        )
+    
+    def delete(self, keys: List[str]):
+        """Delete entries by key (asynchronous)."""
+        if keys:
+            with self._pending_lock:
+                for key in keys:
+                    self._pending.pop(key, None)
+            self._executor.submit(
+                self._execute,
+                f"DELETE FROM cache_entries WHERE key IN ({','.join('?' * len(keys))})",
+                tuple(keys),
+            )
+    
+    def delete_all(self):
+        """Delete every entry (asynchronous)."""
+        with self._pending_lock:
+            self._pending.clear()
+        self._executor.submit(self._execute, "DELETE FROM cache_entries")
+    
+    async def read(self, key: str) -> Optional[CacheEntry]:
+        """Read one entry (point lookup by primary key, off the event loop)."""
+        with self._pending_lock:
+            entry = self._pending.get(key)
+        if entry is not None:
+            return entry
+        
+        def _read():
+            row = self._read_conn.execute("SELECT * FROM cache_entries WHERE key = ?", (key,)).fetchone()
+            return self._from_row(row) if row else None
+        
+        return await asyncio.get_running_loop().run_in_executor(self._read_executor, _read)
+    
+    def load_index(self, max_entries: int) -> List[Tuple[str, float]]:
+        """
+        Purge expired and overflow entries, then list (key, expires_at).
+        
+        Keys are ordered least- to most-recently accessed.
+        """
+        def _load():
+            now = time.time()
+            self._conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+            self._conn.execute("""
+                DELETE FROM cache_entries WHERE key NOT IN (
+                    SELECT key FROM cache_entries ORDER BY last_accessed DESC LIMIT ?
+                )
+            """, (max_entries,))
+            self._conn.commit()
+            return self._conn.execute(
+                "SELECT key, expires_at FROM cache_entries ORDER BY last_accessed ASC"
+            ).fetchall()
+        
+        return self._executor.submit(_load).result()
+    
+    def load_hottest(self, limit: int) -> List[CacheEntry]:
+        """Load the most-hit, unexpired entries (blocking; used at startup)."""
+        def _load():
+            rows = self._conn.execute("""
+                SELECT * FROM cache_entries WHERE expires_at > ?
+                ORDER BY hit_count DESC, last_accessed DESC LIMIT ?
+            """, (time.time(), limit)).fetchall()
+            return [self._from_row(row) for row in rows]
+        
+        return self._executor.submit(_load).result()
+    
+    def close(self):
+        """Flush pending writes and close the database."""
+        def _close():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        
+        def _close_reader():
+            if self._read_conn is not None:
+                self._read_conn.close()
+                self._read_conn = None
+        
+        self._read_executor.submit(_close_reader).result()
+        self._read_executor.shutdown(wait=True)
+        self._executor.submit(_close).result()
+        self._executor.shutdown(wait=True)
 
 
 # =============================================================================
@@ -50,19 +344,150 @@ class ResponseCache:
     - TTL-based expiration
     - LRU eviction when cache is full
     - Query normalization for better hit rates
+    - Semantic tier: nearest cached query by embedding similarity
+    - Optional persistent tier (L2) with write-through and startup preload
+    - Responses stored as pre-encoded SSE frames for cheap replay
     - Statistics tracking
     """
     
-    def __init__(self, max_size: int = MAX_CACHE_SIZE, default_ttl: int = DEFAULT_TTL):
+    def __init__(
+        self,
+        max_size: int = MAX_CACHE_SIZE,
+        default_ttl: int = DEFAULT_TTL,
+        similarity_threshold: float = SIMILARITY_THRESHOLD,
+        store: Optional[PersistentCacheStore] = None,
+        store_max_entries: int = MAX_CACHE_SIZE * 10,
+        frame_chars: int = FRAME_CHARS,
+    ):
         self.max_size = max_size
+        self.frame_chars = frame_chars
         self.default_ttl = default_ttl
+        self.similarity_threshold = similarity_threshold
         self._cache: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._semantic_index = SemanticIndex(max_size)
+        
+        # Persistent tier: key -> expires_at for everything in the store,
+        # in access order, so L1 misses only touch disk for known keys
+        self._store = store
+        self._store_max_entries = store_max_entries
+        self._l2_keys: OrderedDict[str, float] = OrderedDict()
+        
         self._stats = {
             "hits": 0,
+            "l2_hits": 0,
+            "preloaded": 0,
             "misses": 0,
             "evictions": 0,
             "expirations": 0,
+            "semantic_lookups": 0,
+            "semantic_hits": 0,
+            "semantic_near_misses": 0,
         }
+        self._semantic_hit_similarity = 0.0  # Running sum, for the average
+    
+    def _remove(self, key: str):
+        """Delete an entry from both the LRU map and the semantic index."""
+        del self._cache[key]
+        self._semantic_index.remove(key)
+    
+    def _insert(self, entry: CacheEntry):
+        """Insert an entry into L1, evicting least recently used entries if full."""
+        while len(self._cache) >= self.max_size and entry.key not in self._cache:
+            oldest_key = next(iter(self._cache))
+            self._remove(oldest_key)
+            self._stats["evictions"] += 1
+        
+        self._cache[entry.key] = entry
+        self._cache.move_to_end(entry.key)
+        if entry.embedding is not None:
+            self._semantic_index.add(entry.key, entry.embedding)
+        else:
+            self._semantic_index.remove(entry.key)
+    
+    def _persist(self, entry: CacheEntry):
+        """Write an entry through to the persistent tier (off the event loop)."""
+        if self._store is None:
+            return
+        
+        self._store.write(entry)
+        self._l2_keys[entry.key] = entry.expires_at
+        self._l2_keys.move_to_end(entry.key)
+        
+        # Keep the store bounded: drop the least recently used keys
+        overflow = len(self._l2_keys) - self._store_max_entries
+        if overflow > 0:
+            dropped = [self._l2_keys.popitem(last=False)[0] for _ in range(overflow)]
+            self._store.delete(dropped)
+    
+    def _forget(self, keys: List[str]):
+        """Remove keys from the persistent tier."""
+        if self._store is None:
+            return
+        
+        keys = [key for key in keys if self._l2_keys.pop(key, None) is not None]
+        self._store.delete(keys)
+    
+    def _touch(self, entry: CacheEntry):
+        """Record a hit in the persistent tier (feeds the startup preload ranking)."""
+        if self._store is not None and entry.key in self._l2_keys:
+            self._store.touch(entry.key, entry.hit_count, entry.last_accessed)
+            self._l2_keys.move_to_end(entry.key)
+    
+    async def _get_from_store(self, key: str) -> Optional[CacheEntry]:
+        """Promote an entry from the persistent tier into L1."""
+        expires_at = self._l2_keys.get(key)
+        if expires_at is None:
+            return None
+        
+        if time.time() > expires_at:
+            self._stats["expirations"] += 1
+            self._forget([key])
+            return None
+        
+        try:
+            entry = await self._store.read(key)
+        except Exception as e:
+            logger.warning(f"Persistent cache read failed: {e}")
+            return None
+        
+        if entry is None:
+            self._l2_keys.pop(key, None)
+            return None
+        
+        self._insert(entry)
+        self._stats["l2_hits"] += 1
+        return entry
+    
+    def warm_from_store(self, preload_size: int) -> int:
+        """
+        Load the persistent tier's key index and preload the hottest entries.
+        
+        Blocking; call once at startup (off the event loop).
+        
+        Returns:
+            Number of entries preloaded into L1.
+        """
+        if self._store is None:
+            return 0
+        
+        self._l2_keys = OrderedDict(self._store.load_index(self._store_max_entries))
+        
+        entries = self._store.load_hottest(min(preload_size, self.max_size))
+        
+        # Insert coldest first so the hottest end up most recently used
+        for entry in reversed(entries):
+            self._insert(entry)
+        
+        self._stats["preloaded"] = len(entries)
+        logger.info(f"Response cache warmed: {len(entries)} of {len(self._l2_keys)} persisted entries preloaded")
+        
+        return len(entries)
+    
+    def close(self):
+        """Flush and close the persistent tier."""
+        if self._store is not None:
+            self._store.close()
+            self._store = None
     
     def _generate_key(self, query: str, context_hash: Optional[str] = None) -> str:
         """Generate a cache key from query and optional context."""
@@ -75,6 +500,10 @@ class ResponseCache:
         
         return hashlib.sha256(key_input.encode()).hexdigest()[:16]
     
+    def make_key(self, query: str, context_hash: Optional[str] = None) -> str:
+        """Get the normalized cache key for a query (also used for request coalescing)."""
+        return self._generate_key(query, context_hash)
+    
     def _normalize_query(self, query: str) -> str:
         """
         Normalize query for better cache hit rates.
@@ -107,40 +536,124 @@ class ResponseCache:
         
         return normalized
     
-    def get(self, query: str, context_hash: Optional[str] = None) -> Optional[str]:
+    def _with_frames(self, entry: CacheEntry) -> CacheEntry:
+        """Make sure an entry has replay frames (older persisted entries may not)."""
+        if entry.frames is None:
+            entry.frames = build_frames(split_words(entry.response), self.frame_chars)
+        return entry
+    
+    async def get(self, query: str, context_hash: Optional[str] = None) -> Optional[str]:
         """
         Get cached response for a query.
         
         Args:
             query: The user's question
             context_hash: Optional hash of context for more specific caching
-            
+        
         Returns:
             Cached response if found and not expired, None otherwise
         """
+        entry = await self.get_entry(query, context_hash)
+        return entry.response if entry else None
+    
+    async def get_entry(self, query: str, context_hash: Optional[str] = None) -> Optional[CacheEntry]:
+        """
+        Get the cache entry for a query (response plus replay frames).
+        
+        L1 misses for keys in the persistent tier are read off the event loop.
+        
+        Args:
+            query: The user's question
+            context_hash: Optional hash of context for more specific caching
+        
+        Returns:
+            Cache entry if found and not expired, None otherwise
+        """
         key = self._generate_key(query, context_hash)
         
-        if key not in self._cache:
+        entry = self._cache.get(key)
+        if entry is None:
+            entry = await self._get_from_store(key)
+        
+        if entry is None:
             self._stats["misses"] += 1
             return None
         
-        entry = self._cache[key]
-        
         # Check expiration
         if time.time() > entry.expires_at:
             self._stats["expirations"] += 1
-            del self._cache[key]
+            self._stats["misses"] += 1
+            self._remove(key)
+            self._forget([key])
             return None
         
         # Update access stats and move to end (LRU)
         entry.hit_count += 1
         entry.last_accessed = time.time()
         self._cache.move_to_end(key)
+        self._touch(entry)
         
         self._stats["hits"] += 1
         logger.debug(f"Cache hit for query: {query[:50]}...")
         
-        return entry.response
+        return self._with_frames(entry)
+    
+    def get_similar(self, embedding: Any, context_hash: Optional[str] = None) -> Optional[str]:
+        """
+        Get the cached response for the most similar previous query.
+        
+        Used after an exact miss: if the nearest cached query embedding is at
+        least `similarity_threshold` similar, its response is returned.
+        
+        Args:
+            embedding: Embedding of the user's question
+            context_hash: Optional hash of context (must match the cached entry)
+        
+        Returns:
+            Cached response if a close enough neighbour exists, None otherwise
+        """
+        entry = self.get_similar_entry(embedding, context_hash)
+        return entry.response if entry else None
+    
+    def get_similar_entry(self, embedding: Any, context_hash: Optional[str] = None) -> Optional[CacheEntry]:
+        """Like get_similar(), but returns the cache entry (response plus replay frames)."""
+        vector = SemanticIndex.normalize(embedding)
+        if vector is None:
+            return None
+        
+        self._stats["semantic_lookups"] += 1
+        
+        match = self._semantic_index.nearest(vector)
+        if match is None:
+            return None
+        
+        key, similarity = match
+        entry = self._cache.get(key)
+        
+        if entry is None or entry.context_hash != context_hash:
+            return None
+        
+        if similarity < self.similarity_threshold:
+            if similarity >= self.similarity_threshold - NEAR_MISS_MARGIN:
+                self._stats["semantic_near_misses"] += 1
+            return None
+        
+        if time.time() > entry.expires_at:
+            self._stats["expirations"] += 1
+            self._remove(key)
+            self._forget([key])
+            return None
+        
+        entry.hit_count += 1
+        entry.last_accessed = time.time()
+        self._cache.move_to_end(key)
+        self._touch(entry)
+        
+        self._stats["semantic_hits"] += 1
+        self._semantic_hit_similarity += similarity
+        logger.debug(f"Semantic cache hit (similarity {similarity:.3f})")
+        
+        return self._with_frames(entry)
     
     def set(
         self,
@@ -149,6 +662,8 @@ class ResponseCache:
         context_hash: Optional[str] = None,
         ttl: Optional[int] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        embedding: Optional[Any] = None,
+        tokens: Optional[List[str]] = None,
     ) -> str:
         """
         Cache a response for a query.
@@ -159,19 +674,15 @@ class ResponseCache:
             context_hash: Optional hash of context
             ttl: Time-to-live in seconds (defaults to DEFAULT_TTL)
             metadata: Optional metadata to store with entry
-            
+            embedding: Optional query embedding for semantic lookups
+            tokens: Optional streamed tokens; replay frames follow their boundaries
+        
         Returns:
             The cache key
         """
         key = self._generate_key(query, context_hash)
         ttl = ttl or self.default_ttl
         
-        # Evict if at capacity
-        while len(self._cache) >= self.max_size:
-            oldest_key = next(iter(self._cache))
-            del self._cache[oldest_key]
-            self._stats["evictions"] += 1
-        
         # Create entry
         now = time.time()
         entry = CacheEntry(
@@ -180,9 +691,13 @@ class ResponseCache:
             created_at=now,
             expires_at=now + ttl,
             metadata=metadata or {},
+            embedding=SemanticIndex.normalize(embedding) if embedding is not None else None,
+            context_hash=context_hash,
+            frames=build_frames(tokens or split_words(response), self.frame_chars),
         )
         
-        self._cache[key] = entry
+        self._insert(entry)
+        self._persist(entry)
         logger.debug(f"Cached response for query: {query[:50]}...")
         
         return key
@@ -191,16 +706,24 @@ class ResponseCache:
         """Remove a specific entry from cache."""
         key = self._generate_key(query, context_hash)
         
+        found = key in self._cache or key in self._l2_keys
+        
         if key in self._cache:
-            del self._cache[key]
-            return True
+            self._remove(key)
+        self._forget([key])
         
-        return False
+        return found
     
     def clear(self) -> int:
         """Clear all cache entries. Returns number of entries cleared."""
         count = len(self._cache)
         self._cache.clear()
+        self._semantic_index.clear()
+        
+        if self._store is not None:
+            self._store.delete_all()
+            self._l2_keys.clear()
+        
         return count
     
     def cleanup_expired(self) -> int:
@@ -212,24 +735,56 @@ class ResponseCache:
         ]
         
         for key in expired_keys:
-            del self._cache[key]
+            self._remove(key)
             self._stats["expirations"] += 1
         
+        self._forget(expired_keys + [
+            key for key, expires_at in self._l2_keys.items()
+            if now > expires_at
+        ])
+        
         return len(expired_keys)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
-        total_requests = self._stats["hits"] + self._stats["misses"]
-        hit_rate = self._stats["hits"] / total_requests if total_requests > 0 else 0
+        # Semantic lookups run after an exact miss, so a semantic hit turns
+        # one of those misses into a hit.
+        semantic_lookups = self._stats["semantic_lookups"]
+        semantic_hits = self._stats["semantic_hits"]
+        total_hits = self._stats["hits"] + semantic_hits
+        total_misses = max(0, self._stats["misses"] - semantic_hits)
+        total_requests = total_hits + total_misses
+        hit_rate = total_hits / total_requests if total_requests > 0 else 0
         
         return {
             "size": len(self._cache),
             "max_size": self.max_size,
-            "hits": self._stats["hits"],
-            "misses": self._stats["misses"],
+            "hits": total_hits,
+            "exact_hits": self._stats["hits"],
+            "hits_by_tier": {
+                "memory": self._stats["hits"] - self._stats["l2_hits"],
+                "persistent": self._stats["l2_hits"],
+                "semantic": semantic_hits,
+            },
+            "misses": total_misses,
             "hit_rate": f"{hit_rate:.1%}",
             "evictions": self._stats["evictions"],
             "expirations": self._stats["expirations"],
+            "semantic": {
+                "threshold": self.similarity_threshold,
+                "indexed": len(self._semantic_index),
+                "lookups": semantic_lookups,
+                "hits": semantic_hits,
+                "near_misses": self._stats["semantic_near_misses"],
+                "hit_rate": f"{(semantic_hits / semantic_lookups if semantic_lookups > 0 else 0):.1%}",
+                "avg_hit_similarity": round(self._semantic_hit_similarity / semantic_hits, 4) if semantic_hits > 0 else None,
+            },
+            "persistent": {
+                "enabled": self._store is not None,
+                "size": len(self._l2_keys),
+                "max_size": self._store_max_entries,
+                "preloaded": self._stats["preloaded"],
+            },
         }
     
     def get_entries(self, limit: int = 10) -> List[Dict[str, Any]]:
@@ -241,6 +796,7 @@ class ResponseCache:
                 "key": key,
                 "response_preview": entry.response[:100] + "..." if len(entry.response) > 100 else entry.response,
                 "hit_count": entry.hit_count,
+                "semantic": entry.embedding is not None,
                 "created_at": entry.created_at,
                 "expires_in": max(0, entry.expires_at - time.time()),
             })
@@ -261,7 +817,22 @@ def get_response_cache() -> ResponseCache:
     global _response_cache
     
     if _response_cache is None:
-        _response_cache = ResponseCache()
+        store = None
+        if settings.cache_persist_enabled:
+            path = Path(settings.cache_persist_path)
+            if not path.is_absolute():
+                path = Path(__file__).parent.parent / path
+            try:
+                store = PersistentCacheStore(path)
+            except Exception as e:
+                logger.warning(f"Persistent cache unavailable, using memory only: {e}")
+        
+        _response_cache = ResponseCache(
+            similarity_threshold=settings.semantic_cache_threshold,
+            store=store,
+            store_max_entries=settings.cache_persist_max_entries,
+            frame_chars=settings.cache_replay_chunk_chars,
+        )
         logger.info("Response cache initialized")
     
     return _response_cache
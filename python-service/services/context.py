@@ -84,6 +84,173 @@ def reload_portfolio_context() -> PortfolioContext:
     return get_portfolio_context()
 
 
+# =============================================================================
+# Portfolio Chunking
+# =============================================================================
+
+def create_chunks(portfolio: dict) -> list[dict]:
+    """
+    Create searchable chunks from portfolio data.
+    
+    Each chunk has:
+    - id: Unique identifier
+    - content: Text content for embedding
+    - metadata: Additional info for filtering/display
+    """
+    chunks = []
+    
+    # 1. Owner bio chunk
+    owner = portfolio["owner"]
+    chunks.append({
+        "id": "owner-bio",
+        "content": f"""About {owner['name']}: {owner['bio']}
+Title: {owner['title']}
+Location: {owner['location']}""",
+        "metadata": {
+            "type": "bio",
+            "source": "owner",
+            "name": owner["name"],
+        }
+    })
+    
+    # 2. Project chunks (one per project with full details)
+    for project in portfolio["projects"]:
+        # Main project chunk
+        highlights = "\n".join(f"- {h}" for h in project["highlights"])
+        features = "\n".join(f"- {f}" for f in project["features"])
+        tech_stack = ", ".join(project["techStack"])
+        
+        content = f"""Project: {project['name']}
+Type: {project['type']}
+Year: {project['year']}
+Role: {project['role']}
+
+Description: {project['description']}
+
+Tech Stack: {tech_stack}
+
+Key Highlights:
+{highlights}
+
+Features:
+{features}"""
+        
+        chunks.append({
+            "id": f"project-{project['slug']}",
+            "content": content,
+            "metadata": {
+                "type": "project",
+                "source": f"project:{project['slug']}",
+                "name": project["name"],
+                "slug": project["slug"],
+                "year": project["year"],
+                "tech_stack": tech_stack,
+            }
+        })
+        
+        # Tech stack specific chunk (for "what technologies" questions)
+        chunks.append({
+            "id": f"project-tech-{project['slug']}",
+            "content": f"""Technologies used in {project['name']}:
+{tech_stack}
+
+This {project['type']} project was built using these technologies for {project['description'][:200]}""",
+            "metadata": {
+                "type": "tech_stack",
+                "source": f"project:{project['slug']}",
+                "name": project["name"],
+                "slug": project["slug"],
+            }
+        })
+    
+    # 3. Skills chunks (by category)
+    skills = portfolio["skills"]
+    
+    # Combined skills overview
+    all_skills = []
+    for category, skill_list in skills.items():
+        all_skills.extend(skill_list)
+    
+    chunks.append({
+        "id": "skills-overview",
+        "content": f"""Technical Skills Overview:
+
+Frontend: {', '.join(skills['frontend'])}
+Backend: {', '.join(skills['backend'])}
+Cloud & DevOps: {', '.join(skills['cloud'])}
+Integrations: {', '.join(skills['integrations'])}
+Best Practices: {', '.join(skills['practices'])}
+
+Total skills: {len(all_skills)} technologies and practices.""",
+        "metadata": {
+            "type": "skills",
+            "source": "skills:overview",
+            "categories": list(skills.keys()),
+        }
+    })
+    
+    # Individual category chunks
+    skill_descriptions = {
+        "frontend": "Frontend development technologies including frameworks, libraries, and styling tools",
+        "backend": "Backend development technologies including servers, databases, and real-time systems",
+        "cloud": "Cloud platforms, deployment tools, and DevOps infrastructure",
+        "integrations": "Third-party API integrations and external service connections",
+        "practices": "Development practices, methodologies, and architectural approaches",
+    }
+    
+    for category, skill_list in skills.items():
+        chunks.append({
+            "id": f"skills-{category}",
+            "content": f"""{category.title()} Skills:
+{', '.join(skill_list)}
+
+{skill_descriptions.get(category, '')}""",
+            "metadata": {
+                "type": "skills",
+                "source": f"skills:{category}",
+                "category": category,
+            }
+        })
+    
+    # 4. Quick facts chunk
+    quick_facts = portfolio["quickFacts"]
+    facts_text = "\n".join(f"- {fact}" for fact in quick_facts)
+    
+    chunks.append({
+        "id": "quick-facts",
+        "content": f"""Quick Facts about {owner['name']}:
+{facts_text}""",
+        "metadata": {
+            "type": "facts",
+            "source": "quick_facts",
+        }
+    })
+    
+    # 5. Contact information chunk
+    contact = portfolio["contact"]
+    chunks.append({
+        "id": "contact-info",
+        "content": f"""Contact Information:
+Email: {contact['email']}
+GitHub: {contact['github']}
+LinkedIn: {contact['linkedin']}
+
+{contact['cta']}
+
+For hiring inquiries, collaboration opportunities, or project discussions, 
+please reach out via email or connect on LinkedIn.""",
+        "metadata": {
+            "type": "contact",
+            "source": "contact",
+            "email": contact["email"],
+            "github": contact["github"],
+            "linkedin": contact["linkedin"],
+        }
+    })
+    
+    return chunks
+
+
 # =============================================================================
 # Utility Functions
 # =============================================================================
@@ -3,14 +3,20 @@ NEXI AI Chatbot - Cost Monitoring Service
 
 Tracks token usage and calculates costs for LLM API calls.
 Helps optimize expenses and stay within budget.
+
+Prompt tokens the provider served from its prefix cache are billed at a
+discount; they are counted separately so the savings can be checked.
+
+Usage is pre-aggregated into per-minute, per-hour and per-day buckets
+(per provider/model) when it is recorded, so summaries are bucket sums
+and never rescan individual requests.
 """
 
 import logging
 import time
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
-from collections import defaultdict
+from typing import Dict, List, Optional, Any, Tuple
+from datetime import date, datetime
 
 logger = logging.getLogger("nexi.costs")
 
@@ -34,6 +40,42 @@ TOKEN_COSTS: Dict[str, Dict[str, float]] = {
     },
 }
 
+# Share of the input price charged for prompt tokens served from the
+# provider's prefix cache
+CACHED_INPUT_RATES: Dict[str, float] = {
+    "openai": 0.5,
+    "groq": 0.5,
+}
+
+# Aggregation rings: (slot seconds, slots kept)
+MINUTE_BUCKETS = (60, 60)  # Last hour at minute resolution
+HOUR_BUCKETS = (3600, 168)  # Last 7 days at hour resolution
+DAY_BUCKETS = 31  # Last month of calendar days (local time)
+
+
+def calculate_cost(
+    input_tokens: int,
+    output_tokens: int,
+    model: str,
+    provider: str,
+    cached_input_tokens: int = 0,
+) -> float:
+    """
+    Calculate the cost of a request from the per-1K token prices.
+    
+    `cached_input_tokens` (part of `input_tokens`) are billed at the
+    provider's cached-input rate.
+    """
+    provider_costs = TOKEN_COSTS.get(provider, {})
+    model_costs = provider_costs.get(model, {"input": 0, "output": 0})
+    
+    cached_input_tokens = min(cached_input_tokens, input_tokens)
+    billed_input = input_tokens - cached_input_tokens * (1 - CACHED_INPUT_RATES.get(provider, 1.0))
+    input_cost = (billed_input / 1000) * model_costs["input"]
+    output_cost = (output_tokens / 1000) * model_costs["output"]
+    
+    return input_cost + output_cost
+
 
 @dataclass
 class TokenUsage:
@@ -46,17 +88,18 @@ class TokenUsage:
     timestamp: float = field(default_factory=time.time)
     session_id: Optional[str] = None
     cached: bool = False
+    routed: bool = False  # Answered by the intent router (no LLM call)
+    cached_input_tokens: int = 0  # Input tokens served from the provider's prompt cache
+    cost: float = field(init=False)
+    prompt_cache_savings: float = field(init=False)
     
-    @property
-    def cost(self) -> float:
-        """Calculate the cost of this usage."""
-        provider_costs = TOKEN_COSTS.get(self.provider, {})
-        model_costs = provider_costs.get(self.model, {"input": 0, "output": 0})
-        
-        input_cost = (self.input_tokens / 1000) * model_costs["input"]
-        output_cost = (self.output_tokens / 1000) * model_costs["output"]
-        
-        return input_cost + output_cost
+    def __post_init__(self):
+        # Priced once, when the usage is recorded
+        self.cost = calculate_cost(
+            self.input_tokens, self.output_tokens, self.model, self.provider, self.cached_input_tokens
+        )
+        full_cost = calculate_cost(self.input_tokens, self.output_tokens, self.model, self.provider)
+        self.prompt_cache_savings = full_cost - self.cost
 
 
 @dataclass
@@ -71,6 +114,97 @@ class CostSummary:
     avg_cost_per_request: float
     cached_requests: int
     savings_from_cache: float
+    routed_requests: int
+    savings_from_routing: float
+    cached_input_tokens: int
+    savings_from_prompt_cache: float
+
+
+@dataclass
+class CostBucket:
+    """Running totals for one time bucket (or one model)."""
+    cost: float = 0.0
+    requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_requests: int = 0
+    cache_savings: float = 0.0
+    routed_requests: int = 0
+    routing_savings: float = 0.0
+    cached_input_tokens: int = 0
+    prompt_cache_savings: float = 0.0
+    
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+    
+    def add(self, usage: TokenUsage):
+        """Add one priced usage record."""
+        self.cost += usage.cost
+        self.requests += 1
+        self.input_tokens += usage.input_tokens
+        self.output_tokens += usage.output_tokens
+        self.cached_input_tokens += usage.cached_input_tokens
+        self.prompt_cache_savings += usage.prompt_cache_savings
+        if usage.cached:
+            self.cached_requests += 1
+            self.cache_savings += usage.cost
+        elif usage.routed:
+            self.routed_requests += 1
+            self.routing_savings += usage.cost
+    
+    def merge(self, other: "CostBucket"):
+        """Add another bucket's totals into this one."""
+        self.cost += other.cost
+        self.requests += other.requests
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cached_requests += other.cached_requests
+        self.cache_savings += other.cache_savings
+        self.routed_requests += other.routed_requests
+        self.routing_savings += other.routing_savings
+        self.cached_input_tokens += other.cached_input_tokens
+        self.prompt_cache_savings += other.prompt_cache_savings
+
+
+class BucketRing:
+    """
+    Fixed ring of time buckets, each split by (provider, model).
+    
+    Slots are addressed by an integer slot id (minute, hour or day number);
+    stale slots are reset lazily when the ring wraps around, so memory is
+    bounded by the ring size.
+    """
+    
+    def __init__(self, size: int):
+        self.size = size
+        self._slots: List[Dict[Tuple[str, str], CostBucket]] = [{} for _ in range(size)]
+        self._slot_ids: List[int] = [-1] * size
+    
+    def add(self, slot_id: int, usage: TokenUsage):
+        """Add a usage record to the bucket for its slot and model."""
+        position = slot_id % self.size
+        
+        if self._slot_ids[position] != slot_id:
+            self._slots[position] = {}
+            self._slot_ids[position] = slot_id
+        
+        key = (usage.provider, usage.model)
+        bucket = self._slots[position].get(key)
+        if bucket is None:
+            bucket = self._slots[position][key] = CostBucket()
+        bucket.add(usage)
+    
+    def total(self, first_id: int, last_id: int) -> CostBucket:
+        """Sum all buckets with first_id <= slot id <= last_id."""
+        result = CostBucket()
+        
+        for slot_id, buckets in zip(self._slot_ids, self._slots):
+            if first_id <= slot_id <= last_id:
+                for bucket in buckets.values():
+                    result.merge(bucket)
+        
+        return result
 
 
 # =============================================================================
@@ -84,7 +218,7 @@ class CostMonitor:
     Features:
     - Per-request token tracking
     - Cost calculation by model
-    - Daily/hourly aggregations
+    - Minute/hourly/daily aggregations (constant-time updates)
     - Cache savings tracking
     - Budget alerts
     """
@@ -97,14 +231,12 @@ class CostMonitor:
         self.daily_budget = daily_budget
         self.alert_threshold = alert_threshold
         
-        self._usage_log: List[TokenUsage] = []
-        self._hourly_costs: Dict[str, float] = defaultdict(float)
-        self._daily_costs: Dict[str, float] = defaultdict(float)
-        self._model_usage: Dict[str, Dict[str, int]] = defaultdict(lambda: {"input": 0, "output": 0, "requests": 0})
+        self._minutes = BucketRing(MINUTE_BUCKETS[1])
+        self._hours = BucketRing(HOUR_BUCKETS[1])
+        self._days = BucketRing(DAY_BUCKETS)
         
-        # Cache tracking
-        self._cache_hits = 0
-        self._estimated_cache_savings = 0.0
+        # Lifetime totals per (provider, model)
+        self._model_usage: Dict[Tuple[str, str], CostBucket] = {}
     
     def record_usage(
         self,
@@ -114,6 +246,8 @@ class CostMonitor:
         provider: str,
         session_id: Optional[str] = None,
         cached: bool = False,
+        cached_input_tokens: int = 0,
+        routed: bool = False,
     ) -> TokenUsage:
         """
         Record token usage for a request.
@@ -125,7 +259,9 @@ class CostMonitor:
             provider: Provider name (openai, groq)
             session_id: Optional session identifier
             cached: Whether this was a cache hit
-            
+            cached_input_tokens: Input tokens the provider served from its prompt cache
+            routed: Whether the intent router answered without an LLM call
+        
         Returns:
             TokenUsage record
         """
@@ -137,62 +273,44 @@ class CostMonitor:
             provider=provider,
             session_id=session_id,
             cached=cached,
+            routed=routed,
+            cached_input_tokens=cached_input_tokens,
         )
         
-        self._usage_log.append(usage)
-        
-        # Keep only last 10000 records
-        if len(self._usage_log) > 10000:
-            self._usage_log = self._usage_log[-10000:]
-        
-        # Update aggregations
-        hour_key = datetime.now().strftime("%Y-%m-%d-%H")
-        day_key = datetime.now().strftime("%Y-%m-%d")
-        
-        cost = usage.cost
-        self._hourly_costs[hour_key] += cost
-        self._daily_costs[day_key] += cost
+        # Update aggregations (cached and routed requests also count as savings)
+        day_id = self._day_id(usage.timestamp)
+        self._minutes.add(int(usage.timestamp // MINUTE_BUCKETS[0]), usage)
+        self._hours.add(int(usage.timestamp // HOUR_BUCKETS[0]), usage)
+        self._days.add(day_id, usage)
         
         # Update model usage
-        self._model_usage[model]["input"] += input_tokens
-        self._model_usage[model]["output"] += output_tokens
-        self._model_usage[model]["requests"] += 1
-        
-        # Track cache
-        if cached:
-            self._cache_hits += 1
-            # Estimate what this would have cost without cache
-            self._estimated_cache_savings += self._estimate_cost(input_tokens, output_tokens, model, provider)
+        key = (provider, model)
+        if key not in self._model_usage:
+            self._model_usage[key] = CostBucket()
+        self._model_usage[key].add(usage)
         
         # Check budget
-        self._check_budget_alert(day_key)
+        self._check_budget_alert(day_id)
         
         logger.debug(
-            f"Token usage: {input_tokens}in/{output_tokens}out "
-            f"({model}) = ${cost:.6f}"
+            f"Token usage: {input_tokens}in ({cached_input_tokens} cached)/{output_tokens}out "
+            f"({model}) = ${usage.cost:.6f}"
         )
         
         return usage
     
-    def _estimate_cost(
-        self,
-        input_tokens: int,
-        output_tokens: int,
-        model: str,
-        provider: str,
-    ) -> float:
-        """Estimate cost for given token counts."""
-        provider_costs = TOKEN_COSTS.get(provider, {})
-        model_costs = provider_costs.get(model, {"input": 0, "output": 0})
-        
-        input_cost = (input_tokens / 1000) * model_costs["input"]
-        output_cost = (output_tokens / 1000) * model_costs["output"]
-        
-        return input_cost + output_cost
+    @staticmethod
+    def _day_id(timestamp: float) -> int:
+        """Local calendar day number of a timestamp."""
+        return datetime.fromtimestamp(timestamp).toordinal()
+    
+    def _day_cost(self, day_id: int) -> float:
+        """Total cost of one calendar day."""
+        return self._days.total(day_id, day_id).cost
     
-    def _check_budget_alert(self, day_key: str):
+    def _check_budget_alert(self, day_id: int):
         """Check if approaching budget limit."""
-        daily_cost = self._daily_costs[day_key]
+        daily_cost = self._day_cost(day_id)
         
         if daily_cost >= self.daily_budget * self.alert_threshold:
             if daily_cost >= self.daily_budget:
@@ -201,62 +319,55 @@ class CostMonitor:
                 logger.warning(f"Budget alert: ${daily_cost:.4f} / ${self.daily_budget:.2f} ({daily_cost/self.daily_budget:.0%})")
     
     def get_summary(self, hours: int = 24) -> CostSummary:
-        """Get cost summary for the last N hours."""
-        cutoff = time.time() - (hours * 3600)
+        """
+        Get cost summary for the last N hours (up to 168).
         
-        recent_usage = [u for u in self._usage_log if u.timestamp > cutoff]
+        Windows of an hour or less are summed from minute buckets, longer
+        ones from hour buckets (the current, partial bucket included).
+        """
+        now = time.time()
         
-        if not recent_usage:
-            return CostSummary(
-                total_cost=0,
-                total_requests=0,
-                total_tokens=0,
-                total_input_tokens=0,
-                total_output_tokens=0,
-                avg_tokens_per_request=0,
-                avg_cost_per_request=0,
-                cached_requests=0,
-                savings_from_cache=0,
-            )
+        if hours <= 1:
+            slot_seconds = MINUTE_BUCKETS[0]
+            ring = self._minutes
+        else:
+            slot_seconds = HOUR_BUCKETS[0]
+            ring = self._hours
         
-        total_cost = sum(u.cost for u in recent_usage)
-        total_requests = len(recent_usage)
-        total_tokens = sum(u.total_tokens for u in recent_usage)
-        total_input = sum(u.input_tokens for u in recent_usage)
-        total_output = sum(u.output_tokens for u in recent_usage)
-        cached_requests = sum(1 for u in recent_usage if u.cached)
+        current = int(now // slot_seconds)
+        slots = max(1, int(hours * 3600 // slot_seconds))
+        totals = ring.total(current - slots + 1, current)
         
         return CostSummary(
-            total_cost=total_cost,
-            total_requests=total_requests,
-            total_tokens=total_tokens,
-            total_input_tokens=total_input,
-            total_output_tokens=total_output,
-            avg_tokens_per_request=total_tokens / total_requests if total_requests > 0 else 0,
-            avg_cost_per_request=total_cost / total_requests if total_requests > 0 else 0,
-            cached_requests=cached_requests,
-            savings_from_cache=self._estimated_cache_savings,
+            total_cost=totals.cost,
+            total_requests=totals.requests,
+            total_tokens=totals.total_tokens,
+            total_input_tokens=totals.input_tokens,
+            total_output_tokens=totals.output_tokens,
+            avg_tokens_per_request=totals.total_tokens / totals.requests if totals.requests > 0 else 0,
+            avg_cost_per_request=totals.cost / totals.requests if totals.requests > 0 else 0,
+            cached_requests=totals.cached_requests,
+            savings_from_cache=totals.cache_savings,
+            routed_requests=totals.routed_requests,
+            savings_from_routing=totals.routing_savings,
+            cached_input_tokens=totals.cached_input_tokens,
+            savings_from_prompt_cache=totals.prompt_cache_savings,
         )
     
     def get_daily_breakdown(self, days: int = 7) -> Dict[str, Dict[str, Any]]:
         """Get cost breakdown by day."""
         result = {}
+        today = date.today().toordinal()
         
-        for i in range(days):
-            date = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-            day_usage = [
-                u for u in self._usage_log
-                if datetime.fromtimestamp(u.timestamp).strftime("%Y-%m-%d") == date
-            ]
+        for i in range(min(days, DAY_BUCKETS)):
+            day_id = today - i
+            totals = self._days.total(day_id, day_id)
             
-            if day_usage:
-                result[date] = {
-                    "cost": sum(u.cost for u in day_usage),
-                    "requests": len(day_usage),
-                    "tokens": sum(u.total_tokens for u in day_usage),
-                }
-            else:
-                result[date] = {"cost": 0, "requests": 0, "tokens": 0}
+            result[date.fromordinal(day_id).isoformat()] = {
+                "cost": totals.cost,
+                "requests": totals.requests,
+                "tokens": totals.total_tokens,
+            }
         
         return result
     
@@ -264,25 +375,15 @@ class CostMonitor:
         """Get usage breakdown by model."""
         result = {}
         
-        for model, usage in self._model_usage.items():
-            provider_costs = None
-            for provider, models in TOKEN_COSTS.items():
-                if model in models:
-                    provider_costs = models[model]
-                    break
-            
-            if not provider_costs:
-                provider_costs = {"input": 0, "output": 0}
-            
-            input_cost = (usage["input"] / 1000) * provider_costs["input"]
-            output_cost = (usage["output"] / 1000) * provider_costs["output"]
-            
+        for (provider, model), usage in self._model_usage.items():
             result[model] = {
-                "requests": usage["requests"],
-                "input_tokens": usage["input"],
-                "output_tokens": usage["output"],
-                "total_tokens": usage["input"] + usage["output"],
-                "cost": input_cost + output_cost,
+                "provider": provider,
+                "requests": usage.requests,
+                "input_tokens": usage.input_tokens,
+                "output_tokens": usage.output_tokens,
+                "cached_input_tokens": usage.cached_input_tokens,
+                "total_tokens": usage.total_tokens,
+                "cost": usage.cost,
             }
         
         return result
@@ -292,7 +393,7 @@ class CostMonitor:
         summary_24h = self.get_summary(24)
         summary_1h = self.get_summary(1)
         
-        today = datetime.now().strftime("%Y-%m-%d")
+        today_spent = self._day_cost(date.today().toordinal())
         
         return {
             "summary_24h": {
@@ -302,6 +403,14 @@ class CostMonitor:
                 "avg_cost_per_request": f"${summary_24h.avg_cost_per_request:.6f}",
                 "cached_requests": summary_24h.cached_requests,
                 "cache_savings": f"${summary_24h.savings_from_cache:.4f}",
+                "routed_requests": summary_24h.routed_requests,
+                "routing_savings": f"${summary_24h.savings_from_routing:.4f}",
+                "cached_input_tokens": summary_24h.cached_input_tokens,
+                "prompt_cache_hit_rate": (
+                    f"{summary_24h.cached_input_tokens / summary_24h.total_input_tokens * 100:.1f}%"
+                    if summary_24h.total_input_tokens else "0%"
+                ),
+                "prompt_cache_savings": f"${summary_24h.savings_from_prompt_cache:.4f}",
             },
             "summary_1h": {
                 "total_cost": f"${summary_1h.total_cost:.4f}",
@@ -309,9 +418,9 @@ class CostMonitor:
             },
             "budget": {
                 "daily_limit": f"${self.daily_budget:.2f}",
-                "today_spent": f"${self._daily_costs.get(today, 0):.4f}",
-                "remaining": f"${max(0, self.daily_budget - self._daily_costs.get(today, 0)):.4f}",
-                "usage_percent": f"{(self._daily_costs.get(today, 0) / self.daily_budget * 100):.1f}%",
+                "today_spent": f"${today_spent:.4f}",
+                "remaining": f"${max(0, self.daily_budget - today_spent):.4f}",
+                "usage_percent": f"{(today_spent / self.daily_budget * 100):.1f}%",
             },
             "model_breakdown": self.get_model_breakdown(),
             "daily_breakdown": self.get_daily_breakdown(7),
@@ -343,6 +452,8 @@ def record_token_usage(
     provider: str,
     session_id: Optional[str] = None,
     cached: bool = False,
+    cached_input_tokens: int = 0,
+    routed: bool = False,
 ) -> TokenUsage:
     """Convenience function to record token usage."""
     return get_cost_monitor().record_usage(
@@ -352,4 +463,6 @@ def record_token_usage(
         provider=provider,
         session_id=session_id,
         cached=cached,
+        cached_input_tokens=cached_input_tokens,
+        routed=routed,
     )
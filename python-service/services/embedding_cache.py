@@ -0,0 +1,298 @@
+"""
+NEXI AI Chatbot - Query Embedding Cache
+
+LRU cache of query embeddings, so repeated questions skip the embedding
+API call even when the response cache misses (TTL expiry, A/B variant
+change, different context).
+
+Vectors live in one preallocated float32 matrix (rows recycled on
+eviction); with persistence on, the matrix is a memory-mapped file, so
+the cache survives restarts.
+
+Every row carries the key it holds in a parallel memory-mapped array,
+written around each vector write (cleared first, set last). Lookups
+check it, so a stale key -> row index (saved only periodically) can
+never return the vector of a key that later reused the row. The files
+are locked to one process: other workers fall back to memory only.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config.settings import settings
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger("nexi.embedding_cache")
+
+# =============================================================================
+# Cache Configuration
+# =============================================================================
+
+INDEX_SAVE_EVERY = 64  # Save the key index (LRU order) after this many inserts (persistent mode)
+KEY_BYTES = 16  # blake2b digest size of a cache key
+
+
+def normalize_text(text: str) -> str:
+    """Case- and whitespace-insensitive form of a query."""
+    return " ".join(text.casefold().split())
+
+
+# =============================================================================
+# Embedding Cache
+# =============================================================================
+
+class EmbeddingCache:
+    """
+    Array-backed LRU of embeddings keyed by model, dimensions and text.
+    
+    Usage:
+        cache = get_embedding_cache()
+        embedding = cache.get(text)
+        if embedding is None:
+            embedding = await embed(text)
+            cache.put(text, embedding)
+    """
+    
+    def __init__(self, capacity: int, model: str, dimensions: int, path: Optional[Path] = None):
+        self.capacity = capacity
+        self.model = model
+        self.dimensions = dimensions
+        self.path = path
+        
+        self._slots: "OrderedDict[str, int]" = OrderedDict()  # key -> row, least recent first
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+        self._unsaved = 0
+        self._lock_file = None
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.loaded = 0
+        self.stale = 0  # Index entries whose row was reused by another key
+        
+        if path:
+            self._lock()
+            try:
+                self._matrix, self._row_keys = self._open_files()
+            except Exception:
+                self._unlock()
+                raise
+        else:
+            self._matrix = np.zeros((capacity, dimensions), dtype=np.float32)
+            self._row_keys = np.zeros((capacity, KEY_BYTES), dtype=np.uint8)
+    
+    def __len__(self) -> int:
+        return len(self._slots)
+    
+    def _files(self) -> tuple[Path, Path, Path]:
+        """Vector file, row key file and key index file."""
+        return self.path.with_suffix(".f32"), self.path.with_suffix(".keys"), self.path.with_suffix(".json")
+    
+    def _lock(self):
+        """Take an exclusive lock on the cache files (raises OSError if another process holds it)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock_file = open(self.path.with_suffix(".lock"), "a+b")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self._unlock()
+                raise OSError(f"{self.path} is in use by another process")
+    
+    def _unlock(self):
+        """Release the file lock."""
+        if self._lock_file is not None:
+            self._lock_file.close()  # Closing the file releases the lock
+            self._lock_file = None
+    
+    def _open_files(self) -> tuple[np.ndarray, np.ndarray]:
+        """Map the vector and row key files, restoring entries if they match this configuration."""
+        vectors_file, keys_file, index_file = self._files()
+        vector_shape = (self.capacity, self.dimensions)
+        key_shape = (self.capacity, KEY_BYTES)
+        
+        index = None
+        if vectors_file.exists() and keys_file.exists() and index_file.exists():
+            try:
+                index = json.loads(index_file.read_text())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Embedding cache index unreadable, starting empty: {e}")
+        
+        expected = {"model": self.model, "dimensions": self.dimensions, "capacity": self.capacity}
+        if not index or any(index.get(k) != v for k, v in expected.items()):
+            matrix = np.memmap(vectors_file, dtype=np.float32, mode="w+", shape=vector_shape)
+            row_keys = np.memmap(keys_file, dtype=np.uint8, mode="w+", shape=key_shape)
+            return matrix, row_keys
+        
+        matrix = np.memmap(vectors_file, dtype=np.float32, mode="r+", shape=vector_shape)
+        row_keys = np.memmap(keys_file, dtype=np.uint8, mode="r+", shape=key_shape)
+        
+        # The rows are the source of truth: the index only restores LRU order,
+        # and rows written after it was last saved are kept as least recent
+        owners = {row_keys[slot].tobytes().hex(): slot for slot in range(self.capacity) if row_keys[slot].any()}
+        for key, _ in index["keys"]:
+            if key in owners:
+                self._slots[key] = owners.pop(key)
+            else:
+                self.stale += 1
+        for key, slot in owners.items():
+            self._slots[key] = slot
+            self._slots.move_to_end(key, last=False)
+        
+        used = set(self._slots.values())
+        self._free = [slot for slot in range(self.capacity - 1, -1, -1) if slot not in used]
+        self.loaded = len(self._slots)
+        logger.info(f"Embedding cache loaded {self.loaded} vectors from {vectors_file}")
+        return matrix, row_keys
+    
+    def make_key(self, text: str) -> str:
+        """Cache key for a text under the current model and dimensions."""
+        raw = f"{self.model}|{self.dimensions}|{normalize_text(text)}"
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def get(self, text: str) -> Optional[List[float]]:
+        """Get a cached embedding (marks it most recently used)."""
+        key = self.make_key(text)
+        slot = self._slots.get(key)
+        
+        if slot is None:
+            self.misses += 1
+            return None
+        
+        if self._row_keys[slot].tobytes() != bytes.fromhex(key):
+            # The row was reused by another key: never return its vector
+            del self._slots[key]
+            self.stale += 1
+            self.misses += 1
+            return None
+        
+        self._slots.move_to_end(key)
+        self.hits += 1
+        return self._matrix[slot].tolist()
+    
+    def put(self, text: str, embedding: Any):
+        """Store an embedding, evicting the least recently used if full."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        if vector.shape != (self.dimensions,):
+            logger.debug(f"Not caching embedding of shape {vector.shape} (expected {self.dimensions})")
+            return
+        
+        key = self.make_key(text)
+        slot = self._slots.get(key)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                _, slot = self._slots.popitem(last=False)
+                self.evictions += 1
+        
+        # Clear the row's key before the vector changes, set it once written
+        self._row_keys[slot] = 0
+        self._matrix[slot] = vector
+        self._row_keys[slot] = np.frombuffer(bytes.fromhex(key), dtype=np.uint8)
+        self._slots[key] = slot
+        self._slots.move_to_end(key)
+        
+        self._unsaved += 1
+        if self.path and self._unsaved >= INDEX_SAVE_EVERY:
+            self.save()
+    
+    def save(self):
+        """Flush the vectors and write the key index (persistent mode only)."""
+        if not self.path:
+            return
+        
+        _, _, index_file = self._files()
+        self._matrix.flush()
+        self._row_keys.flush()
+        
+        index = {
+            "model": self.model,
+            "dimensions": self.dimensions,
+            "capacity": self.capacity,
+            "keys": list(self._slots.items()),
+        }
+        temp_file = index_file.with_suffix(".json.tmp")
+        temp_file.write_text(json.dumps(index))
+        os.replace(temp_file, index_file)
+        self._unsaved = 0
+    
+    def clear(self):
+        """Drop every entry (keeps the allocated matrix)."""
+        self._slots.clear()
+        self._free = list(range(self.capacity - 1, -1, -1))
+        self._row_keys[:] = 0
+        self.save()
+    
+    def close(self):
+        """Persist the index on shutdown and release the file lock."""
+        try:
+            self.save()
+        except OSError as e:
+            logger.warning(f"Could not save embedding cache index: {e}")
+        self._unlock()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        
+        return {
+            "enabled": settings.embedding_cache_enabled,
+            "size": len(self._slots),
+            "max_size": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": f"{self.hits / lookups * 100:.1f}%" if lookups else "0%",
+            "evictions": self.evictions,
+            "stale": self.stale,
+            "memory_kb": round(self._matrix.nbytes / 1024, 1),
+            "persistent": bool(self.path),
+            "loaded": self.loaded,
+        }
+
+
+# =============================================================================
+# Global Cache Instance
+# =============================================================================
+
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get or create the global embedding cache."""
+    global _embedding_cache
+    
+    if _embedding_cache is None:
+        path = None
+        if settings.embedding_cache_persist:
+            path = Path(settings.embedding_cache_path)
+            if not path.is_absolute():
+                path = Path(__file__).parent.parent / path
+        
+        cache_args = (settings.embedding_cache_size, settings.embedding_model, settings.embedding_dimensions)
+        try:
+            _embedding_cache = EmbeddingCache(*cache_args, path=path)
+        except OSError as e:
+            logger.warning(f"Persistent embedding cache unavailable, using memory only: {e}")
+            _embedding_cache = EmbeddingCache(*cache_args)
+        logger.info("Embedding cache initialized")
+    
+    return _embedding_cache
+
+
+def get_embedding_cache_stats() -> Dict[str, Any]:
+    """Stats of the global cache, without creating it (and its files) if unused."""
+    if _embedding_cache is None:
+        return {"enabled": settings.embedding_cache_enabled, "initialized": False}
+    return _embedding_cache.get_stats()
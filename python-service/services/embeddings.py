@@ -1,38 +1,62 @@
 """
 NEXI AI Chatbot - Embeddings Service
 
-Vector embeddings for semantic search using OpenAI and Pinecone.
+Vector embeddings for semantic search using OpenAI, with either Pinecone
+or an in-process NumPy index as the vector store.
 """
 
+import asyncio
+import json
 import logging
-from typing import List, Optional, Dict, Any
-from functools import lru_cache
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import List, Optional, Dict, Any, Callable, TypeVar
 
-from openai import OpenAI
+import numpy as np
+from openai import AsyncOpenAI
 from pinecone import Pinecone, ServerlessSpec
 
 from config.settings import settings
+from services.embedding_cache import get_embedding_cache
+from services.metrics import LatencyHistogram
 
 logger = logging.getLogger("nexi.embeddings")
 
+T = TypeVar("T")
+
 # =============================================================================
 # Client Initialization
 # =============================================================================
 
-_openai_client: Optional[OpenAI] = None
+_openai_client: Optional[AsyncOpenAI] = None
 _pinecone_client: Optional[Pinecone] = None
 _pinecone_index = None
+_pinecone_lock = threading.Lock()
+
+# The Pinecone SDK is synchronous, so its calls run in a dedicated, bounded
+# thread pool instead of on the event loop (or the shared default executor).
+_pinecone_executor: Optional[ThreadPoolExecutor] = None
+_pinecone_semaphore: Optional[asyncio.Semaphore] = None
 
 
-def get_openai_client() -> OpenAI:
-    """Get or create OpenAI client for embeddings."""
+def get_openai_client() -> AsyncOpenAI:
+    """Get or create async OpenAI client for embeddings."""
     global _openai_client
     
     if _openai_client is None:
         if not settings.openai_api_key:
             raise ValueError("OpenAI API key required for embeddings")
         
-        _openai_client = OpenAI(api_key=settings.openai_api_key)
+        _openai_client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            timeout=settings.embedding_timeout,
+        )
         logger.info("OpenAI client initialized for embeddings")
     
     return _openai_client
@@ -56,7 +80,13 @@ def get_pinecone_index():
     """Get or create Pinecone index."""
     global _pinecone_index
     
-    if _pinecone_index is None:
+    if _pinecone_index is not None:
+        return _pinecone_index
+    
+    with _pinecone_lock:
+        if _pinecone_index is not None:
+            return _pinecone_index
+        
         pc = get_pinecone_client()
         
         # Check if index exists
@@ -81,6 +111,192 @@ def get_pinecone_index():
     return _pinecone_index
 
 
+async def run_pinecone(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking Pinecone call off the event loop.
+    
+    Calls go through a dedicated thread pool and are capped by a semaphore
+    (PINECONE_MAX_CONCURRENCY), so slow vector queries never stall other
+    SSE streams and can't exhaust the loop's default executor.
+    
+    Args:
+        func: Synchronous callable to run.
+        *args, **kwargs: Arguments passed to the callable.
+    
+    Returns:
+        The callable's return value.
+    """
+    global _pinecone_executor, _pinecone_semaphore
+    
+    if _pinecone_executor is None:
+        _pinecone_executor = ThreadPoolExecutor(
+            max_workers=settings.pinecone_max_concurrency,
+            thread_name_prefix="pinecone",
+        )
+    
+    if _pinecone_semaphore is None:
+        _pinecone_semaphore = asyncio.Semaphore(settings.pinecone_max_concurrency)
+    
+    async with _pinecone_semaphore:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_pinecone_executor, partial(func, *args, **kwargs))
+
+
+async def close_clients() -> None:
+    """Close the embedding client and shut down the Pinecone thread pool."""
+    global _openai_client, _pinecone_executor, _pinecone_semaphore
+    
+    if _openai_client is not None:
+        await _openai_client.close()
+        _openai_client = None
+    
+    if _pinecone_executor is not None:
+        _pinecone_executor.shutdown(wait=False, cancel_futures=True)
+        _pinecone_executor = None
+        _pinecone_semaphore = None
+
+
+# =============================================================================
+# Embedding Micro-Batching
+# =============================================================================
+
+class EmbeddingBatcher:
+    """
+    Collects concurrent single-text embedding requests into one API call.
+    
+    The first request starts a short window (EMBEDDING_BATCH_WINDOW_MS);
+    everything that arrives before it closes, or until the batch holds
+    EMBEDDING_BATCH_MAX_SIZE inputs, goes out as a single batched
+    `embeddings.create`. Each caller's future is resolved from
+    `response.data[i].index`. Identical texts in a batch share one input.
+    
+    Usage:
+        embedding = await get_embedding_batcher().embed("what projects have you built")
+    """
+    
+    def __init__(self, window_ms: float, max_size: int):
+        self.window = window_ms / 1000
+        self.max_size = max_size
+        self._pending: Dict[str, List[asyncio.Future]] = {}  # text -> waiting callers
+        self._pending_since: Dict[str, float] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: set = set()  # Keeps running batch tasks referenced
+        
+        self.requests = 0
+        self.batches = 0
+        self.inputs = 0
+        self.max_batch = 0
+        self.errors = 0
+        self.wait = LatencyHistogram()  # Enqueue -> dispatch (latency added by batching)
+        self.call = LatencyHistogram()  # API call duration per batch
+    
+    async def embed(self, text: str) -> List[float]:
+        """Queue one (already cleaned) text and wait for its embedding."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        self.requests += 1
+        if text not in self._pending:
+            self._pending[text] = []
+            self._pending_since[text] = time.perf_counter()
+        self._pending[text].append(future)
+        
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        
+        return await future
+    
+    def _flush(self):
+        """Send everything pending as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        if not self._pending:
+            return
+        
+        pending, since = self._pending, self._pending_since
+        self._pending, self._pending_since = {}, {}
+        
+        now = time.perf_counter()
+        for text, futures in pending.items():
+            for _ in futures:
+                self.wait.record((now - since[text]) * 1000)
+        
+        task = asyncio.ensure_future(self._run(pending))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+    
+    async def _run(self, pending: Dict[str, List[asyncio.Future]]):
+        """Make the batched call and resolve every caller."""
+        texts = list(pending)
+        self.batches += 1
+        self.inputs += len(texts)
+        self.max_batch = max(self.max_batch, len(texts))
+        
+        started = time.perf_counter()
+        try:
+            response = await get_openai_client().embeddings.create(
+                model=settings.embedding_model,
+                input=texts,
+            )
+        except Exception as e:
+            self.errors += 1
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        finally:
+            self.call.record((time.perf_counter() - started) * 1000)
+        
+        for item in response.data:
+            for future in pending[texts[item.index]]:
+                if not future.done():  # Caller may have been cancelled
+                    future.set_result(item.embedding)
+        
+        # Anything the response left out must not hang
+        for futures in pending.values():
+            for future in futures:
+                if not future.done():
+                    future.set_exception(ValueError("Embedding missing from batch response"))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Batch sizes and the latency batching adds per request."""
+        return {
+            "enabled": settings.embedding_batch_enabled,
+            "window_ms": self.window * 1000,
+            "max_size": self.max_size,
+            "requests": self.requests,
+            "batches": self.batches,
+            "inputs": self.inputs,
+            "avg_batch_size": round(self.inputs / self.batches, 2) if self.batches else 0,
+            "max_batch_size": self.max_batch,
+            "api_calls_saved": self.requests - self.batches,
+            "errors": self.errors,
+            "wait": self.wait.summary(),
+            "call": self.call.summary(),
+        }
+
+
+_embedding_batcher: Optional[EmbeddingBatcher] = None
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """Get the global embedding micro-batcher."""
+    global _embedding_batcher
+    
+    if _embedding_batcher is None:
+        _embedding_batcher = EmbeddingBatcher(
+            window_ms=settings.embedding_batch_window_ms,
+            max_size=settings.embedding_batch_max_size,
+        )
+    
+    return _embedding_batcher
+
+
 # =============================================================================
 # Embedding Generation
 # =============================================================================
@@ -89,30 +305,44 @@ async def generate_embedding(text: str) -> List[float]:
     """
     Generate embedding vector for text using OpenAI.
     
+    Repeated texts are served from the embedding cache; concurrent
+    misses are micro-batched into one API request unless
+    EMBEDDING_BATCH_ENABLED is off.
+    
     Args:
         text: Text to embed.
-        
+    
     Returns:
         Embedding vector (list of floats).
     """
     if not settings.is_embedding_configured():
         raise ValueError("OpenAI API key required for embeddings")
     
-    client = get_openai_client()
-    
     # Clean and truncate text if needed (max ~8000 tokens for embedding model)
     clean_text = text.strip()
     if len(clean_text) > 8000:
         clean_text = clean_text[:8000]
     
-    response = client.embeddings.create(
-        model=settings.embedding_model,
-        input=clean_text,
-    )
+    cache = get_embedding_cache() if settings.embedding_cache_enabled else None
+    if cache is not None:
+        embedding = cache.get(clean_text)
+        if embedding is not None:
+            return embedding
+    
+    if settings.embedding_batch_enabled:
+        embedding = await get_embedding_batcher().embed(clean_text)
+    else:
+        response = await get_openai_client().embeddings.create(
+            model=settings.embedding_model,
+            input=clean_text,
+        )
+        embedding = response.data[0].embedding
     
-    embedding = response.data[0].embedding
     logger.debug(f"Generated embedding for text ({len(clean_text)} chars)")
     
+    if cache is not None:
+        cache.put(clean_text, embedding)
+    
     return embedding
 
 
@@ -122,7 +352,7 @@ async def generate_embeddings_batch(texts: List[str]) -> List[List[float]]:
     
     Args:
         texts: List of texts to embed.
-        
+    
     Returns:
         List of embedding vectors.
     """
@@ -137,7 +367,7 @@ async def generate_embeddings_batch(texts: List[str]) -> List[List[float]]:
     # Clean texts
     clean_texts = [t.strip()[:8000] for t in texts]
     
-    response = client.embeddings.create(
+    response = await client.embeddings.create(
         model=settings.embedding_model,
         input=clean_texts,
     )
@@ -150,6 +380,494 @@ async def generate_embeddings_batch(texts: List[str]) -> List[List[float]]:
     return embeddings
 
 
+# =============================================================================
+# Vector Store Backends
+# =============================================================================
+
+class VectorStore(ABC):
+    """
+    Interface shared by the vector store backends.
+    
+    Backends return raw matches as dicts with 'id', 'score' and 'metadata';
+    threshold filtering and result formatting happen in search_similar.
+    """
+    
+    name = "base"
+    
+    @abstractmethod
+    async def query(self, embedding: List[float], top_k: int, namespace: str) -> List[Dict[str, Any]]:
+        """Get the top_k raw matches for an embedding."""
+    
+    @abstractmethod
+    async def upsert(self, vectors: List[Dict[str, Any]], namespace: str) -> int:
+        """Insert or replace vectors; returns how many were written."""
+    
+    @abstractmethod
+    async def delete(self, ids: List[str], namespace: str) -> None:
+        """Delete vectors by id."""
+    
+    @abstractmethod
+    async def delete_namespace(self, namespace: str) -> None:
+        """Delete every vector in a namespace."""
+    
+    @abstractmethod
+    async def describe_stats(self) -> Dict[str, Any]:
+        """Get vector counts (total and per namespace)."""
+    
+    @abstractmethod
+    async def read_pointer(self, alias: str) -> Optional[Dict[str, Any]]:
+        """Get the namespace pointer stored under an alias (None if unset)."""
+    
+    @abstractmethod
+    async def write_pointer(self, alias: str, pointer: Dict[str, Any]) -> None:
+        """Atomically replace the namespace pointer stored under an alias."""
+    
+    def release(self, namespace: str) -> None:
+        """Drop any cached state for a namespace that is no longer served."""
+    
+    async def refresh(self, namespace: str) -> None:
+        """Drop cached state for a served namespace if it changed on disk."""
+
+
+class PineconeVectorStore(VectorStore):
+    """Pinecone-hosted vector index (blocking SDK calls run off the event loop)."""
+    
+    name = "pinecone"
+    
+    async def query(self, embedding: List[float], top_k: int, namespace: str) -> List[Dict[str, Any]]:
+        index = await run_pinecone(get_pinecone_index)
+        
+        results = await run_pinecone(
+            index.query,
+            vector=embedding,
+            top_k=top_k,
+            include_metadata=True,
+            namespace=namespace,
+        )
+        
+        return [
+            {"id": match.id, "score": match.score, "metadata": match.metadata or {}}
+            for match in results.matches
+        ]
+    
+    async def upsert(self, vectors: List[Dict[str, Any]], namespace: str) -> int:
+        index = await run_pinecone(get_pinecone_index)
+        
+        # Pinecone accepts batches of up to 100 vectors
+        batch_size = 100
+        total_upserted = 0
+        
+        for i in range(0, len(vectors), batch_size):
+            batch = vectors[i:i + batch_size]
+            await run_pinecone(index.upsert, vectors=batch, namespace=namespace)
+            total_upserted += len(batch)
+            logger.debug(f"Upserted batch {i // batch_size + 1}: {len(batch)} vectors")
+        
+        return total_upserted
+    
+    async def delete(self, ids: List[str], namespace: str) -> None:
+        index = await run_pinecone(get_pinecone_index)
+        
+        # Pinecone accepts up to 1000 ids per delete
+        for i in range(0, len(ids), 1000):
+            await run_pinecone(index.delete, ids=ids[i:i + 1000], namespace=namespace)
+    
+    async def delete_namespace(self, namespace: str) -> None:
+        index = await run_pinecone(get_pinecone_index)
+        await run_pinecone(index.delete, delete_all=True, namespace=namespace)
+    
+    async def describe_stats(self) -> Dict[str, Any]:
+        index = await run_pinecone(get_pinecone_index)
+        stats = await run_pinecone(index.describe_index_stats)
+        
+        return {
+            "dimension": stats.dimension,
+            "total_vector_count": stats.total_vector_count,
+            "namespaces": {
+                ns: {"vector_count": data.vector_count}
+                for ns, data in stats.namespaces.items()
+            }
+        }
+    
+    async def read_pointer(self, alias: str) -> Optional[Dict[str, Any]]:
+        index = await run_pinecone(get_pinecone_index)
+        result = await run_pinecone(index.fetch, ids=[alias], namespace=POINTER_NAMESPACE)
+        
+        vector = result.vectors.get(alias)
+        return dict(vector.metadata) if vector is not None and vector.metadata else None
+    
+    async def write_pointer(self, alias: str, pointer: Dict[str, Any]) -> None:
+        index = await run_pinecone(get_pinecone_index)
+        
+        # Pinecone only stores vectors: the pointer is the metadata of a
+        # unit vector, replaced by a single-record upsert
+        values = [0.0] * settings.embedding_dimensions
+        values[0] = 1.0
+        metadata = {key: value for key, value in pointer.items() if value is not None}
+        await run_pinecone(
+            index.upsert,
+            vectors=[{"id": alias, "values": values, "metadata": metadata}],
+            namespace=POINTER_NAMESPACE,
+        )
+
+
+@dataclass
+class LocalNamespace:
+    """One namespace of the local index: normalized matrix plus row ids and metadata."""
+    matrix: np.ndarray  # (n, dim), rows L2-normalized, memory-mapped from disk
+    ids: np.ndarray  # (n,) doc ids, aligned with matrix rows
+    metadata: List[Dict[str, Any]]
+    version: Optional[tuple] = None  # Metadata file (inode, mtime) when loaded
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector index backed by NumPy.
+    
+    Each namespace is stored as a .npy matrix of normalized embeddings
+    (float32 or float16) next to a JSON file of ids and metadata. The matrix
+    is memory-mapped on load, and cosine top-k is a single matmul followed
+    by argpartition, so queries take microseconds for portfolio-sized corpora.
+    
+    Files are read off the event loop. Namespaces rewritten on disk by
+    another process (e.g. an incremental index_portfolio.py run) are
+    reloaded on the next refresh.
+    """
+    
+    name = "local"
+    
+    def __init__(self, path: Path, dtype: str = "float32"):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self._namespaces: Dict[str, LocalNamespace] = {}
+    
+    def _files(self, namespace: str) -> tuple[Path, Path]:
+        """Get the matrix and metadata file paths for a namespace."""
+        return self.path / f"{namespace}.npy", self.path / f"{namespace}.meta.json"
+    
+    def _pointer_file(self, alias: str) -> Path:
+        """Get the pointer file path for an alias."""
+        return self.path / f"{alias}.pointer.json"
+    
+    def _version(self, namespace: str) -> Optional[tuple]:
+        """Identify the namespace's files on disk (rewrites replace the metadata file)."""
+        try:
+            stat = self._files(namespace)[1].stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+    
+    def load(self, namespace: str) -> Optional[LocalNamespace]:
+        """Load (memory-map) a namespace from disk, caching the result (blocking)."""
+        if namespace in self._namespaces:
+            return self._namespaces[namespace]
+        
+        matrix_path, meta_path = self._files(namespace)
+        if not matrix_path.exists() or not meta_path.exists():
+            return None
+        
+        # Taken before reading, so a rewrite in between is picked up on refresh
+        version = self._version(namespace)
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        
+        data = LocalNamespace(
+            matrix=np.load(matrix_path, mmap_mode="r"),
+            ids=np.array(meta["ids"], dtype=object),
+            metadata=meta["metadata"],
+            version=version,
+        )
+        self._namespaces[namespace] = data
+        
+        logger.info(f"Local vector index loaded: namespace '{namespace}' ({len(data.ids)} vectors, {data.matrix.dtype})")
+        return data
+    
+    def load_all(self) -> List[str]:
+        """Load every namespace found on disk. Returns namespace names."""
+        if not self.path.exists():
+            return []
+        
+        names = sorted(p.name[:-len(".meta.json")] for p in self.path.glob("*.meta.json"))
+        for name in names:
+            self.load(name)
+        
+        return names
+    
+    async def _load(self, namespace: str) -> Optional[LocalNamespace]:
+        """Get a namespace, reading it off the event loop if not loaded yet."""
+        data = self._namespaces.get(namespace)
+        if data is None:
+            data = await asyncio.to_thread(self.load, namespace)
+        return data
+    
+    def search(self, embedding: List[float], top_k: int, namespace: str) -> List[Dict[str, Any]]:
+        """Cosine top-k over a namespace (synchronous, CPU only)."""
+        data = self.load(namespace)
+        if data is None or len(data.ids) == 0:
+            return []
+        
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query /= norm
+        
+        scores = data.matrix @ query
+        
+        k = min(top_k, len(scores))
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        
+        return [
+            {"id": data.ids[i], "score": float(scores[i]), "metadata": data.metadata[i]}
+            for i in top
+        ]
+    
+    def _write(self, namespace: str, ids: List[str], matrix: np.ndarray, metadata: List[Dict[str, Any]]):
+        """Atomically write a namespace to disk and drop the cached view."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        matrix_path, meta_path = self._files(namespace)
+        
+        tmp_matrix = matrix_path.with_suffix(".npy.tmp")
+        with open(tmp_matrix, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=self.dtype))
+        
+        tmp_meta = meta_path.with_suffix(".tmp")
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump({
+                "ids": ids,
+                "metadata": metadata,
+                "dimension": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+                "dtype": self.dtype.name,
+                "embedding_model": settings.embedding_model,
+            }, f)
+        
+        os.replace(tmp_matrix, matrix_path)
+        os.replace(tmp_meta, meta_path)
+        self._namespaces.pop(namespace, None)
+    
+    async def query(self, embedding: List[float], top_k: int, namespace: str) -> List[Dict[str, Any]]:
+        await self._load(namespace)
+        return self.search(embedding, top_k, namespace)
+    
+    async def upsert(self, vectors: List[Dict[str, Any]], namespace: str) -> int:
+        rows: Dict[str, tuple[np.ndarray, Dict[str, Any]]] = {}
+        
+        existing = await self._load(namespace)
+        if existing is not None:
+            for i, doc_id in enumerate(existing.ids):
+                rows[doc_id] = (np.asarray(existing.matrix[i], dtype=np.float32), existing.metadata[i])
+        
+        for vector in vectors:
+            rows[vector["id"]] = (np.asarray(vector["values"], dtype=np.float32), vector.get("metadata", {}))
+        
+        ids = list(rows.keys())
+        matrix = np.vstack([rows[i][0] for i in ids]) if ids else np.zeros((0, settings.embedding_dimensions), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+        
+        await asyncio.to_thread(self._write, namespace, ids, matrix, [rows[i][1] for i in ids])
+        return len(vectors)
+    
+    async def delete(self, ids: List[str], namespace: str) -> None:
+        existing = await self._load(namespace)
+        if existing is None:
+            return
+        
+        drop = set(ids)
+        keep = [i for i, doc_id in enumerate(existing.ids) if doc_id not in drop]
+        if len(keep) == len(existing.ids):
+            return
+        
+        matrix = np.asarray(existing.matrix[keep], dtype=np.float32)
+        await asyncio.to_thread(
+            self._write, namespace, [existing.ids[i] for i in keep], matrix, [existing.metadata[i] for i in keep]
+        )
+    
+    async def delete_namespace(self, namespace: str) -> None:
+        self._namespaces.pop(namespace, None)
+        for file_path in self._files(namespace):
+            file_path.unlink(missing_ok=True)
+    
+    async def describe_stats(self) -> Dict[str, Any]:
+        names = await asyncio.to_thread(self.load_all)
+        namespaces = {name: self.load(name) for name in names}
+        dimension = next((int(ns.matrix.shape[1]) for ns in namespaces.values() if ns.matrix.ndim == 2), 0)
+        
+        return {
+            "dimension": dimension,
+            "total_vector_count": sum(len(ns.ids) for ns in namespaces.values()),
+            "namespaces": {
+                name: {"vector_count": len(ns.ids)}
+                for name, ns in namespaces.items()
+            },
+        }
+    
+    async def read_pointer(self, alias: str) -> Optional[Dict[str, Any]]:
+        def _read():
+            try:
+                with open(self._pointer_file(alias), "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                return None
+        
+        return await asyncio.to_thread(_read)
+    
+    async def write_pointer(self, alias: str, pointer: Dict[str, Any]) -> None:
+        def _write():
+            self.path.mkdir(parents=True, exist_ok=True)
+            pointer_path = self._pointer_file(alias)
+            
+            tmp_pointer = pointer_path.with_suffix(".tmp")
+            with open(tmp_pointer, "w", encoding="utf-8") as f:
+                json.dump(pointer, f)
+            os.replace(tmp_pointer, pointer_path)
+        
+        await asyncio.to_thread(_write)
+    
+    def release(self, namespace: str) -> None:
+        self._namespaces.pop(namespace, None)
+    
+    async def refresh(self, namespace: str) -> None:
+        data = self._namespaces.get(namespace)
+        if data is None:
+            return
+        
+        version = await asyncio.to_thread(self._version, namespace)
+        if version != data.version and self._namespaces.get(namespace) is data:
+            # Rewritten in place (os.replace): the memory map still shows the old files
+            self._namespaces.pop(namespace, None)
+            logger.info(f"Local vector index changed on disk: reloading namespace '{namespace}'")
+
+
+_vector_store: Optional[VectorStore] = None
+
+
+def vector_store_error() -> str:
+    """Why the configured vector store backend can't be used."""
+    if settings.vector_store == "pinecone":
+        return "Vector store 'pinecone' not configured: PINECONE_API_KEY required"
+    return f"Vector store '{settings.vector_store}' not configured"
+
+
+def get_vector_store() -> VectorStore:
+    """Get or create the vector store selected by VECTOR_STORE (local or pinecone)."""
+    global _vector_store
+    
+    if _vector_store is None:
+        if settings.vector_store == "local":
+            path = Path(settings.local_index_path)
+            if not path.is_absolute():
+                path = Path(__file__).parent.parent / path
+            _vector_store = LocalVectorStore(path, dtype=settings.local_index_dtype)
+        else:
+            _vector_store = PineconeVectorStore()
+        logger.info(f"Vector store initialized: {_vector_store.name}")
+    
+    return _vector_store
+
+
+def _format_matches(matches: List[Dict[str, Any]], threshold: float) -> List[Dict[str, Any]]:
+    """Filter raw backend matches by threshold and format them for prompts."""
+    results = []
+    for match in matches:
+        if match["score"] >= threshold:
+            metadata = match["metadata"]
+            results.append({
+                "id": match["id"],
+                "score": match["score"],
+                "content": metadata.get("content", ""),
+                "source": metadata.get("source", ""),
+                "type": metadata.get("type", ""),
+                "metadata": metadata,
+            })
+    return results
+
+
+# =============================================================================
+# Served Namespace
+# =============================================================================
+
+INDEX_ALIAS = "portfolio"  # Name the service searches; resolves to a generation like portfolio-v3
+POINTER_NAMESPACE = "index-pointers"  # Pinecone namespace holding the alias pointers
+
+_active_namespace: Optional[str] = None
+_pointer_checked_at = 0.0
+
+
+async def get_active_namespace() -> str:
+    """
+    Get the namespace currently served for the portfolio.
+    
+    Re-indexing builds a complete new generation next to the live one and
+    then flips the alias pointer, so searches never see a half-built index.
+    The pointer is re-read at most every `index_pointer_refresh` seconds,
+    which lets a running service follow a swap (or an in-place rewrite of
+    the served namespace) without a restart. Without
+    a pointer the plain "portfolio" namespace is served.
+    """
+    global _active_namespace, _pointer_checked_at
+    
+    now = time.monotonic()
+    if _active_namespace is not None and now - _pointer_checked_at < settings.index_pointer_refresh:
+        return _active_namespace
+    _pointer_checked_at = now
+    
+    store = get_vector_store()
+    try:
+        pointer = await store.read_pointer(INDEX_ALIAS)
+    except Exception as e:
+        logger.warning(f"Could not read index pointer, serving '{_active_namespace or INDEX_ALIAS}': {e}")
+        return _active_namespace or INDEX_ALIAS
+    
+    namespace = (pointer or {}).get("namespace") or INDEX_ALIAS
+    if namespace != _active_namespace:
+        if _active_namespace is not None:
+            store.release(_active_namespace)
+            logger.info(f"Index pointer moved: serving namespace '{namespace}' (was '{_active_namespace}')")
+        _active_namespace = namespace
+    else:
+        # Same namespace, but it may have been rewritten in place
+        try:
+            await store.refresh(namespace)
+        except Exception as e:
+            logger.warning(f"Could not check namespace '{namespace}' for changes: {e}")
+    
+    return namespace
+
+
+async def set_active_namespace(namespace: str, generation: int) -> Optional[str]:
+    """
+    Point the portfolio alias at a fully built namespace.
+    
+    Args:
+        namespace: Namespace to serve from now on.
+        generation: Its generation number.
+    
+    Returns:
+        The namespace served before the swap (None if there was no pointer).
+    """
+    global _active_namespace, _pointer_checked_at
+    
+    store = get_vector_store()
+    previous = (await store.read_pointer(INDEX_ALIAS) or {}).get("namespace")
+    
+    await store.write_pointer(INDEX_ALIAS, {
+        "namespace": namespace,
+        "generation": generation,
+        "previous": previous,
+        "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+    _active_namespace = namespace
+    _pointer_checked_at = time.monotonic()
+    
+    logger.info(f"Index pointer '{INDEX_ALIAS}' -> '{namespace}' (was '{previous or INDEX_ALIAS}')")
+    return previous
+
+
 # =============================================================================
 # Vector Storage
 # =============================================================================
@@ -159,50 +877,60 @@ async def upsert_vectors(
     namespace: str = "portfolio",
 ) -> int:
     """
-    Upsert vectors to Pinecone index.
+    Upsert vectors to the configured vector store.
     
     Args:
         vectors: List of dicts with 'id', 'values', and 'metadata'.
-        namespace: Pinecone namespace.
-        
+        namespace: Index namespace.
+    
     Returns:
         Number of vectors upserted.
     """
-    if not settings.is_pinecone_configured():
-        raise ValueError("Pinecone API key required")
-    
-    index = get_pinecone_index()
+    if not settings.is_vector_store_configured():
+        raise ValueError(vector_store_error())
     
-    # Pinecone accepts batches of up to 100 vectors
-    batch_size = 100
-    total_upserted = 0
-    
-    for i in range(0, len(vectors), batch_size):
-        batch = vectors[i:i + batch_size]
-        index.upsert(vectors=batch, namespace=namespace)
-        total_upserted += len(batch)
-        logger.debug(f"Upserted batch {i // batch_size + 1}: {len(batch)} vectors")
+    total_upserted = await get_vector_store().upsert(vectors, namespace)
     
     logger.info(f"Upserted {total_upserted} vectors to namespace '{namespace}'")
     
     return total_upserted
 
 
+async def delete_vectors(ids: List[str], namespace: str = "portfolio") -> int:
+    """
+    Delete vectors by id.
+    
+    Args:
+        ids: Vector ids to delete.
+        namespace: Index namespace.
+    
+    Returns:
+        Number of ids requested for deletion.
+    """
+    if not settings.is_vector_store_configured():
+        raise ValueError(vector_store_error())
+    
+    if ids:
+        await get_vector_store().delete(ids, namespace)
+        logger.info(f"Deleted {len(ids)} vectors from namespace '{namespace}'")
+    
+    return len(ids)
+
+
 async def delete_namespace(namespace: str = "portfolio") -> bool:
     """
     Delete all vectors in a namespace.
     
     Args:
-        namespace: Pinecone namespace to delete.
-        
+        namespace: Index namespace to delete.
+    
     Returns:
         True if successful.
     """
-    if not settings.is_pinecone_configured():
-        raise ValueError("Pinecone API key required")
+    if not settings.is_vector_store_configured():
+        raise ValueError(vector_store_error())
     
-    index = get_pinecone_index()
-    index.delete(delete_all=True, namespace=namespace)
+    await get_vector_store().delete_namespace(namespace)
     
     logger.info(f"Deleted all vectors in namespace '{namespace}'")
     return True
@@ -216,7 +944,7 @@ async def search_similar(
     query: str,
     top_k: Optional[int] = None,
     threshold: Optional[float] = None,
-    namespace: str = "portfolio",
+    namespace: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
     """
     Search for similar documents using vector similarity.
@@ -225,8 +953,8 @@ async def search_similar(
         query: Search query text.
         top_k: Number of results to return.
         threshold: Minimum similarity score (0-1).
-        namespace: Pinecone namespace to search.
-        
+        namespace: Index namespace to search (default: the served generation).
+    
     Returns:
         List of matching documents with scores and metadata.
     """
@@ -240,28 +968,10 @@ async def search_similar(
     # Generate query embedding
     query_embedding = await generate_embedding(query)
     
-    # Search Pinecone
-    index = get_pinecone_index()
-    
-    results = index.query(
-        vector=query_embedding,
-        top_k=top_k,
-        include_metadata=True,
-        namespace=namespace,
-    )
-    
-    # Filter by threshold and format results
-    matches = []
-    for match in results.matches:
-        if match.score >= threshold:
-            matches.append({
-                "id": match.id,
-                "score": match.score,
-                "content": match.metadata.get("content", ""),
-                "source": match.metadata.get("source", ""),
-                "type": match.metadata.get("type", ""),
-                "metadata": match.metadata,
-            })
+    # Search the vector store
+    namespace = namespace or await get_active_namespace()
+    results = await get_vector_store().query(query_embedding, top_k, namespace)
+    matches = _format_matches(results, threshold)
     
     logger.info(f"Semantic search: '{query[:50]}...' -> {len(matches)} results (threshold: {threshold})")
     
@@ -272,7 +982,7 @@ async def search_by_embedding(
     embedding: List[float],
     top_k: Optional[int] = None,
     threshold: Optional[float] = None,
-    namespace: str = "portfolio",
+    namespace: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
     """
     Search using a pre-computed embedding.
@@ -281,39 +991,21 @@ async def search_by_embedding(
         embedding: Pre-computed embedding vector.
         top_k: Number of results to return.
         threshold: Minimum similarity score.
-        namespace: Pinecone namespace to search.
-        
+        namespace: Index namespace to search (default: the served generation).
+    
     Returns:
         List of matching documents with scores.
     """
-    if not settings.is_pinecone_configured():
+    if not settings.is_vector_store_configured():
         return []
     
     top_k = top_k or settings.semantic_search_top_k
     threshold = threshold or settings.semantic_search_threshold
     
-    index = get_pinecone_index()
-    
-    results = index.query(
-        vector=embedding,
-        top_k=top_k,
-        include_metadata=True,
-        namespace=namespace,
-    )
-    
-    matches = []
-    for match in results.matches:
-        if match.score >= threshold:
-            matches.append({
-                "id": match.id,
-                "score": match.score,
-                "content": match.metadata.get("content", ""),
-                "source": match.metadata.get("source", ""),
-                "type": match.metadata.get("type", ""),
-                "metadata": match.metadata,
-            })
+    namespace = namespace or await get_active_namespace()
+    results = await get_vector_store().query(embedding, top_k, namespace)
     
-    return matches
+    return _format_matches(results, threshold)
 
 
 # =============================================================================
@@ -322,22 +1014,16 @@ async def search_by_embedding(
 
 async def get_index_stats() -> Dict[str, Any]:
     """
-    Get Pinecone index statistics.
+    Get vector index statistics.
     
     Returns:
         Index statistics including vector counts.
     """
-    if not settings.is_pinecone_configured():
-        return {"error": "Pinecone not configured"}
-    
-    index = get_pinecone_index()
-    stats = index.describe_index_stats()
-    
-    return {
-        "dimension": stats.dimension,
-        "total_vector_count": stats.total_vector_count,
-        "namespaces": {
-            ns: {"vector_count": data.vector_count}
-            for ns, data in stats.namespaces.items()
-        }
-    }
+    if not settings.is_vector_store_configured():
+        return {"error": vector_store_error()}
+    
+    stats = await get_vector_store().describe_stats()
+    stats["backend"] = get_vector_store().name
+    stats["active_namespace"] = await get_active_namespace()
+    
+    return stats
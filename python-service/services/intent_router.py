@@ -0,0 +1,444 @@
+"""
+NEXI AI Chatbot - Intent Router
+
+Answers simple factual questions ("what's your email", "GitHub link",
+"what tech did you use for Clothie", "hello") straight from the
+portfolio, without embedding, vector search or an LLM stream.
+
+Queries are matched against a phrase table (word n-grams, longest
+match first) built once per portfolio version: intent trigger phrases
+plus project aliases derived from the portfolio itself. Each intent is
+scored from its triggers, and the route is only taken when the winning
+intent explains (nearly) every content word of the question. Anything
+with unexplained words ("...and why did you pick Redis?"), two asks at
+once or an ambiguous project falls through to the normal pipeline, as
+do follow-up questions that depend on the conversation ("what's the
+GitHub link for it?", or "which tech stack?" after a project came up).
+
+Answers are rendered from templates and pre-encoded as SSE frames, both
+memoized per portfolio version, so a routed request costs a few
+microseconds.
+"""
+
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from models.schemas import PortfolioContext, ProjectInfo
+from services.sse_frames import build_frames, split_words
+
+logger = logging.getLogger("nexi.intent_router")
+
+# =============================================================================
+# Phrase Tables
+# =============================================================================
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+MAX_QUERY_TOKENS = 24  # Longer questions are rarely a single factual ask
+MIN_INTENT_SCORE = 1.0  # At least one strong trigger (weak ones score 0.5)
+
+# Words that carry no intent of their own (contractions are split: "what's" -> "what", "s")
+STOPWORDS = frozenset("""
+a am an and any are at be been can could d did do does e for from give
+got have i in is it its just kindly know let like ll m me mine my need of
+ok okay on or please pls plz re s see share should show so some t tell thank
+thanks that the there this to u ur us ve want was we what whats which
+will with would you your nexi
+""".split())
+
+# Words that point back at something said earlier: only the LLM sees the conversation
+REFERENCE_WORDS = frozenset("""
+former it its itself latter one ones same that them their theirs these they this those
+""".split())
+
+GREETING = "greeting"
+PROJECT_OVERVIEW = "project_overview"
+
+# intent -> {phrase: weight}
+INTENT_PHRASES: Dict[str, Dict[str, float]] = {
+    GREETING: {
+        "hello": 1.0, "hi": 1.0, "hey": 1.0, "hiya": 1.0, "howdy": 1.0, "greetings": 1.0,
+        "salam": 1.0, "salaam": 1.0, "assalamualaikum": 1.0, "assalam o alaikum": 1.0,
+        "good morning": 1.0, "good afternoon": 1.0, "good evening": 1.0, "how are you": 1.0,
+    },
+    "email": {
+        "email": 1.0, "mail": 1.0, "gmail": 1.0, "email address": 1.0, "mail address": 1.0,
+        "address": 0.5,
+    },
+    "github": {
+        "github": 1.0, "git hub": 1.0, "github profile": 1.0, "repos": 1.0, "repositories": 1.0,
+        "source code": 1.0, "link": 0.5, "profile": 0.5, "url": 0.5,
+    },
+    "linkedin": {
+        "linkedin": 1.0, "linked in": 1.0, "linkedin profile": 1.0, "link": 0.5, "profile": 0.5,
+        "url": 0.5,
+    },
+    "contact": {
+        "contact": 1.0, "contact details": 1.0, "contact info": 1.0, "contact information": 1.0,
+        "reach": 1.0, "reach out": 1.0, "get in touch": 1.0, "in touch": 1.0, "hire": 1.0,
+        "hiring": 1.0, "available": 0.5, "how can i": 0.5, "how do i": 0.5,
+    },
+    "location": {
+        "where": 1.0, "located": 1.0, "location": 1.0, "based": 1.0, "live": 0.5,
+        "where are you from": 1.0, "remote": 1.0, "work remotely": 1.0, "open to remote": 1.0,
+        "country": 1.0, "city": 1.0,
+    },
+    "about_owner": {
+        "who are you": 1.0, "yourself": 1.0, "about yourself": 1.0, "introduce yourself": 1.0,
+        "bio": 1.0, "background": 1.0, "experience": 0.5, "who": 0.5,
+    },
+    "skills": {
+        "skills": 1.0, "skill set": 1.0, "skillset": 1.0, "tech stack": 1.0, "stack": 1.0,
+        "technologies": 1.0, "technology": 1.0, "tech": 1.0, "expertise": 1.0,
+        "frameworks": 1.0, "languages": 1.0, "tools": 1.0, "good at": 1.0, "use": 0.5,
+        "work with": 0.5,
+    },
+    "projects_list": {
+        "projects": 1.0, "your projects": 1.0, "portfolio": 1.0, "what have you built": 1.0,
+        "worked on": 1.0, "work": 0.5, "built": 0.5, "made": 0.5,
+    },
+    "project_tech": {
+        "tech stack": 1.0, "stack": 1.0, "tech": 1.0, "technologies": 1.0, "technology": 1.0,
+        "built with": 1.0, "made with": 1.0, "frameworks": 1.0, "tools": 1.0,
+        "languages": 1.0, "use": 0.5, "used": 0.5, "using": 0.5, "built": 0.5, "made": 0.5,
+    },
+    "project_link": {
+        "live": 1.0, "live url": 1.0, "live demo": 1.0, "demo": 1.0, "website": 1.0, "site": 1.0,
+        "where can i see": 1.0, "check out": 1.0, "try": 1.0, "link": 0.5, "url": 0.5,
+    },
+    PROJECT_OVERVIEW: {
+        "about": 0.5, "overview": 0.5, "describe": 0.5, "project": 0.5,
+    },
+}
+
+# Whether an intent needs a project ("required"), can't take one ("none") or either
+INTENT_PROJECT: Dict[str, str] = {
+    GREETING: "none",
+    "email": "none",
+    "github": "none",
+    "linkedin": "none",
+    "contact": "none",
+    "location": "none",
+    "about_owner": "none",
+    "skills": "none",
+    "projects_list": "none",
+    "project_tech": "required",
+    "project_link": "required",
+    PROJECT_OVERVIEW: "required",
+}
+
+# Intents whose answer doesn't depend on what was discussed before; in a
+# follow-up, anything else ("which tech stack?") only routes if it names a project
+STANDALONE_INTENTS = frozenset({GREETING, "email", "linkedin", "contact", "location", "about_owner"})
+
+# Name words too generic to identify a project on their own
+GENERIC_NAME_WORDS = frozenset("""
+app application e commerce ecommerce employee funnel lead management platform
+portal system website
+""".split())
+
+
+def normalize(text: str) -> List[str]:
+    """Lowercase word tokens ("What's" -> "what", "s"; "e-mail" -> "e", "mail")."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def project_aliases(project: ProjectInfo) -> List[str]:
+    """Ways a visitor may name a project: full name, parts, acronym, slug."""
+    name = project.name.lower()
+    aliases = {name, project.slug.replace("-", " ")}
+    
+    # "Employee Management System (EMS)" -> "employee management system", "ems"
+    outer, _, inner = name.partition("(")
+    for part in (outer, inner.rstrip(")")):
+        if part.strip():
+            aliases.add(part.strip())
+    
+    # A distinctive first word names the project on its own ("Clothie", "WhatsApp Funnel")
+    words = normalize(outer)
+    if words and words[0] not in GENERIC_NAME_WORDS and len(words[0]) > 3:
+        aliases.add(words[0])
+        aliases.add(" ".join(words[:2]))
+    
+    return [" ".join(normalize(alias)) for alias in aliases if normalize(alias)]
+
+
+# =============================================================================
+# Answer Templates
+# =============================================================================
+
+def _first_name(context: PortfolioContext) -> str:
+    return context.owner.name.split()[0]
+
+
+def _project_label(project: ProjectInfo) -> str:
+    return f"**{project.name}**"
+
+
+_TEMPLATES: Dict[str, Callable[[PortfolioContext, Optional[ProjectInfo]], str]] = {
+    GREETING: lambda c, p: (
+        f"Hi there! I'm NEXI, the AI assistant for {_first_name(c)}'s portfolio. I can tell you "
+        "about projects, technical skills, and how to get in touch. What would you like to know?"
+    ),
+    "email": lambda c, p: f"You can email me at **{c.contact.email}**. {c.contact.cta}",
+    "github": lambda c, p: f"You can find my code on GitHub: {c.contact.github}",
+    "linkedin": lambda c, p: f"Let's connect on LinkedIn: {c.contact.linkedin}",
+    "contact": lambda c, p: (
+        f"You can reach me by email at **{c.contact.email}** or on LinkedIn ({c.contact.linkedin}). "
+        f"My code is on GitHub: {c.contact.github}. {c.contact.cta}"
+    ),
+    "location": lambda c, p: f"I'm based in **{c.owner.location}**.",
+    "about_owner": lambda c, p: (
+        f"I'm NEXI, speaking for **{c.owner.name}**, {c.owner.title}, based in {c.owner.location}. "
+        f"{c.owner.bio}"
+    ),
+    "skills": lambda c, p: (
+        f"My core skills: **Frontend** ({', '.join(c.skills.frontend)}), "
+        f"**Backend** ({', '.join(c.skills.backend)}), "
+        f"**Cloud & DevOps** ({', '.join(c.skills.cloud)}) and "
+        f"**Integrations** ({', '.join(c.skills.integrations)})."
+    ),
+    "projects_list": lambda c, p: (
+        "I've worked on "
+        + "; ".join(f"{_project_label(project)} - {project.type} ({project.year})" for project in c.projects)
+        + ". Would you like to know more about any of these?"
+    ),
+    "project_tech": lambda c, p: (
+        f"{_project_label(p)} is built with {', '.join(p.techStack)}."
+    ),
+    "project_link": lambda c, p: f"You can see {_project_label(p)} live at {p.liveUrl}",
+    PROJECT_OVERVIEW: lambda c, p: (
+        f"{_project_label(p)} ({p.type}, {p.year}) - {p.description} "
+        f"I worked on it as {p.role}, using {', '.join(p.techStack[:6])}."
+    ),
+}
+
+
+# =============================================================================
+# Intent Router
+# =============================================================================
+
+@dataclass(frozen=True)
+class RoutedAnswer:
+    """A question answered locally."""
+    intent: str
+    project: Optional[str]  # Project slug for project intents
+    confidence: float
+    text: str
+    frames: List[bytes]  # Pre-encoded SSE content frames
+
+
+class IntentRouter:
+    """
+    Routes factual questions to templated answers.
+    
+    Usage:
+        routed = get_intent_router().route(query, context)
+        if routed:
+            ...stream routed.frames...
+    """
+    
+    def __init__(self, threshold: float = 0.9, frame_chars: int = 48):
+        self.threshold = threshold
+        self.frame_chars = frame_chars
+        self._context: Optional[PortfolioContext] = None
+        self._phrases: Dict[str, List[Tuple[str, float]]] = {}  # phrase -> [(intent or "@slug", weight)]
+        self._starts: Dict[str, int] = {}  # first word -> longest phrase starting with it
+        self._projects: Dict[str, ProjectInfo] = {}
+        self._framing = frozenset()  # Owner name words: fine in any question
+        self._answers: Dict[Tuple[str, Optional[str]], Tuple[str, List[bytes]]] = {}
+        
+        self.queries = 0
+        self.routed = 0
+        self.low_confidence = 0  # An intent matched, but not everything was explained
+        self.needs_conversation = 0  # Follow-ups that refer to earlier turns
+        self.by_intent: Dict[str, int] = {}
+        self.route_seconds = 0.0
+    
+    def _build(self, context: PortfolioContext):
+        """Compile the phrase table and drop memoized answers for a portfolio version."""
+        phrases: Dict[str, List[Tuple[str, float]]] = {}
+        for intent, triggers in INTENT_PHRASES.items():
+            for phrase, weight in triggers.items():
+                phrases.setdefault(phrase, []).append((intent, weight))
+        
+        projects = {}
+        alias_owners: Dict[str, set] = {}
+        for project in context.projects:
+            projects[project.slug] = project
+            for alias in project_aliases(project):
+                alias_owners.setdefault(alias, set()).add(project.slug)
+        for alias, slugs in alias_owners.items():
+            if len(slugs) == 1:
+                phrases.setdefault(alias, []).append((f"@{next(iter(slugs))}", 1.0))
+        
+        self._context = context
+        self._phrases = phrases
+        self._starts = {}
+        for phrase in phrases:
+            words = phrase.split()
+            self._starts[words[0]] = max(self._starts.get(words[0], 0), len(words))
+        self._projects = projects
+        self._framing = frozenset(normalize(context.owner.name))
+        self._answers.clear()
+    
+    def classify(self, query: str, context: PortfolioContext) -> Tuple[Optional[str], Optional[str], float]:
+        """
+        Classify a query.
+        
+        Returns:
+            (intent, project slug, confidence); intent is None when nothing
+            matched well enough to score.
+        """
+        return self._classify(normalize(query), context)
+    
+    def _classify(self, tokens: List[str], context: PortfolioContext) -> Tuple[Optional[str], Optional[str], float]:
+        """Classify a normalized query (see classify)."""
+        if context is not self._context:
+            self._build(context)
+        
+        if not tokens or len(tokens) > MAX_QUERY_TOKENS:
+            return None, None, 0.0
+        
+        # Longest phrase match first, left to right
+        scores: Dict[str, float] = {}
+        covered: Dict[str, set] = {}  # intent or "@slug" -> token positions it explains
+        i = 0
+        while i < len(tokens):
+            longest = self._starts.get(tokens[i], 0)
+            for n in range(min(longest, len(tokens) - i), 0, -1):
+                matches = self._phrases.get(" ".join(tokens[i:i + n]))
+                if matches:
+                    for label, weight in matches:
+                        scores[label] = scores.get(label, 0.0) + weight
+                        covered.setdefault(label, set()).update(range(i, i + n))
+                    i += n
+                    break
+            else:
+                i += 1
+        
+        slugs = [label[1:] for label in scores if label.startswith("@")]
+        if len(slugs) > 1:
+            return None, None, 0.0  # Comparing or mixing projects needs the LLM
+        project = slugs[0] if slugs else None
+        if project:
+            scores[PROJECT_OVERVIEW] = scores.get(PROJECT_OVERVIEW, 0.0) + 1.0
+        
+        # A greeting only wins when nothing else was asked ("hi, what's your email")
+        best, best_score = None, 0.0
+        for intent in INTENT_PHRASES:
+            if intent == GREETING:
+                continue
+            score = scores.get(intent, 0.0)
+            needs = INTENT_PROJECT[intent]
+            if score < MIN_INTENT_SCORE or (needs == "required") != (project is not None):
+                continue
+            if intent == "project_link" and not self._projects[project].liveUrl:
+                continue
+            if score > best_score:
+                best, best_score = intent, score
+        
+        if best is None and not project and scores.get(GREETING, 0.0) >= MIN_INTENT_SCORE:
+            best = GREETING
+        if best is None:
+            return None, None, 0.0
+        
+        # Share of content words the chosen intent (plus greeting, project and owner name) explains
+        explained = covered.get(best, set()) | covered.get(GREETING, set())
+        if project:
+            explained |= covered[f"@{project}"]
+        content = [
+            position for position, token in enumerate(tokens)
+            if token not in STOPWORDS and token not in self._framing
+        ]
+        if not content:
+            return best, project, 1.0
+        confidence = sum(1 for position in content if position in explained) / len(content)
+        
+        return best, project, confidence
+    
+    def route(self, query: str, context: PortfolioContext, follow_up: bool = False) -> Optional[RoutedAnswer]:
+        """
+        Answer a query locally, or None to use the normal pipeline.
+        
+        Args:
+            query: The latest user message
+            context: Portfolio context
+            follow_up: Whether the visitor asked earlier questions in this
+                conversation (their topic may be implied, e.g. "which tech stack?")
+        """
+        started = time.perf_counter()
+        self.queries += 1
+        
+        tokens = normalize(query)
+        if REFERENCE_WORDS.intersection(tokens):
+            intent, project, confidence = None, None, 0.0
+            self.needs_conversation += 1
+        else:
+            intent, project, confidence = self._classify(tokens, context)
+            if intent is not None and follow_up and project is None and intent not in STANDALONE_INTENTS:
+                intent = None
+                self.needs_conversation += 1
+        
+        routed = None
+        if intent is not None:
+            if confidence >= self.threshold:
+                text, frames = self._answer(intent, project)
+                routed = RoutedAnswer(intent, project, confidence, text, frames)
+                self.routed += 1
+                self.by_intent[intent] = self.by_intent.get(intent, 0) + 1
+            else:
+                self.low_confidence += 1
+        
+        self.route_seconds += time.perf_counter() - started
+        return routed
+    
+    def _answer(self, intent: str, project: Optional[str]) -> Tuple[str, List[bytes]]:
+        """Rendered answer and its SSE frames (memoized per portfolio version)."""
+        key = (intent, project)
+        answer = self._answers.get(key)
+        if answer is None:
+            text = _TEMPLATES[intent](self._context, self._projects.get(project) if project else None)
+            answer = (text, build_frames(split_words(text), self.frame_chars))
+            self._answers[key] = answer
+        return answer
+    
+    def get_stats(self) -> Dict:
+        """Get routing statistics."""
+        return {
+            "enabled": settings.intent_router_enabled,
+            "threshold": self.threshold,
+            "queries": self.queries,
+            "routed": self.routed,
+            "routing_rate": f"{self.routed / self.queries * 100:.1f}%" if self.queries else "0%",
+            "low_confidence": self.low_confidence,
+            "needs_conversation": self.needs_conversation,
+            "fell_through": self.queries - self.routed,
+            "by_intent": dict(sorted(self.by_intent.items(), key=lambda item: -item[1])),
+            "avg_route_us": round(self.route_seconds / self.queries * 1e6, 2) if self.queries else 0,
+        }
+
+
+# =============================================================================
+# Global Router Instance
+# =============================================================================
+
+_intent_router: Optional[IntentRouter] = None
+
+
+def get_intent_router() -> IntentRouter:
+    """Get or create the global intent router."""
+    global _intent_router
+    
+    if _intent_router is None:
+        _intent_router = IntentRouter(
+            threshold=settings.intent_router_threshold,
+            frame_chars=settings.cache_replay_chunk_chars,
+        )
+        logger.info("Intent router initialized")
+    
+    return _intent_router
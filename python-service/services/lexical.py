@@ -0,0 +1,227 @@
+"""
+NEXI AI Chatbot - Lexical Search (BM25)
+
+In-process BM25 index over the same portfolio chunks that are embedded
+for semantic search (services.context.create_chunks). Needs no network,
+so exact terms like "Socket.IO" or "Clothie" resolve in microseconds and
+retrieval keeps working when OpenAI or the vector store is unconfigured.
+
+Lexical and vector results are combined with reciprocal rank fusion.
+"""
+
+import logging
+import math
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config.settings import settings
+from models.schemas import PortfolioContext
+from services.context import create_chunks, get_portfolio_context, load_portfolio_data
+
+logger = logging.getLogger("nexi.lexical")
+
+# =============================================================================
+# Tokenization
+# =============================================================================
+
+# Words, keeping tech names such as "socket.io", "node.js", "c#" or "c++" whole
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.+#][a-z0-9+#]*)*")
+_PART_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a about an and any are as at be been but by can could did do does for from
+has have he her his how i if in into is it its me my of on or our she so
+tell than that the their them there these they this to us was we were what
+when where which who why will with would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase search terms.
+    
+    Dotted or symbol-joined names are kept whole and also split into
+    their parts, so "Socket.IO" matches both "socket.io" and "socket".
+    """
+    terms = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        token = token.rstrip(".")
+        if not token or token in STOPWORDS:
+            continue
+        terms.append(token)
+        
+        parts = _PART_PATTERN.findall(token)
+        if len(parts) > 1 or (parts and parts[0] != token):
+            terms.extend(part for part in parts if part not in STOPWORDS)
+    
+    return terms
+
+
+# =============================================================================
+# BM25 Index
+# =============================================================================
+
+class BM25Index:
+    """
+    Inverted index with BM25 scoring.
+    
+    Each posting stores its document's full BM25 term weight
+    (IDF x saturated, length-normalized term frequency), computed once at
+    build time, so a query only sums a few small arrays.
+    """
+    
+    def __init__(self, chunks: List[Dict[str, Any]], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs = chunks
+        self.postings: Dict[str, tuple] = {}  # term -> (doc indices, weights)
+        self.idf: Dict[str, float] = {}
+        self._build()
+    
+    def __len__(self) -> int:
+        return len(self.docs)
+    
+    def _build(self):
+        """Tokenize every chunk and precompute IDF and posting weights."""
+        doc_terms = [tokenize(chunk["content"]) for chunk in self.docs]
+        lengths = np.array([len(terms) for terms in doc_terms], dtype=np.float32)
+        avg_length = float(lengths.mean()) if len(lengths) else 0.0
+        count = len(self.docs)
+        
+        frequencies: Dict[str, Dict[int, int]] = {}
+        for doc, terms in enumerate(doc_terms):
+            for term in terms:
+                postings = frequencies.setdefault(term, {})
+                postings[doc] = postings.get(doc, 0) + 1
+        
+        for term, postings in frequencies.items():
+            # BM25+ style IDF (never negative for very common terms)
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            docs = np.fromiter(postings.keys(), dtype=np.int32, count=len(postings))
+            tf = np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+            norm = self.k1 * (1 - self.b + self.b * lengths[docs] / (avg_length or 1.0))
+            
+            self.idf[term] = idf
+            self.postings[term] = (docs, idf * tf * (self.k1 + 1) / (tf + norm))
+        
+        logger.info(f"BM25 index built: {count} chunks, {len(self.postings)} terms")
+    
+    def search(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+        """
+        Rank chunks for a query.
+        
+        Returns:
+            Matching chunks (at least one query term), best first, formatted
+            like vector search results but without a `score`: BM25 scores
+            are not comparable to cosine similarity, so only `bm25` is set.
+        """
+        terms = [term for term in set(tokenize(query)) if term in self.postings]
+        if not terms:
+            return []
+        
+        scores = np.zeros(len(self.docs), dtype=np.float32)
+        for term in terms:
+            docs, weights = self.postings[term]
+            scores[docs] += weights
+        
+        matched = np.flatnonzero(scores)
+        ranked = matched[np.argsort(-scores[matched], kind="stable")][:top_k]
+        
+        results = []
+        for doc in ranked:
+            chunk = self.docs[doc]
+            metadata = {**chunk["metadata"], "content": chunk["content"]}
+            results.append({
+                "id": chunk["id"],
+                "bm25": round(float(scores[doc]), 4),
+                "content": chunk["content"],
+                "source": metadata.get("source", ""),
+                "type": metadata.get("type", ""),
+                "metadata": metadata,
+            })
+        
+        return results
+
+
+# =============================================================================
+# Rank Fusion
+# =============================================================================
+
+def reciprocal_rank_fusion(
+    rankings: List[List[Dict[str, Any]]],
+    top_k: int,
+    k: int = 60,
+) -> List[Dict[str, Any]]:
+    """
+    Merge ranked result lists by reciprocal rank fusion.
+    
+    A document scores sum(1 / (k + rank)) over the lists it appears in.
+    The first list's entry for a document is kept (so vector results
+    keep their cosine `score`), with `rrf_score` added.
+    
+    Args:
+        rankings: Result lists, best first, identified by "id"
+        top_k: Number of results to return
+        k: RRF damping constant (60 is the usual choice)
+    """
+    fused: Dict[str, float] = {}
+    docs: Dict[str, Dict[str, Any]] = {}
+    
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            fused[doc["id"]] = fused.get(doc["id"], 0.0) + 1.0 / (k + rank)
+            docs.setdefault(doc["id"], doc)
+    
+    ordered = sorted(fused, key=lambda doc_id: fused[doc_id], reverse=True)[:top_k]
+    return [{**docs[doc_id], "rrf_score": round(fused[doc_id], 5)} for doc_id in ordered]
+
+
+def hybrid_results(
+    dense: List[Dict[str, Any]],
+    lexical: List[Dict[str, Any]],
+    top_k: int,
+) -> List[Dict[str, Any]]:
+    """Fuse vector and BM25 results, or use whichever one is available."""
+    if dense and lexical:
+        return reciprocal_rank_fusion([dense, lexical], top_k, k=settings.rrf_k)
+    return (dense or lexical)[:top_k]
+
+
+# =============================================================================
+# Global Index Instance
+# =============================================================================
+
+_lexical_index: Optional[BM25Index] = None
+_lexical_context: Optional[PortfolioContext] = None  # Context the index was built for
+
+
+def get_lexical_index() -> BM25Index:
+    """
+    Get or build the BM25 index over the portfolio chunks.
+    
+    The index is rebuilt when the portfolio context changes
+    (reload_portfolio_context() creates a new one).
+    """
+    global _lexical_index, _lexical_context
+    
+    context = get_portfolio_context()
+    if _lexical_index is None or context is not _lexical_context:
+        if _lexical_index is not None:
+            logger.info("Portfolio context reloaded, rebuilding BM25 index")
+        _lexical_index = BM25Index(
+            create_chunks(load_portfolio_data()),
+            k1=settings.bm25_k1,
+            b=settings.bm25_b,
+        )
+        _lexical_context = context
+    
+    return _lexical_index
+
+
+def reset_lexical_index():
+    """Drop the index so it is rebuilt (e.g. after the portfolio changes)."""
+    global _lexical_index, _lexical_context
+    _lexical_index = None
+    _lexical_context = None
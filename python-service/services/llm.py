@@ -2,33 +2,180 @@
 NEXI AI Chatbot - LLM Service
 
 Supports OpenAI and Groq providers with streaming responses.
+
+Requests go through a provider router that keeps rolling latency, error
+and rate-limit statistics per provider/model, opens a circuit breaker on
+failure bursts and fails over to the next healthy provider. Streams can
+optionally be hedged: a slow first token triggers a second request and
+the faster one wins.
 """
 
+import asyncio
 import logging
-from typing import AsyncGenerator, List, Dict, Optional
+import time
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, AsyncIterator, List, Dict, Optional, Any
 
 import httpx
 
 from config.settings import settings
+from services.cost_monitor import calculate_cost
+from services.metrics import ROLLING_WINDOWS, RollingCounts, RollingHistogram
+from services.sse_parser import SSEDecoder
 
 logger = logging.getLogger("nexi.llm")
 
+# =============================================================================
+# Shared HTTP Client Pool
+# =============================================================================
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """Create the pooled HTTP client from settings."""
+    limits = httpx.Limits(
+        max_connections=settings.llm_max_connections,
+        max_keepalive_connections=settings.llm_max_keepalive_connections,
+        keepalive_expiry=settings.llm_keepalive_expiry,
+    )
+    timeout = httpx.Timeout(
+        connect=settings.llm_connect_timeout,
+        read=settings.llm_read_timeout,
+        write=settings.llm_write_timeout,
+        pool=settings.llm_pool_timeout,
+    )
+    
+    http2 = settings.llm_http2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("h2 package not installed - falling back to HTTP/1.1")
+            http2 = False
+    
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+
+async def init_http_client() -> httpx.AsyncClient:
+    """
+    Create the process-wide HTTP client used for LLM provider calls.
+    
+    Called from the application lifespan so connections (DNS, TCP, TLS)
+    are reused across chat requests instead of being rebuilt every time.
+    
+    Returns:
+        The shared AsyncClient.
+    """
+    global _http_client
+    
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _build_http_client()
+        logger.info(
+            f"LLM HTTP client initialized (http2={settings.llm_http2}, "
+            f"max_connections={settings.llm_max_connections})"
+        )
+    
+    return _http_client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared HTTP client.
+    
+    Falls back to lazy creation so scripts and tests that skip the
+    application lifespan still work.
+    """
+    global _http_client
+    
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _build_http_client()
+        logger.info("LLM HTTP client lazily initialized")
+    
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and release pooled connections."""
+    global _http_client
+    
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        logger.info("LLM HTTP client closed")
+
+
+async def _send_with_first_byte_timeout(
+    client: httpx.AsyncClient,
+    request: httpx.Request,
+) -> httpx.Response:
+    """
+    Send a request, failing fast if the response headers don't arrive in time.
+    
+    The read timeout bounds gaps between chunks; this bounds the initial wait
+    for the provider to start responding, which is usually where a queued or
+    degraded provider hangs.
+    """
+    try:
+        return await asyncio.wait_for(
+            client.send(request, stream=True),
+            timeout=settings.llm_first_byte_timeout,
+        )
+    except asyncio.TimeoutError:
+        raise ProviderError(
+            f"AI provider did not respond within {settings.llm_first_byte_timeout}s"
+        )
+
 # =============================================================================
 # Provider Configuration
 # =============================================================================
 
-def get_provider_config() -> Dict[str, str]:
+class ProviderError(Exception):
+    """A provider call failed (status_code is None for timeouts and network errors)."""
+    
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class ProviderTarget:
+    """A provider and the model used on it."""
+    provider: str
+    model: str
+    
+    @property
+    def key(self) -> str:
+        """Label used in stats and logs."""
+        return f"{self.provider}/{self.model}"
+
+
+@dataclass
+class StreamInfo:
+    """What actually served a completion (filled in by the LLM service)."""
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    attempts: List[str] = field(default_factory=list)  # provider/model keys tried, in order
+    hedged: bool = False  # A hedge request was raced against the primary
+    usage: Optional[Dict[str, Any]] = None  # Provider-reported usage, if any
+
+
+def get_provider_config() -> Dict[str, Any]:
     """
     Get the active provider configuration.
     
     Returns:
-        Dict with provider, model, base_url, and api_key status.
+        Dict with provider, model, base_url, api_key status and the
+        failover order.
     """
     return {
         "provider": settings.ai_provider,
         "model": settings.model,
         "base_url": settings.base_url,
         "configured": settings.is_configured(),
+        "failover_order": settings.provider_order,
+        "routing_strategy": settings.llm_routing_strategy,
     }
 
 
@@ -37,38 +184,572 @@ def is_provider_configured() -> bool:
     Check if the AI provider is properly configured.
     
     Returns:
-        True if API key is set, False otherwise.
+        True if at least one provider has an API key, False otherwise.
     """
     return settings.is_configured()
 
 
+# =============================================================================
+# Provider Health and Circuit Breaking
+# =============================================================================
+
+# Health is judged over the last minute
+HEALTH_WINDOW = ROLLING_WINDOWS["1m"]
+MIN_HEALTH_SAMPLES = 5  # Fewer requests than this never mark a provider degraded
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderHealth:
+    """
+    Rolling statistics and circuit breaker for one provider/model.
+    
+    The circuit opens after `llm_breaker_failures` consecutive failures
+    (or for the Retry-After of a 429, if longer than the cooldown). Once
+    the cooldown passes it is half-open: the next request is let through
+    as a trial and either closes the circuit or opens it again.
+    """
+    
+    def __init__(self, target: ProviderTarget):
+        self.target = target
+        self.counts = RollingCounts(*HEALTH_WINDOW, fields=("requests", "errors", "rate_limited"))
+        self.ttft = RollingHistogram(*HEALTH_WINDOW)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.opened = 0
+        self.last_error: Optional[str] = None
+    
+    def state(self, now: float) -> str:
+        """Current breaker state."""
+        if self.open_until == 0.0:
+            return CLOSED
+        return OPEN if now < self.open_until else HALF_OPEN
+    
+    def begin(self, now: float):
+        """Count an attempt. A half-open trial holds the circuit for another cooldown."""
+        self.counts.add("requests", now=now)
+        if self.state(now) == HALF_OPEN:
+            self.open_until = now + settings.llm_breaker_cooldown
+    
+    def succeed(self, ttft_ms: float, now: float):
+        """Record a first token; closes the circuit."""
+        self.ttft.record(ttft_ms, now)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+    
+    def fail(self, error: Exception, now: float):
+        """Record a failed attempt and open the circuit on a burst."""
+        status = getattr(error, "status_code", None)
+        self.counts.add("errors", now=now)
+        if status == 429:
+            self.counts.add("rate_limited", now=now)
+        self.consecutive_failures += 1
+        self.last_error = str(error)[:200]
+        
+        cooldown = 0.0
+        if self.consecutive_failures >= settings.llm_breaker_failures:
+            cooldown = settings.llm_breaker_cooldown
+        retry_after = getattr(error, "retry_after", None)
+        if status == 429 and retry_after:
+            cooldown = max(cooldown, retry_after)
+        
+        if cooldown > 0:
+            if self.state(now) == CLOSED:
+                self.opened += 1
+                logger.warning(f"Circuit opened for {self.target.key} ({cooldown:.0f}s): {self.last_error}")
+            self.open_until = max(self.open_until, now + cooldown)
+    
+    def error_rate(self, now: float) -> float:
+        """Share of recent attempts that failed."""
+        counts = self.counts.totals(now)
+        return counts["errors"] / counts["requests"] if counts["requests"] else 0.0
+    
+    def p90_ttft(self, now: float) -> Optional[float]:
+        """Recent p90 time-to-first-token, None without samples."""
+        histogram = self.ttft.snapshot(now)
+        return histogram.percentiles((90,))[90] if histogram.count else None
+    
+    def degraded(self, now: float) -> bool:
+        """Too many recent errors, or slower than the TTFT SLO."""
+        counts = self.counts.totals(now)
+        if counts["requests"] >= MIN_HEALTH_SAMPLES and counts["errors"] / counts["requests"] > settings.llm_max_error_rate:
+            return True
+        p90 = self.p90_ttft(now)
+        return p90 is not None and p90 > settings.llm_slo_ttft_ms
+    
+    def get_stats(self, now: float) -> Dict[str, Any]:
+        """Breaker state and rolling statistics."""
+        counts = self.counts.totals(now)
+        p90 = self.p90_ttft(now)
+        
+        return {
+            "state": self.state(now),
+            "degraded": self.degraded(now),
+            "window_seconds": HEALTH_WINDOW[0],
+            **counts,
+            "error_rate": round(self.error_rate(now), 3),
+            "ttft": self.ttft.snapshot(now).summary(),
+            "p90_ttft_ms": round(p90, 1) if p90 is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.opened,
+            "reopens_in_seconds": round(self.open_until - now, 1) if self.state(now) == OPEN else None,
+            "last_error": self.last_error,
+        }
+
+
+class ProviderRouter:
+    """
+    Orders configured providers for each request.
+    
+    Usage:
+        router = get_router()
+        for target in router.select():
+            ...
+    
+    Providers with an open circuit are skipped. With the "health" strategy
+    the configured order is kept unless a provider is degraded (then the
+    healthiest go first); with "cheapest" the cheapest provider within
+    the SLO goes first.
+    """
+    
+    def __init__(self):
+        self._health: Dict[ProviderTarget, ProviderHealth] = {}
+    
+    def targets(self) -> List[ProviderTarget]:
+        """Configured targets in failover order."""
+        return [ProviderTarget(p, settings.model_for(p)) for p in settings.provider_order]
+    
+    def health(self, target: ProviderTarget) -> ProviderHealth:
+        """Health tracker for a target (created on first use)."""
+        if target not in self._health:
+            self._health[target] = ProviderHealth(target)
+        return self._health[target]
+    
+    @staticmethod
+    def price(target: ProviderTarget) -> float:
+        """Blended price of 1K input plus 1K output tokens."""
+        return calculate_cost(1000, 1000, target.model, target.provider)
+    
+    def select(self, now: Optional[float] = None) -> List[ProviderTarget]:
+        """
+        Targets to try, best first. Empty when every circuit is open.
+        """
+        now = now if now is not None else time.time()
+        ranked = []
+        
+        for priority, target in enumerate(self.targets()):
+            health = self.health(target)
+            if health.state(now) == OPEN:
+                continue
+            
+            # A half-open target ranks normally, so its trial request happens
+            # (begin() then holds the circuit until the trial resolves)
+            degraded = health.degraded(now)
+            if settings.llm_routing_strategy == "cheapest":
+                key = (degraded, self.price(target), priority)
+            elif degraded:
+                p90 = health.p90_ttft(now)
+                key = (True, health.error_rate(now), p90 or 0.0, priority)
+            else:
+                key = (False, priority)
+            ranked.append((key, target))
+        
+        ranked.sort(key=lambda item: item[0])
+        return [target for _, target in ranked]
+    
+    def get_state(self) -> Dict[str, Any]:
+        """Router configuration and per-target health."""
+        now = time.time()
+        
+        return {
+            "strategy": settings.llm_routing_strategy,
+            "slo_ttft_ms": settings.llm_slo_ttft_ms,
+            "max_error_rate": settings.llm_max_error_rate,
+            "breaker": {
+                "failures": settings.llm_breaker_failures,
+                "cooldown_seconds": settings.llm_breaker_cooldown,
+            },
+            "routing_order": [target.key for target in self.select(now)],
+            "providers": {
+                target.key: {
+                    "priority": priority,
+                    "price_per_1k": round(self.price(target), 6),
+                    **self.health(target).get_stats(now),
+                }
+                for priority, target in enumerate(self.targets())
+            },
+        }
+
+
+_router: Optional[ProviderRouter] = None
+
+
+def get_router() -> ProviderRouter:
+    """Get the global provider router."""
+    global _router
+    if _router is None:
+        _router = ProviderRouter()
+    return _router
+
+
+def _select_targets() -> List[ProviderTarget]:
+    """Targets for one request, failing fast when none can be tried."""
+    if not settings.provider_order:
+        raise Exception(f"API key not configured for provider: {settings.ai_provider}")
+    
+    targets = get_router().select()
+    if not targets:
+        raise Exception("All AI providers are unavailable (circuits open)")
+    return targets
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds form only)."""
+    try:
+        return float(response.headers.get("retry-after", ""))
+    except ValueError:
+        return None
+
+
+async def _open(
+    target: ProviderTarget,
+    full_messages: List[Dict[str, str]],
+    max_tokens: Optional[int],
+    temperature: Optional[float],
+    stream: bool,
+) -> httpx.Response:
+    """
+    Send a chat completion request to one target.
+    
+    Returns:
+        The (streaming) response, status 200.
+    
+    Raises:
+        ProviderError: On timeouts, network errors and non-200 responses.
+    """
+    body = {
+        "model": target.model,
+        "messages": full_messages,
+        "max_tokens": max_tokens or settings.ai_max_tokens,
+        "temperature": temperature or settings.ai_temperature,
+        "stream": stream,
+    }
+    if stream:
+        # Final chunk carries usage, including prompt tokens served from cache
+        body["stream_options"] = {"include_usage": True}
+    
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {settings.api_key_for(target.provider)}",
+    }
+    
+    url = f"{settings.base_url_for(target.provider)}/chat/completions"
+    
+    logger.info(f"{'Streaming' if stream else 'Non-streaming'} request to {target.provider} ({target.model})")
+    logger.debug(f"URL: {url}")
+    logger.debug(f"Messages: {len(full_messages)}")
+    
+    client = get_http_client()
+    request = client.build_request("POST", url, json=body, headers=headers)
+    try:
+        response = await _send_with_first_byte_timeout(client, request)
+    except httpx.HTTPError as e:
+        raise ProviderError(f"{target.provider} request failed: {e!r}")
+    
+    if response.status_code != 200:
+        try:
+            error_text = await response.aread()
+        finally:
+            await response.aclose()
+        logger.error(f"API error ({response.status_code}): {error_text}")
+        raise ProviderError(
+            f"AI provider returned {response.status_code}: {response.reason_phrase}",
+            status_code=response.status_code,
+            retry_after=_retry_after(response),
+        )
+    
+    return response
+
+
+# =============================================================================
+# Hedged Requests
+# =============================================================================
+
+# The hedge budget is enforced over the last five minutes
+HEDGE_WINDOW = ROLLING_WINDOWS["5m"]
+
+
+class HedgeStats:
+    """
+    Hedge budget and outcome counters.
+    
+    A hedge is allowed while hedges stay below `llm_hedge_budget` of the
+    streamed requests in the window, so hedging never adds more than that
+    share of extra upstream calls.
+    """
+    
+    def __init__(self):
+        self.window = RollingCounts(*HEDGE_WINDOW, fields=("requests", "hedges"))
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.primary_wins = 0
+        self.budget_denied = 0
+    
+    def threshold_ms(self, target: ProviderTarget) -> float:
+        """How long to wait for a first token: the target's rolling p90 TTFT."""
+        health = get_router().health(target)
+        if health.ttft.snapshot().count < MIN_HEALTH_SAMPLES:
+            return settings.llm_hedge_delay_ms
+        return health.p90_ttft(time.time())
+    
+    def record_request(self):
+        """Count a streamed request that may be hedged."""
+        self.requests += 1
+        self.window.add("requests")
+    
+    def try_hedge(self) -> bool:
+        """Take a hedge from the budget, if any is left."""
+        counts = self.window.totals()
+        if counts["hedges"] + 1 > settings.llm_hedge_budget * counts["requests"]:
+            self.budget_denied += 1
+            return False
+        
+        self.hedges += 1
+        self.window.add("hedges")
+        return True
+    
+    def record_winner(self, hedge_won: bool):
+        """Record which side of a hedged race produced content first."""
+        if hedge_won:
+            self.hedge_wins += 1
+        else:
+            self.primary_wins += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hedge rate, wins and budget usage."""
+        counts = self.window.totals()
+        
+        return {
+            "enabled": settings.llm_hedging_enabled,
+            "budget": settings.llm_hedge_budget,
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_rate": f"{self.hedges / self.requests * 100:.1f}%" if self.requests else "0%",
+            "hedge_wins": self.hedge_wins,
+            "primary_wins": self.primary_wins,
+            "hedge_win_rate": f"{self.hedge_wins / self.hedges * 100:.1f}%" if self.hedges else "0%",
+            "budget_denied": self.budget_denied,
+            "window_hedge_rate": f"{counts['hedges'] / counts['requests'] * 100:.1f}%" if counts["requests"] else "0%",
+        }
+
+
+_hedging: Optional[HedgeStats] = None
+
+
+def get_hedging() -> HedgeStats:
+    """Get the global hedge statistics."""
+    global _hedging
+    if _hedging is None:
+        _hedging = HedgeStats()
+    return _hedging
+
+
 # =============================================================================
 # Streaming Chat Completion
 # =============================================================================
 
+@dataclass
+class _Attempt:
+    """A provider stream that has produced its first content."""
+    target: ProviderTarget
+    response: httpx.Response
+    decoder: SSEDecoder
+    chunks: AsyncIterator[bytes]
+    contents: List[str]
+
+
+async def _first_contents(
+    target: ProviderTarget,
+    full_messages: List[Dict[str, str]],
+    max_tokens: Optional[int],
+    temperature: Optional[float],
+) -> _Attempt:
+    """
+    Open a stream on one target and read up to its first content.
+    
+    Raises:
+        ProviderError: If the target fails before producing content
+            (recorded in its health).
+    """
+    health = get_router().health(target)
+    started = time.perf_counter()
+    health.begin(time.time())
+    
+    try:
+        response = await _open(target, full_messages, max_tokens, temperature, stream=True)
+    except ProviderError as e:
+        health.fail(e, time.time())
+        raise
+    
+    decoder = SSEDecoder()
+    chunks = response.aiter_bytes()
+    contents: List[str] = []
+    
+    try:
+        while not contents and not decoder.done:
+            chunk = await anext(chunks, None)
+            if chunk is None:
+                contents = decoder.flush()
+                break
+            contents = decoder.feed(chunk)
+    except httpx.HTTPError as e:
+        await response.aclose()
+        error = ProviderError(f"{target.provider} stream failed: {e!r}")
+        health.fail(error, time.time())
+        raise error
+    except BaseException:
+        # Cancelled (lost a hedge race, or the client went away)
+        await response.aclose()
+        raise
+    
+    health.succeed((time.perf_counter() - started) * 1000, time.time())
+    return _Attempt(target, response, decoder, chunks, contents)
+
+
+def _discard(task: asyncio.Task):
+    """Close the stream of an attempt that lost the race."""
+    if task.cancelled() or task.exception() is not None:
+        return
+    asyncio.ensure_future(task.result().response.aclose())
+
+
+async def _connect_hedged(
+    targets: List[ProviderTarget],
+    request_args: tuple,
+    info: StreamInfo,
+) -> _Attempt:
+    """
+    Race the primary target against one hedge.
+    
+    If the primary has no first content after its threshold (rolling p90
+    TTFT) and the budget allows, a second request goes to the next target
+    (or the same one when it is the only target). The first to produce
+    content wins and the other is cancelled. Attempts that fail are
+    replaced by the next target, as without hedging.
+    """
+    hedging = get_hedging()
+    hedging.record_request()
+    queue = list(targets)
+    tasks: Dict[asyncio.Task, ProviderTarget] = {}
+    
+    def launch(target: ProviderTarget) -> asyncio.Task:
+        info.attempts.append(target.key)
+        task = asyncio.ensure_future(_first_contents(target, *request_args))
+        tasks[task] = target
+        return task
+    
+    primary = queue.pop(0)
+    launch(primary)
+    deadline = time.perf_counter() + hedging.threshold_ms(primary) / 1000
+    hedge_task: Optional[asyncio.Task] = None
+    hedge_decided = False
+    last_error: Optional[BaseException] = None
+    
+    try:
+        while tasks:
+            timeout = None if hedge_decided else max(0.0, deadline - time.perf_counter())
+            done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            
+            if not done:
+                hedge_decided = True
+                if hedging.try_hedge():
+                    hedge_target = queue.pop(0) if queue else primary
+                    logger.info(f"Hedging {primary.key} with {hedge_target.key}")
+                    hedge_task = launch(hedge_target)
+                continue
+            
+            winner: Optional[asyncio.Task] = None
+            for task in done:
+                tasks.pop(task)
+                if task.exception() is not None:
+                    last_error = task.exception()
+                elif winner is None:
+                    winner = task
+                else:
+                    _discard(task)
+            
+            if winner is not None:
+                if hedge_task is not None:
+                    hedging.record_winner(hedge_won=winner is hedge_task)
+                info.hedged = hedge_task is not None
+                return winner.result()
+            
+            if not tasks and queue:
+                # Everything in flight failed: fail over to the next target
+                primary = queue.pop(0)
+                launch(primary)
+                deadline = time.perf_counter() + hedging.threshold_ms(primary) / 1000
+        
+        raise last_error or Exception("No AI provider available")
+    finally:
+        # Losers close their own streams (cancelled) or are closed once done
+        for task in tasks:
+            task.add_done_callback(_discard)
+            task.cancel()
+
+
+async def _connect(
+    targets: List[ProviderTarget],
+    request_args: tuple,
+    info: StreamInfo,
+) -> _Attempt:
+    """Get the first content from the best target, failing over in order."""
+    if settings.llm_hedging_enabled:
+        return await _connect_hedged(targets, request_args, info)
+    
+    last_error: Optional[Exception] = None
+    for target in targets:
+        info.attempts.append(target.key)
+        try:
+            return await _first_contents(target, *request_args)
+        except ProviderError as e:
+            last_error = e
+    
+    raise last_error or Exception("No AI provider available")
+
+
 async def stream_chat_completion(
     messages: List[Dict[str, str]],
     system_prompt: str,
     max_tokens: Optional[int] = None,
     temperature: Optional[float] = None,
+    info: Optional[StreamInfo] = None,
 ) -> AsyncGenerator[str, None]:
     """
     Stream chat completion tokens from the LLM provider.
     
+    Providers are tried in router order; a provider that fails before
+    its first token is recorded as failed and the next one is tried.
+    With llm_hedging_enabled, a slow first token triggers a hedged
+    request (see _connect_hedged).
+    
     Args:
         messages: List of conversation messages.
         system_prompt: System prompt for the assistant.
         max_tokens: Maximum tokens in response.
         temperature: Response creativity (0-1).
-        
+        info: Optional StreamInfo to fill with the serving provider/model.
+    
     Yields:
         Token strings as they are generated.
-        
+    
     Raises:
-        Exception: If API request fails.
+        Exception: If every provider fails.
     """
-    if not settings.api_key:
-        raise Exception(f"API key not configured for provider: {settings.ai_provider}")
+    info = info if info is not None else StreamInfo()
     
     # Build messages with system prompt
     full_messages = [
@@ -76,69 +757,35 @@ async def stream_chat_completion(
         *messages,
     ]
     
-    # Request body
-    body = {
-        "model": settings.model,
-        "messages": full_messages,
-        "max_tokens": max_tokens or settings.ai_max_tokens,
-        "temperature": temperature or settings.ai_temperature,
-        "stream": True,
-    }
-    
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {settings.api_key}",
-    }
-    
-    url = f"{settings.base_url}/chat/completions"
+    attempt = await _connect(_select_targets(), (full_messages, max_tokens, temperature), info)
+    target, decoder = attempt.target, attempt.decoder
+    info.provider, info.model = target.provider, target.model
     
-    logger.info(f"Streaming request to {settings.ai_provider} ({settings.model})")
-    logger.debug(f"URL: {url}")
-    logger.debug(f"Messages: {len(full_messages)}")
-    
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        async with client.stream(
-            "POST",
-            url,
-            json=body,
-            headers=headers,
-        ) as response:
-            if response.status_code != 200:
-                error_text = await response.aread()
-                logger.error(f"API error ({response.status_code}): {error_text}")
-                raise Exception(f"AI provider returned {response.status_code}: {response.reason_phrase}")
+    try:
+        for content in attempt.contents:
+            yield content
+        
+        # Process the rest of the streaming response
+        while not decoder.done:
+            chunk = await anext(attempt.chunks, None)
+            contents = decoder.feed(chunk) if chunk is not None else decoder.flush()
+            
+            for content in contents:
+                yield content
             
-            # Process the streaming response
-            buffer = ""
-            async for chunk in response.aiter_text():
-                buffer += chunk
-                
-                # Process complete lines
-                while "\n" in buffer:
-                    line, buffer = buffer.split("\n", 1)
-                    line = line.strip()
-                    
-                    if not line:
-                        continue
-                    
-                    if line == "data: [DONE]":
-                        logger.debug("Stream completed")
-                        return
-                    
-                    if line.startswith("data: "):
-                        try:
-                            import json
-                            data = json.loads(line[6:])
-                            
-                            # Extract content from delta
-                            content = data.get("choices", [{}])[0].get("delta", {}).get("content")
-                            
-                            if content:
-                                yield content
-                                
-                        except json.JSONDecodeError:
-                            logger.debug(f"Skipping malformed chunk: {line[:50]}...")
-                            continue
+            if chunk is None:
+                break
+        
+        logger.debug("Stream completed")
+        info.usage = decoder.usage
+    except httpx.HTTPError as e:
+        # Tokens already went out; switching providers would garble the answer
+        error = ProviderError(f"{target.provider} stream failed: {e!r}")
+        get_router().health(target).fail(error, time.time())
+        raise error
+    finally:
+        # Return the connection to the pool (or drop it if the stream was abandoned)
+        await attempt.response.aclose()
 
 
 # =============================================================================
@@ -159,15 +806,14 @@ async def get_chat_completion(
         system_prompt: System prompt for the assistant.
         max_tokens: Maximum tokens in response.
         temperature: Response creativity (0-1).
-        
+    
     Returns:
         Complete response string.
-        
+    
     Raises:
-        Exception: If API request fails.
+        Exception: If every provider fails.
     """
-    if not settings.api_key:
-        raise Exception(f"API key not configured for provider: {settings.ai_provider}")
+    router = get_router()
     
     # Build messages with system prompt
     full_messages = [
@@ -175,32 +821,28 @@ async def get_chat_completion(
         *messages,
     ]
     
-    # Request body
-    body = {
-        "model": settings.model,
-        "messages": full_messages,
-        "max_tokens": max_tokens or settings.ai_max_tokens,
-        "temperature": temperature or settings.ai_temperature,
-        "stream": False,
-    }
+    last_error: Optional[Exception] = None
     
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {settings.api_key}",
-    }
-    
-    url = f"{settings.base_url}/chat/completions"
-    
-    logger.info(f"Non-streaming request to {settings.ai_provider} ({settings.model})")
-    
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(url, json=body, headers=headers)
+    for target in _select_targets():
+        health = router.health(target)
+        started = time.perf_counter()
+        health.begin(time.time())
         
-        if response.status_code != 200:
-            logger.error(f"API error ({response.status_code}): {response.text}")
-            raise Exception(f"AI provider returned {response.status_code}: {response.reason_phrase}")
+        try:
+            response = await _open(target, full_messages, max_tokens, temperature, stream=False)
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+        except (ProviderError, httpx.HTTPError) as e:
+            health.fail(e, time.time())
+            last_error = e
+            continue
         
+        health.succeed((time.perf_counter() - started) * 1000, time.time())
         data = response.json()
         content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
         
         return content
+    
+    raise last_error or Exception("No AI provider available")
@@ -0,0 +1,349 @@
+"""
+NEXI AI Chatbot - Latency Metrics
+
+Constant-time, bounded-memory latency recording for the service metrics.
+Values go into log-spaced buckets (DDSketch-style, ~1% relative error),
+so insertion is O(1) and percentiles are computed from bucket counts
+instead of sorting raw samples.
+
+Also provides per-request stage timing (spans, time-to-first-token,
+tokens per second) for the chat pipeline.
+"""
+
+import math
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Iterator
+
+# =============================================================================
+# Histogram Configuration
+# =============================================================================
+
+RELATIVE_ACCURACY = 0.01  # Percentile values are within ~1% of the true value
+MIN_TRACKED_MS = 0.01  # Anything faster lands in the first bucket
+
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+
+REPORTED_PERCENTILES = (50, 90, 95, 99)
+
+# Rolling windows: name -> (window seconds, slot seconds)
+ROLLING_WINDOWS: Dict[str, tuple] = {
+    "1m": (60, 5),
+    "5m": (300, 15),
+    "1h": (3600, 60),
+}
+
+
+def _bucket_index(value: float) -> int:
+    """Map a value to its log-spaced bucket."""
+    if value <= MIN_TRACKED_MS:
+        return 0
+    return int(math.ceil(math.log(value / MIN_TRACKED_MS) / _LOG_GAMMA))
+
+
+def _bucket_value(index: int) -> float:
+    """Representative value of a bucket (midpoint in relative terms)."""
+    if index == 0:
+        return MIN_TRACKED_MS
+    return MIN_TRACKED_MS * 2 * _GAMMA ** index / (_GAMMA + 1)
+
+
+# =============================================================================
+# Latency Histogram
+# =============================================================================
+
+class LatencyHistogram:
+    """
+    Log-bucketed histogram of latencies in milliseconds.
+    
+    Buckets are stored sparsely, so memory is bounded by the number of
+    distinct buckets hit (~1,000 between 0.01ms and one hour), never by
+    the number of samples.
+    """
+    
+    __slots__ = ("buckets", "count", "total", "max")
+    
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def record(self, value: float):
+        """Record one latency sample."""
+        index = _bucket_index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+    
+    def merge(self, other: "LatencyHistogram"):
+        """Add another histogram's samples into this one."""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+    
+    def percentiles(self, percentiles=REPORTED_PERCENTILES) -> Dict[int, float]:
+        """Get several percentiles in a single pass over the buckets."""
+        result: Dict[int, float] = {}
+        if self.count == 0:
+            return {p: 0.0 for p in percentiles}
+        
+        targets = sorted(percentiles)
+        ranks = [max(1, math.ceil(self.count * p / 100)) for p in targets]
+        
+        seen = 0
+        position = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            while position < len(ranks) and seen >= ranks[position]:
+                # Never report above the true maximum
+                result[targets[position]] = min(_bucket_value(index), self.max)
+                position += 1
+            if position == len(ranks):
+                break
+        
+        return result
+    
+    def summary(self, unit: str = "ms") -> Dict[str, Any]:
+        """Get count, average, reported percentiles and max."""
+        values = self.percentiles()
+        
+        return {
+            "count": self.count,
+            f"avg_{unit}": round(self.total / self.count, 2) if self.count else 0,
+            **{f"p{p}_{unit}": round(values[p], 2) for p in REPORTED_PERCENTILES},
+            f"max_{unit}": round(self.max, 2),
+        }
+
+
+# =============================================================================
+# Rolling Window
+# =============================================================================
+
+class RollingHistogram:
+    """
+    Histogram over a sliding time window.
+    
+    The window is a ring of fixed-width time slots, each with its own
+    histogram; stale slots are reset lazily when the ring wraps around.
+    """
+    
+    def __init__(self, window_seconds: int, slot_seconds: int):
+        self.window_seconds = window_seconds
+        self.slot_seconds = slot_seconds
+        self._size = window_seconds // slot_seconds
+        self._slots: List[LatencyHistogram] = [LatencyHistogram() for _ in range(self._size)]
+        self._slot_ids: List[int] = [-1] * self._size
+    
+    def record(self, value: float, now: Optional[float] = None):
+        """Record one sample at the given time."""
+        slot_id = int((now if now is not None else time.time()) // self.slot_seconds)
+        position = slot_id % self._size
+        
+        if self._slot_ids[position] != slot_id:
+            self._slots[position] = LatencyHistogram()
+            self._slot_ids[position] = slot_id
+        
+        self._slots[position].record(value)
+    
+    def snapshot(self, now: Optional[float] = None) -> LatencyHistogram:
+        """Merge the slots that are still inside the window."""
+        current = int((now if now is not None else time.time()) // self.slot_seconds)
+        merged = LatencyHistogram()
+        
+        for slot_id, histogram in zip(self._slot_ids, self._slots):
+            if current - self._size < slot_id <= current:
+                merged.merge(histogram)
+        
+        return merged
+
+
+class RollingCounts:
+    """
+    Named event counters over a sliding time window.
+    
+    Same slot ring as RollingHistogram, holding a few integers per slot.
+    """
+    
+    def __init__(self, window_seconds: int, slot_seconds: int, fields: tuple):
+        self.slot_seconds = slot_seconds
+        self.fields = fields
+        self._size = window_seconds // slot_seconds
+        self._slots: List[List[int]] = [[0] * len(fields) for _ in range(self._size)]
+        self._slot_ids: List[int] = [-1] * self._size
+    
+    def add(self, field: str, count: int = 1, now: Optional[float] = None):
+        """Count an event at the given time."""
+        slot_id = int((now if now is not None else time.time()) // self.slot_seconds)
+        position = slot_id % self._size
+        
+        if self._slot_ids[position] != slot_id:
+            self._slots[position] = [0] * len(self.fields)
+            self._slot_ids[position] = slot_id
+        
+        self._slots[position][self.fields.index(field)] += count
+    
+    def totals(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Sum each counter over the slots still inside the window."""
+        current = int((now if now is not None else time.time()) // self.slot_seconds)
+        sums = [0] * len(self.fields)
+        
+        for slot_id, counts in zip(self._slot_ids, self._slots):
+            if current - self._size < slot_id <= current:
+                for i, count in enumerate(counts):
+                    sums[i] += count
+        
+        return dict(zip(self.fields, sums))
+
+
+# =============================================================================
+# Latency Recorder
+# =============================================================================
+
+class LatencyRecorder:
+    """Lifetime histogram plus the rolling 1m/5m/1h windows for one series."""
+    
+    def __init__(self):
+        self.lifetime = LatencyHistogram()
+        self.windows: Dict[str, RollingHistogram] = {
+            name: RollingHistogram(window, slot)
+            for name, (window, slot) in ROLLING_WINDOWS.items()
+        }
+    
+    def record(self, value: float, now: Optional[float] = None):
+        """Record one sample in the lifetime histogram and every window."""
+        now = now if now is not None else time.time()
+        self.lifetime.record(value)
+        for window in self.windows.values():
+            window.record(value, now)
+    
+    def summary(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Get percentile summaries for the lifetime and each window."""
+        return {
+            "lifetime": self.lifetime.summary(),
+            **{
+                name: window.snapshot(now).summary()
+                for name, window in self.windows.items()
+            },
+        }
+
+
+# =============================================================================
+# Request Stage Timing
+# =============================================================================
+
+class RequestTimer:
+    """
+    Stage timings for one chat request, measured with a monotonic clock.
+    
+    Usage:
+        timer = RequestTimer()
+        with timer.span("embedding"):
+            ...
+        timer.mark_token()  # for each streamed token
+    """
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}  # stage -> ms (in pipeline order)
+        self.tokens = 0
+        self.first_token_at: Optional[float] = None
+        self.last_token_at: Optional[float] = None
+    
+    @staticmethod
+    def now() -> float:
+        return time.perf_counter()
+    
+    def add(self, name: str, started: float, ended: Optional[float] = None):
+        """Record a stage that ran from `started` until `ended` (default: now)."""
+        elapsed = ((ended if ended is not None else time.perf_counter()) - started) * 1000
+        self.stages[name] = self.stages.get(name, 0.0) + elapsed
+    
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time a block of code as a named stage."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, started)
+    
+    def mark_token(self):
+        """Record that a token was sent to the client."""
+        now = time.perf_counter()
+        if self.first_token_at is None:
+            self.first_token_at = now
+        self.last_token_at = now
+        self.tokens += 1
+    
+    @property
+    def ttft_ms(self) -> Optional[float]:
+        """Time from request start to the first token."""
+        if self.first_token_at is None:
+            return None
+        return (self.first_token_at - self.started) * 1000
+    
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Streaming rate after the first token."""
+        if self.tokens < 2 or self.last_token_at is None or self.last_token_at <= self.first_token_at:
+            return None
+        return (self.tokens - 1) / (self.last_token_at - self.first_token_at)
+    
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+    
+    def server_timing(self) -> str:
+        """
+        Format the stages completed so far as a Server-Timing header value.
+        
+        Headers go out while the response still streams, so the total (and
+        any stage still running) is left out.
+        """
+        parts = [f"{name};dur={ms:.1f}" for name, ms in self.stages.items()]
+        if self.ttft_ms is not None:
+            parts.append(f"ttft;dur={self.ttft_ms:.1f}")
+        return ", ".join(parts)
+
+
+class StageMetrics:
+    """Aggregated per-stage latency, time-to-first-token and token rate."""
+    
+    def __init__(self):
+        self.stages: Dict[str, LatencyRecorder] = {}
+        self.ttft = LatencyRecorder()
+        self.tokens_per_second = LatencyHistogram()
+    
+    def record(self, timer: RequestTimer):
+        """Fold one finished request's timings into the aggregates."""
+        now = time.time()
+        
+        for name, ms in timer.stages.items():
+            recorder = self.stages.get(name)
+            if recorder is None:
+                recorder = self.stages[name] = LatencyRecorder()
+            recorder.record(ms, now)
+        
+        if timer.ttft_ms is not None:
+            self.ttft.record(timer.ttft_ms, now)
+        
+        if timer.tokens_per_second is not None:
+            self.tokens_per_second.record(timer.tokens_per_second)
+    
+    def summary(self) -> Dict[str, Any]:
+        """Get lifetime and rolling summaries for every stage."""
+        now = time.time()
+        
+        return {
+            "stages": {
+                name: recorder.summary(now)
+                for name, recorder in self.stages.items()
+            },
+            "ttft": self.ttft.summary(now),
+            "tokens_per_second": self.tokens_per_second.summary(unit="tps"),
+        }
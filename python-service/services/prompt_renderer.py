@@ -0,0 +1,210 @@
+"""
+NEXI AI Chatbot - Prompt Renderer
+
+Memoized system-prompt rendering. Everything in the system prompt except
+the retrieved-docs section depends only on the portfolio and the
+session's A/B response style, so those parts are rendered once per
+(portfolio version, style) and each request only splices in its
+retrieved context.
+
+With the "prefix_cache" layout the retrieved context is not spliced into
+the system prompt at all but sent as a message after the conversation
+history, so the system prompt is byte-stable and the provider can serve
+system prompt + history from its prompt-prefix cache.
+
+The portfolio version is the PortfolioContext object itself:
+reload_portfolio_context() creates a new one, which drops every
+pre-rendered template on the next render.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.prompts import build_system_prompt, format_retrieved_context, semantic_prompt_parts
+from config.settings import settings
+from models.schemas import PortfolioContext
+from services.token_budget import count_request_tokens, get_token_budget_stats, pack_context
+
+logger = logging.getLogger("nexi.prompt_renderer")
+
+# =============================================================================
+# Renderer Configuration
+# =============================================================================
+
+MAX_TEMPLATES = 64  # Styles come from the A/B variants, so this is never reached in practice
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """Pre-rendered static parts of the system prompts for one style."""
+    full: str  # Full-context prompt (used when nothing was retrieved)
+    head: str  # Semantic prompt before the retrieved context
+    tail: str  # Semantic prompt after the retrieved context
+    semantic: str  # Semantic prompt without the retrieved context (head + tail)
+
+
+@dataclass
+class RenderedPrompt:
+    """System prompt and messages ready to send, with their input token count."""
+    system_prompt: str
+    messages: List[Dict[str, str]]
+    input_tokens: int
+
+
+def with_retrieved_context(messages: List[Dict[str, str]], retrieved_context: str) -> List[Dict[str, str]]:
+    """Insert the retrieved context as a system message before the latest user turn."""
+    if not retrieved_context:
+        return messages
+    
+    position = len(messages) - 1 if messages and messages[-1]["role"] == "user" else len(messages)
+    return [*messages[:position], {"role": "system", "content": retrieved_context}, *messages[position:]]
+
+
+# =============================================================================
+# Prompt Renderer
+# =============================================================================
+
+class PromptRenderer:
+    """
+    Renders system prompts from cached templates.
+    
+    Usage:
+        renderer = get_prompt_renderer()
+        system_prompt = renderer.render(context, retrieved_docs, response_style)
+    """
+    
+    def __init__(self):
+        self._context: Optional[PortfolioContext] = None
+        self._templates: Dict[str, PromptTemplate] = {}  # response style -> template
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def template(self, context: PortfolioContext, response_style: str = "") -> PromptTemplate:
+        """Get the pre-rendered template for a portfolio version and style."""
+        if context is not self._context:
+            if self._context is not None:
+                self.invalidations += 1
+                logger.info("Portfolio context changed, dropping pre-rendered prompts")
+            self._context = context
+            self._templates.clear()
+        
+        template = self._templates.get(response_style)
+        if template is not None:
+            self.hits += 1
+            return template
+        
+        self.misses += 1
+        head, tail = semantic_prompt_parts(context, response_style)
+        template = PromptTemplate(
+            full=build_system_prompt(context, response_style),
+            head=head,
+            tail=tail,
+            semantic=head + tail,
+        )
+        
+        if len(self._templates) >= MAX_TEMPLATES:
+            self._templates.clear()
+        self._templates[response_style] = template
+        
+        return template
+    
+    def render(
+        self,
+        context: PortfolioContext,
+        retrieved_docs: Optional[List[Dict[str, Any]]] = None,
+        response_style: str = "",
+    ) -> str:
+        """
+        Build the system prompt for one request.
+        
+        Args:
+            context: Portfolio context (identifies the portfolio version)
+            retrieved_docs: Retrieved documents; without any, the full-context
+                prompt is returned
+            response_style: A/B response style text ("" for none)
+        
+        Returns:
+            The system prompt, identical to build_semantic_prompt /
+            build_system_prompt with the response style applied.
+        """
+        template = self.template(context, response_style)
+        if not retrieved_docs:
+            return template.full
+        
+        return "".join((template.head, format_retrieved_context(retrieved_docs), template.tail))
+    
+    def render_request(
+        self,
+        context: PortfolioContext,
+        retrieved_docs: List[Dict[str, Any]],
+        messages: List[Dict[str, str]],
+        response_style: str = "",
+    ) -> RenderedPrompt:
+        """
+        Build everything sent to the LLM for one chat request.
+        
+        Retrieved docs and history are packed into `context_token_budget`
+        on top of the system prompt (see services.token_budget), then laid
+        out per `prompt_layout`.
+        
+        Args:
+            context: Portfolio context (identifies the portfolio version)
+            retrieved_docs: Retrieved documents, best first
+            messages: Conversation, oldest first, ending with the latest turn
+            response_style: A/B response style text ("" for none)
+        """
+        template = self.template(context, response_style)
+        packed = pack_context(
+            retrieved_docs,
+            messages,
+            budget=settings.context_token_budget,
+            dedupe_threshold=settings.context_dedupe_threshold,
+        )
+        
+        if not packed.docs:
+            system_prompt, llm_messages = template.full, packed.messages
+        elif settings.prompt_layout == "prefix_cache":
+            # Byte-stable system prompt + history first, retrieved docs last
+            retrieved_context = format_retrieved_context(packed.docs).strip()
+            system_prompt = template.semantic
+            llm_messages = with_retrieved_context(packed.messages, retrieved_context)
+        else:
+            system_prompt = "".join((template.head, format_retrieved_context(packed.docs), template.tail))
+            llm_messages = packed.messages
+        
+        input_tokens = count_request_tokens(system_prompt, llm_messages)
+        get_token_budget_stats().record(packed, input_tokens)
+        
+        return RenderedPrompt(system_prompt, llm_messages, input_tokens)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get renderer statistics."""
+        lookups = self.hits + self.misses
+        
+        return {
+            "templates": len(self._templates),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": f"{self.hits / lookups * 100:.1f}%" if lookups else "0%",
+            "invalidations": self.invalidations,
+        }
+
+
+# =============================================================================
+# Global Renderer Instance
+# =============================================================================
+
+_prompt_renderer: Optional[PromptRenderer] = None
+
+
+def get_prompt_renderer() -> PromptRenderer:
+    """Get or create the global prompt renderer."""
+    global _prompt_renderer
+    
+    if _prompt_renderer is None:
+        _prompt_renderer = PromptRenderer()
+        logger.info("Prompt renderer initialized")
+    
+    return _prompt_renderer
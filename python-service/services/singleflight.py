@@ -0,0 +1,249 @@
+"""
+NEXI AI Chatbot - Single-Flight Request Coalescing
+
+Collapses identical concurrent chat queries onto one upstream LLM stream.
+The first request starts the stream; concurrent duplicates subscribe to a
+broadcaster that replays the tokens produced so far and then tails the
+live stream. The completed response (as its token list) is handed to a
+callback (the response cache) exactly once.
+"""
+
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, Dict, Optional, Any, List, Tuple
+
+logger = logging.getLogger("nexi.singleflight")
+
+
+# =============================================================================
+# Stream Broadcaster
+# =============================================================================
+
+class StreamBroadcast:
+    """
+    Fan-out of one upstream token stream to any number of subscribers.
+    
+    Tokens are kept in order so late subscribers replay from the start.
+    """
+    
+    def __init__(self, key: str):
+        self.key = key
+        self.tokens: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self._members: set = set()  # Handles of subscriptions still counted in subscribers
+        self.cancelled = False  # The last subscriber left, so the upstream was cancelled
+        self.task: Optional[asyncio.Task] = None
+        # Called from the owner task with this broadcast once the upstream ends
+        # (completed, failed or cancelled), e.g. to record its full usage
+        self.on_finish: Optional[Callable[["StreamBroadcast"], Any]] = None
+        self._waiter = asyncio.Event()
+    
+    def _wake(self):
+        """Wake all waiting subscribers."""
+        self._waiter.set()
+        self._waiter = asyncio.Event()
+    
+    def publish(self, token: str):
+        """Append a token and notify subscribers."""
+        self.tokens.append(token)
+        self._wake()
+    
+    def finish(self, error: Optional[BaseException] = None):
+        """Mark the stream as complete (optionally failed)."""
+        self.done = True
+        self.error = error
+        self._wake()
+    
+    @property
+    def text(self) -> str:
+        """Full text produced so far."""
+        return "".join(self.tokens)
+    
+    async def subscribe(self, member: Optional[object] = None) -> AsyncIterator[str]:
+        """
+        Yield every token (replayed, then live) until the stream ends.
+        
+        Args:
+            member: Optional handle identifying this subscription (see abandon)
+        
+        Raises:
+            The upstream error if the stream failed.
+        """
+        self.subscribers += 1
+        if member is not None:
+            self._members.add(member)
+        index = 0
+        
+        try:
+            while True:
+                while index < len(self.tokens):
+                    yield self.tokens[index]
+                    index += 1
+                
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                
+                await self._waiter.wait()
+        finally:
+            self.subscribers -= 1
+            self._members.discard(member)
+            
+            # Nobody is listening any more - stop paying for the upstream stream
+            if self.subscribers == 0:
+                self._cancel()
+    
+    def _cancel(self):
+        """Cancel the upstream stream if it is still running."""
+        if not self.done and not self.cancelled and self.task is not None:
+            self.cancelled = True
+            self.task.cancel()
+    
+    def abandon(self, member: object) -> bool:
+        """
+        Account for a subscriber that is leaving, and cancel the upstream
+        stream if nobody else is listening.
+        
+        The subscription may still be unwinding in another task (e.g. a
+        cancelled reader), so it is discounted here rather than relying on
+        subscribe's cleanup having run.
+        
+        Args:
+            member: The handle passed to subscribe (or never subscribed)
+        
+        Returns:
+            True if the upstream stream is (or is being) cancelled.
+        """
+        if self.done:
+            return False
+        if self.subscribers - (member in self._members) <= 0:
+            self._cancel()
+        return self.cancelled
+
+
+# =============================================================================
+# Single-Flight Manager
+# =============================================================================
+
+class SingleFlight:
+    """
+    Tracks in-flight upstream streams by key.
+    
+    Features:
+    - One upstream stream per key at a time
+    - Replay + live tail for concurrent duplicates
+    - Completion callback runs once per flight
+    - Statistics tracking
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[str, StreamBroadcast] = {}
+        self._stats = {
+            "flights": 0,
+            "coalesced": 0,
+            "failed": 0,
+            "cancelled": 0,
+        }
+    
+    def get(self, key: str) -> Optional[StreamBroadcast]:
+        """Get the in-flight broadcast for a key, if any."""
+        broadcast = self._inflight.get(key)
+        if broadcast is not None:
+            self._stats["coalesced"] += 1
+        return broadcast
+    
+    def start(
+        self,
+        key: str,
+        factory: Callable[[], AsyncIterator[str]],
+        on_complete: Optional[Callable[[List[str]], Any]] = None,
+    ) -> Tuple[StreamBroadcast, bool]:
+        """
+        Join the flight for a key, starting the upstream stream if needed.
+        
+        Args:
+            key: Coalescing key (normalized cache key)
+            factory: Creates the upstream token iterator (only called by the leader)
+            on_complete: Called with the token list when the stream succeeds
+        
+        Returns:
+            (broadcast, is_leader) - is_leader is False if another request
+            started the same flight first.
+        """
+        existing = self.get(key)
+        if existing is not None:
+            return existing, False
+        
+        broadcast = StreamBroadcast(key)
+        self._inflight[key] = broadcast
+        self._stats["flights"] += 1
+        
+        broadcast.task = asyncio.create_task(self._drive(broadcast, factory, on_complete))
+        
+        return broadcast, True
+    
+    async def _drive(
+        self,
+        broadcast: StreamBroadcast,
+        factory: Callable[[], AsyncIterator[str]],
+        on_complete: Optional[Callable[[List[str]], Any]],
+    ):
+        """Pump the upstream stream into the broadcaster."""
+        try:
+            async for token in factory():
+                broadcast.publish(token)
+        except asyncio.CancelledError:
+            self._stats["cancelled"] += 1
+            broadcast.finish(error=Exception("Upstream stream cancelled"))
+            raise
+        except Exception as e:
+            self._stats["failed"] += 1
+            broadcast.finish(error=e)
+        else:
+            # Cache before leaving the in-flight map so new arrivals always
+            # find the response in one place or the other
+            if on_complete is not None:
+                try:
+                    on_complete(broadcast.tokens)
+                except Exception as e:
+                    logger.warning(f"Single-flight completion callback failed: {e}")
+            broadcast.finish()
+        finally:
+            if self._inflight.get(broadcast.key) is broadcast:
+                del self._inflight[broadcast.key]
+            if broadcast.on_finish is not None:
+                try:
+                    broadcast.on_finish(broadcast)
+                except Exception as e:
+                    logger.warning(f"Single-flight finish callback failed: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get single-flight statistics."""
+        return {
+            "in_flight": len(self._inflight),
+            "flights": self._stats["flights"],
+            "coalesced_requests": self._stats["coalesced"],
+            "failed": self._stats["failed"],
+            "cancelled": self._stats["cancelled"],
+        }
+
+
+# =============================================================================
+# Global Instance
+# =============================================================================
+
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Get or create the global single-flight manager."""
+    global _single_flight
+    
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+        logger.info("Single-flight coalescing initialized")
+    
+    return _single_flight
@@ -0,0 +1,226 @@
+"""
+NEXI AI Chatbot - SSE Frame Encoding
+
+Pre-encoded Server-Sent Event frames for the chat stream. Frames are
+byte-identical to what sse-starlette produces for
+{"event": "message", "data": json.dumps(...)}, so they can be yielded
+straight through EventSourceResponse, stored in the response cache and
+replayed without re-serializing anything.
+
+Live streams go through an adaptive coalescer that batches tokens into
+frames by size or by a short time window, whichever comes first.
+"""
+
+import asyncio
+import json
+import re
+from typing import AsyncIterator, Iterable, List, Optional
+
+# =============================================================================
+# Frame Encoding
+# =============================================================================
+
+FRAME_SEPARATOR = b"\r\n\r\n"
+_EVENT_PREFIX = b"event: message\r\ndata: "
+
+
+def encode_frame(payload: dict) -> bytes:
+    """Encode one `message` event."""
+    return _EVENT_PREFIX + json.dumps(payload).encode("utf-8") + FRAME_SEPARATOR
+
+
+def content_frame(text: str) -> bytes:
+    """Encode a content event."""
+    return encode_frame({"type": "content", "content": text})
+
+
+DONE_FRAME = encode_frame({"type": "done"})
+
+
+def split_frames(blob: bytes) -> List[bytes]:
+    """
+    Split concatenated frames back into a list.
+    
+    JSON escapes control characters, so the separator never appears
+    inside a frame.
+    """
+    return [part + FRAME_SEPARATOR for part in blob.split(FRAME_SEPARATOR) if part]
+
+
+# =============================================================================
+# Chunking
+# =============================================================================
+
+# Word plus trailing whitespace, keeping newlines and markdown intact
+_WORD_PATTERN = re.compile(r"\s*\S+\s*|\s+")
+
+
+def split_words(text: str) -> List[str]:
+    """Split text into tokens whose concatenation is exactly `text`."""
+    return _WORD_PATTERN.findall(text)
+
+
+def coalesce(tokens: Iterable[str], max_chars: int) -> List[str]:
+    """
+    Merge consecutive tokens into chunks of about `max_chars` characters.
+    
+    Chunk boundaries always fall on original token boundaries; with
+    max_chars <= 0 every token is its own chunk.
+    """
+    if max_chars <= 0:
+        return [token for token in tokens if token]
+    
+    chunks: List[str] = []
+    pending: List[str] = []
+    size = 0
+    
+    for token in tokens:
+        pending.append(token)
+        size += len(token)
+        if size >= max_chars:
+            chunks.append("".join(pending))
+            pending = []
+            size = 0
+    
+    if pending:
+        chunks.append("".join(pending))
+    
+    return chunks
+
+
+def build_frames(tokens: Iterable[str], max_chars: int) -> List[bytes]:
+    """Encode a response as content frames at (coalesced) token boundaries."""
+    return [content_frame(chunk) for chunk in coalesce(tokens, max_chars)]
+
+
+# =============================================================================
+# Replay
+# =============================================================================
+
+async def replay_frames(frames: List[bytes], mode: str, delay: float = 0.0) -> AsyncIterator[bytes]:
+    """
+    Replay pre-encoded frames.
+    
+    Args:
+        frames: Content frames from the cache entry
+        mode: "instant" (one write), "chunked" (one write per frame, no delay)
+            or "paced" (one write per frame, `delay` seconds apart)
+        delay: Seconds between frames in paced mode
+    
+    Yields:
+        Frame bytes ready to send
+    """
+    if mode == "instant":
+        yield b"".join(frames)
+        return
+    
+    for i, frame in enumerate(frames):
+        if mode == "paced" and i and delay > 0:
+            await asyncio.sleep(delay)
+        yield frame
+
+
+# =============================================================================
+# Live Coalescing
+# =============================================================================
+
+async def _next_token(tokens: AsyncIterator[str]) -> Optional[str]:
+    """Await the next token, returning None at the end of the stream."""
+    try:
+        return await tokens.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+async def coalesce_tokens(
+    tokens: AsyncIterator[str],
+    max_chars: int,
+    window: float,
+) -> AsyncIterator[List[str]]:
+    """
+    Group a live token stream into frames.
+    
+    The first token is always sent on its own, so time-to-first-token is
+    unchanged. After that a frame is flushed once it holds `max_chars`
+    characters or its oldest token has waited `window` seconds, whichever
+    comes first. With max_chars <= 0 every token is its own frame.
+    
+    Args:
+        tokens: Upstream token iterator
+        max_chars: Size threshold for a frame
+        window: Longest time (seconds) a token may wait for company
+    
+    Yields:
+        Lists of tokens, one list per frame
+    """
+    tokens = tokens.__aiter__()
+    loop = asyncio.get_running_loop()
+    pending: List[str] = []
+    size = 0
+    deadline = 0.0
+    first = True
+    waiter: Optional[asyncio.Task] = None
+    
+    try:
+        while True:
+            if pending:
+                # Wait for the next token only until the frame's deadline.
+                # The read stays in flight across the flush, so the upstream
+                # iterator is never cancelled mid-read.
+                if waiter is None:
+                    waiter = asyncio.ensure_future(_next_token(tokens))
+                remaining = deadline - loop.time()
+                if remaining > 0:
+                    await asyncio.wait((waiter,), timeout=remaining)
+                if not waiter.done():
+                    yield pending
+                    pending, size = [], 0
+                    continue
+            
+            if waiter is not None:
+                token = await waiter
+                waiter = None
+            else:
+                token = await _next_token(tokens)
+            
+            if token is None:
+                break
+            
+            pending.append(token)
+            size += len(token)
+            
+            if first or size >= max_chars or window <= 0:
+                first = False
+                yield pending
+                pending, size = [], 0
+            elif len(pending) == 1:
+                deadline = loop.time() + window
+        
+        if pending:
+            yield pending
+    finally:
+        # Stop the upstream promptly when the consumer goes away. A read in
+        # flight is cancelled (the iterator then unwinds itself); otherwise
+        # the iterator is closed directly.
+        if waiter is not None and not waiter.done():
+            waiter.cancel()
+        elif hasattr(tokens, "aclose"):
+            await tokens.aclose()
+
+
+class StreamStats:
+    """Frames, bytes and tokens sent for one response."""
+    
+    __slots__ = ("frames", "bytes", "tokens")
+    
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+        self.tokens = 0
+    
+    def add(self, frame: bytes, tokens: int = 0) -> bytes:
+        """Count a frame on its way out (returns it unchanged)."""
+        self.frames += 1
+        self.bytes += len(frame)
+        self.tokens += tokens
+        return frame
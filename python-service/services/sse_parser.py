@@ -0,0 +1,168 @@
+"""
+NEXI AI Chatbot - Provider Stream Parser
+
+Incremental, byte-level decoder for OpenAI-compatible chat completion
+streams (OpenAI, Groq). Network chunks are appended to one reusable
+buffer, newlines are scanned from where the previous scan stopped, and
+the common `"delta":{"content":"..."}` chunk shape is decoded without a
+full JSON parse. Everything else falls back to orjson (if installed) or
+the standard json module.
+"""
+
+import json
+import logging
+from typing import List, Optional, Dict, Any
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _JSON_ERRORS = (orjson.JSONDecodeError, ValueError)
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+    _JSON_ERRORS = (ValueError,)
+
+logger = logging.getLogger("nexi.sse")
+
+DATA_PREFIX = b"data:"
+DONE_MARKER = b"[DONE]"
+
+# Shape of nearly every content chunk from OpenAI and Groq
+_CONTENT_MARKER = b'"delta":{"content":"'
+
+
+# =============================================================================
+# Incremental Decoder
+# =============================================================================
+
+class SSEDecoder:
+    """
+    Decodes a chat completion SSE byte stream into content deltas.
+    
+    Usage:
+        decoder = SSEDecoder()
+        async for chunk in response.aiter_bytes():
+            for content in decoder.feed(chunk):
+                yield content
+            if decoder.done:
+                break
+    """
+    
+    def __init__(self):
+        self._buffer = bytearray()
+        self._scanned = 0  # Bytes of the buffer already known to hold no newline
+        self.done = False
+        self.usage: Optional[Dict[str, Any]] = None
+        self.fast_path_hits = 0
+        self.full_parses = 0
+    
+    def feed(self, chunk: bytes) -> List[str]:
+        """
+        Add a network chunk and return the content deltas it completed.
+        
+        Args:
+            chunk: Raw bytes as received (may split lines and UTF-8 sequences)
+        
+        Returns:
+            Content strings, in order. Empty once [DONE] has been seen.
+        """
+        if self.done:
+            return []
+        
+        buffer = self._buffer
+        buffer += chunk
+        contents: List[str] = []
+        
+        start = 0
+        newline = buffer.find(b"\n", self._scanned)
+        while newline != -1:
+            # Every other line is the blank event separator
+            if newline - start > 1:
+                self._handle_line(buffer, start, newline, contents)
+                if self.done:
+                    buffer.clear()
+                    self._scanned = 0
+                    return contents
+            start = newline + 1
+            newline = buffer.find(b"\n", start)
+        
+        # Drop consumed lines once per chunk; only the partial line is kept
+        if start:
+            del buffer[:start]
+        self._scanned = len(buffer)
+        
+        return contents
+    
+    def flush(self) -> List[str]:
+        """Process a trailing line that had no newline (stream closed early)."""
+        contents: List[str] = []
+        if self._buffer and not self.done:
+            self._handle_line(self._buffer, 0, len(self._buffer), contents)
+        self._buffer.clear()
+        self._scanned = 0
+        return contents
+    
+    def _handle_line(self, buffer: bytearray, start: int, end: int, contents: List[str]):
+        """Decode one SSE line (buffer[start:end]) and collect its content."""
+        if end > start and buffer[end - 1] == 0x0D:  # \r\n line endings
+            end -= 1
+        
+        # Only `data:` fields matter; skip blank lines, comments and other fields
+        if not buffer.startswith(DATA_PREFIX, start, end):
+            return
+        
+        start += len(DATA_PREFIX)
+        if start < end and buffer[start] == 0x20:
+            start += 1
+        
+        payload = buffer[start:end]
+        if payload == DONE_MARKER:
+            self.done = True
+            return
+        
+        content = self._fast_content(payload)
+        if content is None:
+            content = self._parse_content(payload)
+        
+        if content:
+            contents.append(content)
+    
+    def _fast_content(self, payload: bytearray) -> Optional[str]:
+        """
+        Pull the content string out of a standard delta chunk.
+        
+        Returns None (use the full parser) if the chunk isn't in the common
+        shape or the string contains escape sequences.
+        """
+        marker = payload.find(_CONTENT_MARKER)
+        if marker == -1:
+            return None
+        
+        begin = marker + len(_CONTENT_MARKER)
+        close = payload.find(b'"', begin)
+        if close == -1 or payload.find(b"\\", begin, close) != -1:
+            return None
+        
+        self.fast_path_hits += 1
+        return payload[begin:close].decode("utf-8")
+    
+    def _parse_content(self, payload: bytearray) -> Optional[str]:
+        """Full JSON parse of a chunk (role/finish/usage chunks, escaped text)."""
+        self.full_parses += 1
+        
+        try:
+            data = _json_loads(payload)
+        except _JSON_ERRORS:
+            logger.debug(f"Skipping malformed chunk: {payload[:50]!r}...")
+            return None
+        
+        if not isinstance(data, dict):
+            return None
+        
+        # OpenAI reports usage at the top level, Groq under x_groq
+        usage = data.get("usage") or (data.get("x_groq") or {}).get("usage")
+        if usage:
+            self.usage = usage
+        
+        choices = data.get("choices") or [{}]
+        return (choices[0].get("delta") or {}).get("content")
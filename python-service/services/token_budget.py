@@ -0,0 +1,319 @@
+"""
+NEXI AI Chatbot - Token Budget
+
+Token counting and prompt packing for LLM requests. Retrieved documents
+and conversation history are fitted into a fixed token budget on top of
+the (static) system prompt: overlapping chunks are deduplicated,
+documents are kept in rank order, and the oldest turns are dropped (and
+summarized in one line, if that fits) before anything recent.
+
+Counts use tiktoken when it is installed and its encoding has been
+loaded (load_encoding, run off the event loop at startup since it may
+download the BPE file), otherwise an approximation of BPE token
+boundaries (usually within ~10% for English). One encoding is used for
+every provider: requests can fail over between models, and provider-
+reported usage is what gets billed. Counts are LRU-cached, so the static
+system prompt and repeated chunks are only tokenized once.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+from services.lexical import tokenize
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger("nexi.token_budget")
+
+# =============================================================================
+# Token Counting
+# =============================================================================
+
+MESSAGE_OVERHEAD = 3  # Role and separators per chat message (OpenAI chat format)
+REPLY_PRIMING = 3  # Tokens that prime the assistant's reply
+DOC_OVERHEAD = 8  # "[Relevance: 87%] " prefix and line break per retrieved doc
+SECTION_OVERHEAD = 30  # Retrieved-context heading and framing
+SUMMARY_QUESTION_CHARS = 80  # Each earlier question is cut to this length in the summary
+BUDGET_ENCODING = "o200k_base"  # tiktoken encoding used for every provider and model
+
+# Word, number (GPT tokenizers split digits in groups of up to 3) or punctuation run
+_APPROX_PATTERN = re.compile(r"[^\W\d_]+|\d{1,3}|[^\w\s]+|_+")
+
+_encoding = None
+_encoding_loaded = False
+
+
+def load_encoding():
+    """
+    Load the tiktoken encoding (None if unavailable).
+    
+    Blocking: tiktoken may download the BPE file on first use, so call
+    this off the event loop (e.g. asyncio.to_thread at startup). Until it
+    has loaded, counts are approximate.
+    """
+    global _encoding, _encoding_loaded
+    
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        if tiktoken is not None:
+            try:
+                _encoding = tiktoken.get_encoding(BUDGET_ENCODING)
+                count_tokens.cache_clear()  # Drop approximate counts cached before the load
+                logger.info(f"Token counting with tiktoken ({_encoding.name})")
+            except Exception as e:
+                logger.warning(f"tiktoken encoding unavailable, approximating token counts: {e}")
+    
+    return _encoding
+
+
+def approximate_tokens(text: str) -> int:
+    """Approximate BPE token count: one per short word, more for long words and symbols."""
+    count = 0
+    for piece in _APPROX_PATTERN.findall(text):
+        if piece[0].isalpha():
+            count += 1 + len(piece) // 8
+        elif piece[0].isdigit():
+            count += 1
+        else:
+            count += (len(piece) + 1) // 2
+    return count
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """Count the tokens of a text (tiktoken once loaded, approximate otherwise)."""
+    encoding = _encoding
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return approximate_tokens(text)
+
+
+def count_message_tokens(message: Dict[str, str]) -> int:
+    """Tokens one chat message occupies in the request."""
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD
+
+
+def count_request_tokens(system_prompt: str, messages: List[Dict[str, str]]) -> int:
+    """Input tokens of a chat request: system prompt plus messages."""
+    return (
+        count_tokens(system_prompt)
+        + MESSAGE_OVERHEAD
+        + sum(count_message_tokens(message) for message in messages)
+        + REPLY_PRIMING
+    )
+
+
+# =============================================================================
+# Chunk Deduplication
+# =============================================================================
+
+@lru_cache(maxsize=1024)
+def _doc_terms(content: str) -> frozenset:
+    """Distinct search terms of a chunk (cached; chunks repeat across requests)."""
+    return frozenset(tokenize(content))
+
+
+def dedupe_docs(docs: List[Dict[str, Any]], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Drop retrieved chunks that mostly repeat another retrieved chunk.
+    
+    A chunk whose terms are at least `threshold` contained in another is
+    redundant (e.g. "project-tech-x" inside "project-x"). The fuller
+    chunk is kept, at the better of the two ranks.
+    
+    Args:
+        docs: Retrieved documents, best first
+        threshold: Share of a chunk's terms that must appear in the other (0-1)
+    """
+    kept: List[Dict[str, Any]] = []
+    kept_terms: List[frozenset] = []
+    
+    for doc in docs:
+        terms = _doc_terms(doc.get("content", ""))
+        redundant = False
+        
+        for i, other in enumerate(kept_terms):
+            shared = len(terms & other)
+            if terms and shared / len(terms) >= threshold:
+                redundant = True
+                break
+            if other and shared / len(other) >= threshold:
+                # The kept chunk is the subset: the fuller one takes its place
+                kept[i], kept_terms[i] = doc, terms
+                redundant = True
+                break
+        
+        if not redundant:
+            kept.append(doc)
+            kept_terms.append(terms)
+    
+    return kept
+
+
+# =============================================================================
+# Context Packing
+# =============================================================================
+
+@dataclass
+class PackedContext:
+    """What fits into the input budget for one request."""
+    docs: List[Dict[str, Any]]
+    messages: List[Dict[str, str]]
+    deduped_docs: int = 0
+    dropped_docs: int = 0
+    dropped_turns: int = 0
+    summarized: bool = False
+
+
+def summarize_turns(turns: List[Dict[str, str]]) -> Optional[str]:
+    """One-line summary of dropped turns: the questions the visitor asked."""
+    questions = []
+    for turn in turns:
+        if turn["role"] == "user":
+            text = " ".join(turn["content"].split())
+            if len(text) > SUMMARY_QUESTION_CHARS:
+                text = text[:SUMMARY_QUESTION_CHARS].rsplit(" ", 1)[0] + "..."
+            questions.append(f'"{text}"')
+    
+    if not questions:
+        return None
+    return f"Earlier in this conversation the visitor asked: {'; '.join(questions)}"
+
+
+def pack_context(
+    docs: List[Dict[str, Any]],
+    messages: List[Dict[str, str]],
+    budget: int,
+    dedupe_threshold: float = 0.8,
+) -> PackedContext:
+    """
+    Fit retrieved docs and history into a token budget.
+    
+    The budget covers what varies per request; the system prompt is the
+    same for every request, cannot be trimmed and is not counted. The
+    latest message and the best retrieved doc are always kept. Further docs are added in rank order while they fit,
+    then history from the newest turn back. Turns that did not fit are
+    replaced by a one-line summary, giving up the oldest kept turns to
+    make room for it if needed.
+    
+    Args:
+        docs: Retrieved documents, best first
+        messages: Conversation, oldest first, ending with the latest turn
+        budget: Max tokens for retrieved docs and messages
+        dedupe_threshold: See dedupe_docs
+    
+    Returns:
+        The docs and messages to send (messages may start with a summary
+        system message).
+    """
+    unique_docs = dedupe_docs(docs, dedupe_threshold)
+    packed = PackedContext(docs=[], messages=[], deduped_docs=len(docs) - len(unique_docs))
+    
+    latest, history = messages[-1:], messages[:-1]
+    remaining = budget - sum(count_message_tokens(message) for message in latest)
+    
+    for doc in unique_docs:
+        cost = count_tokens(doc.get("content", "")) + DOC_OVERHEAD
+        if not packed.docs:
+            cost += SECTION_OVERHEAD + MESSAGE_OVERHEAD
+        if cost <= remaining or not packed.docs:
+            packed.docs.append(doc)
+            remaining -= cost
+        else:
+            packed.dropped_docs += 1
+    
+    kept = len(history)
+    for message in reversed(history):
+        cost = count_message_tokens(message)
+        if cost > remaining:
+            break
+        remaining -= cost
+        kept -= 1
+    
+    # Make room for the summary by giving up the oldest kept turns if needed
+    summary = None
+    while kept:
+        summary = summarize_turns(history[:kept])
+        if summary is None or kept == len(history):
+            break
+        if count_message_tokens({"role": "system", "content": summary}) <= remaining:
+            break
+        remaining += count_message_tokens(history[kept])
+        kept += 1
+    
+    packed.dropped_turns = kept
+    packed.messages = [*history[kept:], *latest]
+    
+    if summary is not None:
+        message = {"role": "system", "content": summary}
+        if count_message_tokens(message) <= remaining:
+            packed.messages.insert(0, message)
+            packed.summarized = True
+    
+    return packed
+
+
+# =============================================================================
+# Budget Statistics
+# =============================================================================
+
+class TokenBudgetStats:
+    """Counters for packed requests."""
+    
+    def __init__(self):
+        self.requests = 0
+        self.trimmed = 0  # Requests that lost a doc or a turn to the budget
+        self.input_tokens = 0
+        self.deduped_docs = 0
+        self.dropped_docs = 0
+        self.dropped_turns = 0
+        self.summaries = 0
+    
+    def record(self, packed: PackedContext, input_tokens: int):
+        """Count one packed request."""
+        self.requests += 1
+        self.input_tokens += input_tokens
+        self.deduped_docs += packed.deduped_docs
+        self.dropped_docs += packed.dropped_docs
+        self.dropped_turns += packed.dropped_turns
+        self.summaries += packed.summarized
+        if packed.dropped_docs or packed.dropped_turns:
+            self.trimmed += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get budget statistics."""
+        cache = count_tokens.cache_info()
+        lookups = cache.hits + cache.misses
+        
+        return {
+            "budget": settings.context_token_budget,
+            "tokenizer": f"tiktoken:{_encoding.name}" if _encoding is not None else "approximate",
+            "requests": self.requests,
+            "avg_input_tokens": round(self.input_tokens / self.requests, 1) if self.requests else 0,
+            "trimmed_requests": self.trimmed,
+            "deduped_docs": self.deduped_docs,
+            "dropped_docs": self.dropped_docs,
+            "dropped_turns": self.dropped_turns,
+            "summaries": self.summaries,
+            "count_cache_hit_rate": f"{cache.hits / lookups * 100:.1f}%" if lookups else "0%",
+        }
+
+
+_budget_stats: Optional[TokenBudgetStats] = None
+
+
+def get_token_budget_stats() -> TokenBudgetStats:
+    """Get or create the global budget statistics."""
+    global _budget_stats
+    
+    if _budget_stats is None:
+        _budget_stats = TokenBudgetStats()
+    
+    return _budget_stats